@@ -0,0 +1,213 @@
+import itertools
+import os
+import re
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from runtime import _log
+
+# Persistent multiplexed ADB shell sessions.
+#
+# One non-interactive `sh` is kept open per device over a single adb socket.
+# Commands are written back-to-back (pipelined) and each one is followed by a
+# marker carrying its id and exit code, so a reader thread can split the stream
+# and complete each command individually.
+#
+# HINGE_ADB_SESSION=0 disables sessions (every command uses device.shell).
+
+_MARKER_RE = re.compile(rb"\x1eHD:(\d+):(\d+)\x1f")
+
+
+class ShellCommand:
+    """Handle for one submitted command; wait() returns its output."""
+
+    def __init__(self, cmd_id: int, cmd: str):
+        self.cmd_id = cmd_id
+        self.cmd = cmd
+        self.output = ""
+        self.returncode: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self._done = threading.Event()
+
+    def _complete(self, output: str, returncode: Optional[int], error: Optional[BaseException] = None) -> None:
+        self.output = output
+        self.returncode = returncode
+        self.error = error
+        self._done.set()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> str:
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"adb shell command timed out: {self.cmd}")
+        if self.error is not None:
+            raise self.error
+        return self.output
+
+
+class ShellSession:
+    """
+    Long-lived shell stream for one device.
+    Devices without create_connection() (fakes, replay devices) are served by
+    plain device.shell() calls, so callers never need to special-case them.
+    """
+
+    def __init__(self, device, timeout_s: float = 30.0):
+        self.device = device
+        self.timeout_s = timeout_s
+        self._ids = itertools.count(1)
+        self._write_lock = threading.Lock()
+        self._pending: Deque[ShellCommand] = deque()
+        self._pending_lock = threading.Lock()
+        self._conn = None
+        self._sock = None
+        self._reader: Optional[threading.Thread] = None
+        self._closed = False
+        self.persistent = hasattr(device, "create_connection")
+        if self.persistent:
+            self._open()
+
+    def _open(self) -> None:
+        conn = self.device.create_connection(timeout=None)
+        # A command argument gives a raw (non-pty) shell: no echo, no prompt.
+        conn.send("shell:sh")
+        self._conn = conn
+        self._sock = conn.socket
+        self._reader = threading.Thread(target=self._read_loop, name="adb-shell-reader", daemon=True)
+        self._reader.start()
+
+    def _read_loop(self) -> None:
+        buf = b""
+        err: Optional[BaseException] = None
+        try:
+            while True:
+                chunk = self._sock.recv(65536)
+                if not chunk:
+                    break
+                buf += chunk
+                while True:
+                    m = _MARKER_RE.search(buf)
+                    if not m:
+                        break
+                    out = buf[: m.start()].decode("utf-8", errors="ignore")
+                    buf = buf[m.end():]
+                    self._finish_next(int(m.group(1)), out, int(m.group(2)))
+        except Exception as e:
+            err = e
+        self._fail_pending(err or ConnectionError("adb shell session closed"))
+
+    def _finish_next(self, cmd_id: int, output: str, returncode: int) -> None:
+        with self._pending_lock:
+            cmd = self._pending.popleft() if self._pending else None
+        if cmd is None:
+            return
+        if cmd.cmd_id != cmd_id:
+            cmd._complete(output, returncode, RuntimeError(f"adb shell out of sync ({cmd.cmd_id} != {cmd_id})"))
+            return
+        cmd._complete(output, returncode)
+
+    def _fail_pending(self, error: BaseException) -> None:
+        self._closed = True
+        with self._pending_lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        for cmd in pending:
+            cmd._complete("", None, error)
+
+    @property
+    def alive(self) -> bool:
+        return not self.persistent or not self._closed
+
+    def submit(self, cmd: str) -> ShellCommand:
+        """Queue a command without waiting for it (pipelined)."""
+        handle = ShellCommand(next(self._ids), cmd)
+        if not self.persistent:
+            try:
+                handle._complete(self.device.shell(cmd), 0)
+            except Exception as e:
+                handle._complete("", None, e)
+            return handle
+        if self._closed:
+            raise ConnectionError("adb shell session closed")
+        # Group so `;`/`&&` inside cmd can't skip the marker; stdin detached so
+        # a command can never swallow the rest of the pipeline.
+        payload = f"{{ {cmd}\n}} </dev/null 2>&1; printf '\\036HD:{handle.cmd_id}:%s\\037' $?\n"
+        with self._write_lock:
+            with self._pending_lock:
+                self._pending.append(handle)
+            self._sock.sendall(payload.encode("utf-8"))
+        return handle
+
+    def run(self, cmd: str, timeout: Optional[float] = None) -> str:
+        return self.submit(cmd).wait(timeout if timeout is not None else self.timeout_s)
+
+    def close(self) -> None:
+        if not self.persistent or self._closed:
+            return
+        try:
+            with self._write_lock:
+                self._sock.sendall(b"exit\n")
+        except Exception:
+            pass
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._closed = True
+
+
+_SESSIONS: Dict[str, ShellSession] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def _sessions_enabled() -> bool:
+    return os.getenv("HINGE_ADB_SESSION", "1") != "0"
+
+
+def get_shell_session(device) -> ShellSession:
+    key = str(getattr(device, "serial", None) or id(device))
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None or not session.alive:
+            session = ShellSession(device)
+            _SESSIONS[key] = session
+        return session
+
+
+def close_shell_sessions() -> None:
+    with _SESSIONS_LOCK:
+        sessions = list(_SESSIONS.values())
+        _SESSIONS.clear()
+    for s in sessions:
+        s.close()
+
+
+def run_shell(device, cmd: str, timeout: Optional[float] = None) -> str:
+    """
+    Run cmd on the device's persistent session, falling back to a one-off
+    device.shell() if sessions are disabled or the session cannot be used.
+    """
+    if not _sessions_enabled():
+        return device.shell(cmd)
+    try:
+        session = get_shell_session(device)
+        return session.run(cmd, timeout=timeout)
+    except TimeoutError:
+        raise
+    except Exception as e:
+        _log(f"[ADB] Shell session failed ({e}); using one-off shell")
+        return device.shell(cmd)
+
+
+def submit_shell(device, cmd: str) -> Any:
+    """Pipelined variant of run_shell; returns a ShellCommand handle."""
+    if not _sessions_enabled():
+        handle = ShellCommand(0, cmd)
+        try:
+            handle._complete(device.shell(cmd), 0)
+        except Exception as e:
+            handle._complete("", None, e)
+        return handle
+    return get_shell_session(device).submit(cmd)
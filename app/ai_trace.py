@@ -1,7 +1,45 @@
+import atexit
+import glob
+import gzip
 import json
 import os
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+# AI call tracing to HINGE_AI_TRACE_FILE.
+#
+# _ai_trace_log() only timestamps the lines and queues them. A background
+# thread expands multi-line entries (whole prompts are queued as one string),
+# writes them in batches to a file handle it keeps open, and flushes once per
+# batch. Tracing therefore costs the LLM call path a queue put, not a file
+# open/write/close.
+#
+# The trace file is rotated once it passes HINGE_AI_TRACE_MAX_MB or has been
+# written to for HINGE_AI_TRACE_ROTATE_H hours. The rotated segment is gzipped
+# next to it (ai_trace.log.20260101_120000.gz), and only the newest
+# HINGE_AI_TRACE_KEEP segments are kept. Queued lines are written at exit;
+# call flush() to force them out earlier.
+#
+# HINGE_AI_TRACE_MAX_MB=64        rotate when the file reaches this size (0 = never)
+# HINGE_AI_TRACE_ROTATE_H=24      rotate after this many hours of writing (0 = never)
+# HINGE_AI_TRACE_KEEP=10          compressed segments kept per trace file
+# HINGE_AI_TRACE_QUEUE_MAX=10000  queued entries before new ones are dropped (counted in the file)
+
+_BATCH_MAX = 256
+
+_LOCK = threading.Lock()
+_COND = threading.Condition(_LOCK)
+_QUEUE: "queue.Queue[Optional[Tuple[str, datetime, List[str]]]]" = queue.Queue()
+_WRITER: List[threading.Thread] = []
+# Entries queued but not yet written, and entries dropped while the queue was full.
+_STATE = {"pending": 0, "dropped": 0}
+# trace path -> {"f": open handle, "opened": time.time() of this segment}
+_FILES: Dict[str, Dict[str, Any]] = {}
+
 
 def _ai_trace_file() -> str:
     return os.getenv("HINGE_AI_TRACE_FILE", "")
@@ -11,20 +49,150 @@ def _ai_trace_enabled() -> bool:
     return bool(_ai_trace_file())
 
 
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+def _segment_due(path: str, seg: Dict[str, Any]) -> bool:
+    max_bytes = _env_float("HINGE_AI_TRACE_MAX_MB", 64) * 1024 * 1024
+    max_age_s = _env_float("HINGE_AI_TRACE_ROTATE_H", 24) * 3600
+    if max_bytes and seg["f"].tell() >= max_bytes:
+        return True
+    return bool(max_age_s) and time.time() - seg["opened"] >= max_age_s
+
+
+def _rotate(path: str) -> None:
+    seg = _FILES.pop(path, None)
+    if seg is not None:
+        seg["f"].close()
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+        return
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    rotated, n = f"{path}.{stamp}", 1
+    while os.path.exists(f"{rotated}.gz"):
+        rotated, n = f"{path}.{stamp}_{n}", n + 1
+    os.replace(path, rotated)
+    with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(rotated)
+    keep = int(_env_float("HINGE_AI_TRACE_KEEP", 10))
+    segments = sorted(glob.glob(f"{glob.escape(path)}.*.gz"))
+    for old in segments[: max(0, len(segments) - keep)]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+
+def _segment(path: str) -> Dict[str, Any]:
+    seg = _FILES.get(path)
+    if seg is not None and _segment_due(path, seg):
+        _rotate(path)
+        seg = None
+    if seg is None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        seg = _FILES[path] = {"f": open(path, "a", encoding="utf-8"), "opened": time.time()}
+    return seg
+
+
+def _format(when: datetime, lines: List[str]) -> str:
+    ts = when.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    out = []
+    for item in lines:
+        out.extend(f"[{ts}] {line}" for line in (item.splitlines() or [item]))
+    return "\n".join(out) + "\n"
+
+
+def _write_batch(batch: List[Tuple[str, datetime, List[str]]]) -> None:
+    by_path: Dict[str, List[str]] = {}
+    with _LOCK:
+        dropped, _STATE["dropped"] = _STATE["dropped"], 0
+    if dropped and batch:
+        batch = batch + [(batch[-1][0], datetime.now(), [f"AI_TRACE dropped={dropped} (queue full)"])]
+    for path, when, lines in batch:
+        by_path.setdefault(path, []).append(_format(when, lines))
+    for path, chunks in by_path.items():
+        try:
+            seg = _segment(path)
+            seg["f"].write("".join(chunks))
+            seg["f"].flush()
+        except Exception:
+            pass
+
+
+def _writer_loop() -> None:
+    while True:
+        item = _QUEUE.get()
+        stop = item is None
+        batch = [] if stop else [item]
+        while not stop and len(batch) < _BATCH_MAX:
+            try:
+                nxt = _QUEUE.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:
+                stop = True
+            else:
+                batch.append(nxt)
+        _write_batch(batch)
+        with _COND:
+            _STATE["pending"] -= len(batch)
+            _COND.notify_all()
+        if stop:
+            return
+
+
+def _ensure_writer() -> None:
+    with _LOCK:
+        if _WRITER and _WRITER[0].is_alive():
+            return
+        t = threading.Thread(target=_writer_loop, name="ai-trace-writer", daemon=True)
+        _WRITER[:] = [t]
+    t.start()
+
+
 def _ai_trace_log(lines: List[str]) -> None:
     if not _ai_trace_enabled():
         return
-    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-    out_lines = [f"[{ts}] {line}" for line in lines]
-    try:
-        with open(_ai_trace_file(), "a", encoding="utf-8") as f:
-            f.write("\n".join(out_lines) + "\n")
-    except Exception:
-        pass
+    limit = int(_env_float("HINGE_AI_TRACE_QUEUE_MAX", 10000))
+    with _LOCK:
+        if limit and _STATE["pending"] >= limit:
+            _STATE["dropped"] += 1
+            return
+        _STATE["pending"] += 1
+    _ensure_writer()
+    _QUEUE.put((_ai_trace_file(), datetime.now(), list(lines)))
+
+
+def flush(timeout: Optional[float] = 10.0) -> bool:
+    """Block until every queued trace entry is written. Returns False on timeout."""
+    with _COND:
+        return _COND.wait_for(lambda: _STATE["pending"] <= 0, timeout=timeout)
+
+
+def _shutdown() -> None:
+    if not (_WRITER and _WRITER[0].is_alive()):
+        return
+    flush()
+    _QUEUE.put(None)
+    _WRITER[0].join(timeout=5.0)
+    for seg in _FILES.values():
+        try:
+            seg["f"].close()
+        except Exception:
+            pass
+    _FILES.clear()
+
+
+atexit.register(_shutdown)
 
 
 def _ai_trace_prompt_lines(prompt: str) -> List[str]:
-    return ["PROMPT=<<<BEGIN", *prompt.splitlines(), "<<<END"]
+    # Kept as one entry; the writer thread splits it into lines.
+    return ["PROMPT=<<<BEGIN", *([prompt] if prompt else []), "<<<END"]
 
 
 def _ai_trace_image_lines(image_paths: List[str]) -> List[str]:
@@ -49,6 +217,8 @@ def _ai_trace_log_response(
     duration_ms: Optional[int] = None,
     error: Optional[str] = None,
 ) -> None:
+    if not _ai_trace_enabled():
+        return
     lines: List[str] = []
     header = f"AI_RESP call_id={call_id} model={model}"
     if duration_ms is not None:
@@ -58,13 +228,10 @@ def _ai_trace_log_response(
         lines.append(f"ERROR={error}")
     if parsed is not None:
         try:
-            lines.extend(
-                ["OUTPUT=<<<BEGIN_JSON", *json.dumps(parsed, ensure_ascii=False, indent=2).splitlines(), "<<<END_JSON"]
-            )
+            # Serialized here because callers keep mutating parsed results.
+            lines.extend(["OUTPUT=<<<BEGIN_JSON", json.dumps(parsed, ensure_ascii=False, indent=2), "<<<END_JSON"])
         except Exception:
             lines.extend(["OUTPUT=<<<BEGIN_TEXT", str(parsed), "<<<END_TEXT"])
     else:
-        lines.extend(["OUTPUT=<<<BEGIN_TEXT", *(str(raw) or "").splitlines(), "<<<END_TEXT"])
+        lines.extend(["OUTPUT=<<<BEGIN_TEXT", *([str(raw)] if str(raw) else []), "<<<END_TEXT"])
     _ai_trace_log(lines)
-
-
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import storage
+from log_match import LIKED_VERDICTS
+from profile_utils import _norm_value
+from scoring import (
+    DEFAULT_DOM_MARGIN,
+    DEFAULT_T_LONG,
+    DEFAULT_T_SHORT,
+    LONG_RULES,
+    SHORT_RULES,
+    _apply_rule,
+    _compile_rules,
+)
+from sqlite_store import VISUAL_TRAIT_FIELDS, get_db_path
+
+# Re-score every row in profiles.db with the current rule tables and sweep the
+# gate thresholds.
+#
+# Rows are loaded once into per-column string arrays. Each rule is evaluated
+# once per distinct combination of its inputs (np.unique) and the deltas are
+# broadcast back to all rows, so the cost tracks the number of distinct values
+# rather than the number of profiles. The gate (_classify_preference_flag) is
+# then applied to the score vectors for every (t_long, t_short, margin) in the
+# grid. The output shows the LONG/SHORT/NONE split and the observed match rate
+# of the profiles each setting would have liked.
+#
+# LLM2 flags and lip filler are not stored as columns; they are recovered from
+# the score_breakdown table logged with each row. Dating-intention overrides and
+# manual choices in start.py are not modelled, so this is the gate only.
+#
+#   python backtest.py
+#   python backtest.py --t-long 0:30:5 --t-short 5:35:5 --margin 0:20:5 --top 15 --csv sweep.csv
+
+_GATES = ("NONE", "LONG", "SHORT")
+
+# Rule input -> profiles column.
+_CORE_COLUMNS = {
+    "Gender": "Gender",
+    "Children": "Children",
+    "Dating Intentions": "Dating_Intentions",
+    "Relationship type": "Relationship_type",
+    "Drinking": "Drinking",
+    "Smoking": "Smoking",
+    "Marijuana": "Marijuana",
+    "Drugs": "Drugs",
+    "Active Status": "Active_status",
+    "Sexuality": "Sexuality",
+    "Zodiac Sign": "Zodiac_Sign",
+    "Religious Beliefs": "Religious_Beliefs",
+    "Age": "Age",
+    "Height": "Height_cm",
+}
+_VISUAL_COLUMNS = dict(VISUAL_TRAIT_FIELDS)
+_EVAL_COLUMNS = {
+    ("job", "band"): "job_band",
+    ("university_elite",): "university_elite",
+    ("home_country_iso",): "home_country_iso",
+}
+
+
+def _rule_inputs(rule: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """(source, key) pairs a compiled rule reads; source is core/visual/eval."""
+    kind = rule["kind"]
+    if kind in ("age", "height"):
+        return [("core", rule["key"])]
+    if kind == "flag":
+        return [("eval", (rule["key"],))]
+    if kind == "eval":
+        return [("eval", tuple(rule["path"]))]
+    src = rule["source"]
+    inputs = [(src, rule["key"])]
+    inputs += [(src, key) for key, _, _, _ in rule.get("caps", [])]
+    inputs += [(src, key) for key, _ in rule.get("suppress", {}).values()]
+    return list(dict.fromkeys(inputs))
+
+
+def _column_for(inp: Tuple[str, Any]) -> Optional[str]:
+    source, key = inp
+    if source == "core":
+        return _CORE_COLUMNS.get(key)
+    if source == "visual":
+        return _VISUAL_COLUMNS.get(key)
+    return _EVAL_COLUMNS.get(key)
+
+
+def _parse_breakdown(text: str) -> Dict[str, str]:
+    """field -> logged value from the contribution tables in score_breakdown."""
+    out: Dict[str, str] = {}
+    for line in (text or "").splitlines():
+        parts = [p.strip() for p in line.split(" | ")]
+        if len(parts) != 4 or parts[0] not in ("Core Biometrics", "Visual Analysis", "Profile Eval"):
+            continue
+        out.setdefault(parts[1], parts[2])
+    return out
+
+
+def _breakdown_value(rule: Dict[str, Any], logged: Optional[str]) -> str:
+    """Turn a logged contribution value back into the rule's raw input."""
+    if logged is None:
+        return ""
+    if rule["kind"] == "flag":
+        for flag, (label, _) in rule["values"].items():
+            if label == logged:
+                return str(flag)
+        return ""
+    return logged
+
+
+def load_columns(
+    db_path: str,
+    compiled: Sequence[Dict[str, Any]],
+) -> Tuple[Dict[Tuple[str, Any], np.ndarray], Dict[str, np.ndarray]]:
+    """Rule inputs and outcome columns for every profile row, as string/number arrays."""
+    con = storage.connection(db_path, readonly=True)
+    present = {r["name"] for r in con.execute("PRAGMA table_info(profiles);")}
+    inputs: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+    for rule in compiled:
+        for inp in _rule_inputs(rule):
+            inputs.setdefault(inp, rule)
+    wanted = sorted({c for c in (_column_for(i) for i in inputs) if c and c in present})
+    outcome = [c for c in ("id", "long_score", "short_score", "verdict", "matched", "score_breakdown") if c in present]
+    cols = list(dict.fromkeys(wanted + outcome))
+    rows = con.execute(f"SELECT {', '.join(cols)} FROM profiles").fetchall()
+
+    idx = {c: i for i, c in enumerate(cols)}
+    n = len(rows)
+
+    def text_col(name: str) -> np.ndarray:
+        i = idx.get(name)
+        if i is None:
+            return np.full(n, "", dtype=object)
+        return np.array(["" if r[i] is None else str(r[i]) for r in rows], dtype=object)
+
+    breakdowns = [_parse_breakdown(r[idx["score_breakdown"]]) for r in rows] if "score_breakdown" in idx else [{}] * n
+    columns: Dict[Tuple[str, Any], np.ndarray] = {}
+    for inp, rule in inputs.items():
+        col = _column_for(inp)
+        if col and col in idx:
+            columns[inp] = text_col(col)
+        else:
+            field = rule.get("field") or rule.get("key")
+            columns[inp] = np.array([_breakdown_value(rule, b.get(field)) for b in breakdowns], dtype=object)
+
+    def int_col(name: str) -> np.ndarray:
+        i = idx.get(name)
+        if i is None:
+            return np.zeros(n, dtype=np.int64)
+        return np.array([int(r[i] or 0) for r in rows], dtype=np.int64)
+
+    outcomes = {
+        "id": int_col("id"),
+        "long_score": int_col("long_score"),
+        "short_score": int_col("short_score"),
+        "matched": int_col("matched").astype(bool),
+        "liked": np.isin(text_col("verdict").astype(str), LIKED_VERDICTS),
+    }
+    return columns, outcomes
+
+
+def _sources_for(inputs: List[Tuple[str, Any]], values: Sequence[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    sources: Dict[str, Dict[str, Any]] = {"core": {}, "visual": {}}
+    eval_result: Dict[str, Any] = {}
+    for (source, key), val in zip(inputs, values):
+        if source == "eval":
+            node = eval_result
+            for part in key[:-1]:
+                node = node.setdefault(part, {})
+            node[key[-1]] = val
+        else:
+            sources[source][key] = val
+    return sources, eval_result
+
+
+def score_columns(
+    compiled: Sequence[Dict[str, Any]],
+    columns: Dict[Tuple[str, Any], np.ndarray],
+    n: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized score and hard-kill count per row for one rule table."""
+    score = np.zeros(n, dtype=np.int64)
+    kills = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return score, kills
+    for rule in compiled:
+        inputs = _rule_inputs(rule)
+        codes = []
+        uniques = []
+        for inp in inputs:
+            u, inv = np.unique(columns[inp].astype(str), return_inverse=True)
+            uniques.append(u)
+            codes.append(inv.reshape(-1))
+        combos, inv = np.unique(np.stack(codes, axis=1), axis=0, return_inverse=True)
+        deltas = np.zeros(len(combos), dtype=np.int64)
+        killed = np.zeros(len(combos), dtype=np.int64)
+        for ci, combo in enumerate(combos):
+            values = [uniques[k][code] for k, code in enumerate(combo)]
+            sources, eval_result = _sources_for(inputs, values)
+            norms: Dict[Tuple[str, str], str] = {}
+
+            def norm_of(source: str, key: str) -> str:
+                if (source, key) not in norms:
+                    norms[(source, key)] = _norm_value(sources[source].get(key, ""))
+                return norms[(source, key)]
+
+            for _, delta in _apply_rule(rule, sources, eval_result, norm_of):
+                deltas[ci] += delta
+                killed[ci] += 1 if delta <= -1000 else 0
+        inv = inv.reshape(-1)
+        score += deltas[inv]
+        kills += killed[inv]
+    return score, kills
+
+
+def classify_gates(
+    long_score: np.ndarray,
+    short_score: np.ndarray,
+    t_long: int,
+    t_short: int,
+    dominance_margin: int,
+) -> np.ndarray:
+    """Vectorized _classify_preference_flag: 0=NONE, 1=LONG, 2=SHORT."""
+    long_excess = long_score - t_long
+    short_excess = short_score - t_short
+    long_meets = long_score >= t_long
+    short_meets = short_score >= t_short
+    long_dom = long_meets & (long_excess >= short_excess + dominance_margin)
+    short_dom = short_meets & (short_excess >= long_excess + dominance_margin) & ~long_dom
+    rest = ~long_dom & ~short_dom
+    both = long_meets & short_meets
+    is_long = long_dom | (rest & both & (long_score > short_score)) | (rest & long_meets & ~short_meets)
+    is_short = short_dom | (rest & both & (short_score > long_score)) | (rest & short_meets & ~long_meets)
+    gates = np.zeros(long_score.shape, dtype=np.int8)
+    gates[is_long] = 1
+    gates[is_short] = 2
+    return gates
+
+
+def _parse_range(spec: str) -> List[int]:
+    """'a:b:s' (inclusive) or 'a,b,c' or a single int."""
+    spec = spec.strip()
+    if ":" in spec:
+        parts = [int(p) for p in spec.split(":")]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1
+        return list(range(start, stop + (1 if step > 0 else -1), step))
+    return [int(p) for p in spec.split(",") if p.strip()]
+
+
+def sweep(
+    long_score: np.ndarray,
+    short_score: np.ndarray,
+    matched: np.ndarray,
+    liked: np.ndarray,
+    t_longs: Sequence[int],
+    t_shorts: Sequence[int],
+    margins: Sequence[int],
+) -> List[Dict[str, Any]]:
+    baseline = classify_gates(long_score, short_score, DEFAULT_T_LONG, DEFAULT_T_SHORT, DEFAULT_DOM_MARGIN)
+    total_matched = int(matched.sum())
+    results: List[Dict[str, Any]] = []
+    for tl in t_longs:
+        for ts in t_shorts:
+            for m in margins:
+                gates = classify_gates(long_score, short_score, tl, ts, m)
+                passed = gates != 0
+                liked_pass = passed & liked
+                matched_pass = int((liked_pass & matched).sum())
+                n_liked_pass = int(liked_pass.sum())
+                results.append(
+                    {
+                        "t_long": tl,
+                        "t_short": ts,
+                        "margin": m,
+                        "long": int((gates == 1).sum()),
+                        "short": int((gates == 2).sum()),
+                        "none": int((gates == 0).sum()),
+                        "liked_pass": n_liked_pass,
+                        "matched_pass": matched_pass,
+                        "match_rate": round(matched_pass / n_liked_pass, 4) if n_liked_pass else 0.0,
+                        "match_recall": round(matched_pass / total_matched, 4) if total_matched else 0.0,
+                        "changed_vs_default": int((gates != baseline).sum()),
+                    }
+                )
+    return results
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    headers = list(rows[0].keys()) if rows else []
+    cells = [[str(r[h]) for h in headers] for r in rows]
+    widths = [max([len(h)] + [len(c[i]) for c in cells]) for i, h in enumerate(headers)]
+    print(" | ".join(h.ljust(widths[i]) for i, h in enumerate(headers)))
+    print("-+-".join("-" * w for w in widths))
+    for c in cells:
+        print(" | ".join(v.ljust(widths[i]) for i, v in enumerate(c)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Re-score profiles.db with the current rules and sweep gate thresholds.")
+    parser.add_argument("--db", default=get_db_path(), help="profiles.db path")
+    parser.add_argument("--t-long", default=f"{DEFAULT_T_LONG - 10}:{DEFAULT_T_LONG + 20}:5", help="long threshold grid")
+    parser.add_argument("--t-short", default=f"{DEFAULT_T_SHORT - 10}:{DEFAULT_T_SHORT + 20}:5", help="short threshold grid")
+    parser.add_argument("--margin", default=f"0:{DEFAULT_DOM_MARGIN + 10}:5", help="dominance margin grid")
+    parser.add_argument("--min-liked", type=int, default=20, help="ignore settings that would like fewer profiles than this")
+    parser.add_argument("--top", type=int, default=20, help="settings to print, best match rate first")
+    parser.add_argument("--csv", default="", help="write every setting to this CSV")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.db):
+        print(f"No database at {args.db}")
+        return 1
+
+    long_rules = _compile_rules(LONG_RULES)
+    short_rules = _compile_rules(SHORT_RULES)
+
+    t0 = time.perf_counter()
+    columns, outcomes = load_columns(args.db, long_rules + short_rules)
+    n = len(outcomes["id"])
+    t1 = time.perf_counter()
+    long_score, long_kills = score_columns(long_rules, columns, n)
+    short_score, short_kills = score_columns(short_rules, columns, n)
+    t2 = time.perf_counter()
+    results = sweep(
+        long_score,
+        short_score,
+        outcomes["matched"],
+        outcomes["liked"],
+        _parse_range(args.t_long),
+        _parse_range(args.t_short),
+        _parse_range(args.margin),
+    )
+    t3 = time.perf_counter()
+
+    drift_long = int((long_score != outcomes["long_score"]).sum())
+    drift_short = int((short_score != outcomes["short_score"]).sum())
+    print(
+        f"[BACKTEST] rows={n} liked={int(outcomes['liked'].sum())} matched={int(outcomes['matched'].sum())} "
+        f"load={t1 - t0:.2f}s score={t2 - t1:.2f}s sweep={t3 - t2:.2f}s ({len(results)} settings)"
+    )
+    print(
+        f"[BACKTEST] rescored vs stored: long differs on {drift_long} rows, short on {drift_short} rows; "
+        f"hard kills long={int((long_kills > 0).sum())} short={int((short_kills > 0).sum())}"
+    )
+    if n:
+        base = classify_gates(long_score, short_score, DEFAULT_T_LONG, DEFAULT_T_SHORT, DEFAULT_DOM_MARGIN)
+        dist = ", ".join(f"{g}={int((base == i).sum())}" for i, g in enumerate(_GATES))
+        print(f"[BACKTEST] current defaults t_long={DEFAULT_T_LONG} t_short={DEFAULT_T_SHORT} margin={DEFAULT_DOM_MARGIN}: {dist}")
+
+    if args.csv and results:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"[BACKTEST] wrote {len(results)} settings to {args.csv}")
+
+    ranked = [r for r in results if r["liked_pass"] >= args.min_liked]
+    ranked.sort(key=lambda r: (-r["match_rate"], -r["matched_pass"]))
+    if not ranked:
+        print(f"No setting likes at least {args.min_liked} historically liked profiles.")
+        return 0
+    print("")
+    _print_table(ranked[: args.top])
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sqlite3
+import sys
+from typing import Any, List, Sequence, Tuple
+
+import storage
+
+# Indexes on profiles.db, one per hot query shape.
+#
+# profiles is ~120 columns wide, so every lookup that scans it reads the whole
+# row store. Each index below is ordered by the equality columns first and the
+# range/sort column last. Where the caller only needs a handful of columns,
+# those are appended so SQLite answers from the index alone (covering).
+#
+#   idx_profiles_rerun         check_for_rerun: Name NOCASE = ?, Height_cm = ?, Age BETWEEN
+#   idx_profiles_liked         log_match._fetch_candidates / matches auto-link:
+#                              verdict IN (liked) + Name; LIKE '%x%' is checked
+#                              inside the index instead of the table
+#   idx_profiles_match_status  handle_matches / matches / sync_matches:
+#                              matched = 1 AND status IN (...) ORDER BY last_activity,
+#                              and the last_activity < cutoff stale transition
+#   idx_profiles_match_time    matched profile lists ORDER BY match_time, timestamp
+#
+# sqlite_store registers these as the "profile_indexes" schema component, so
+# they are created once per database. Bump INDEX_VERSION whenever the list
+# changes. Verdicts are stored upper-case (update_profile_verdict), and the
+# first apply normalizes older rows too. That lets callers write `verdict IN (...)`
+# instead of UPPER(COALESCE(verdict, '')), which no index can serve.
+#
+# `python db_indexes.py --check [--db path]` runs EXPLAIN QUERY PLAN over
+# HOT_QUERIES and exits non-zero if any of them scans a table instead of seeking.
+
+INDEX_VERSION = 1
+
+PROFILE_INDEXES: List[Tuple[str, str]] = [
+    ("idx_profiles_rerun", "profiles(Name COLLATE NOCASE, Height_cm, Age, verdict)"),
+    ("idx_profiles_liked", "profiles(verdict, Name, Age, Height_cm, timestamp, matched, match_time)"),
+    ("idx_profiles_match_status", "profiles(matched, status, last_activity, Name)"),
+    ("idx_profiles_match_time", "profiles(matched, match_time, timestamp)"),
+]
+
+# (label, sql, params) mirroring the call sites above.
+HOT_QUERIES: List[Tuple[str, str, Sequence[Any]]] = [
+    (
+        "check_for_rerun",
+        "SELECT id FROM profiles WHERE Name COLLATE NOCASE = ? AND Height_cm = ? AND Age BETWEEN ? AND ? "
+        "AND verdict IS NOT NULL AND verdict != '' ORDER BY timestamp DESC",
+        ("amy", 165, 27, 29),
+    ),
+    (
+        "log_match._fetch_candidates",
+        "SELECT id, Name, Age, Height_cm, timestamp, verdict, matched, match_time FROM profiles "
+        "WHERE verdict IN (?,?,?) AND Name LIKE ? COLLATE NOCASE ORDER BY timestamp DESC LIMIT ?",
+        ("LONG_PICKUP", "SHORT_PICKUP", "LIKE", "%amy%", 30),
+    ),
+    (
+        "matches._attempt_auto_link_profile",
+        "SELECT id, opening_pick_text, Age, Height_cm FROM profiles "
+        "WHERE +matched = 0 AND Name = ? AND verdict IN ('LONG_PICKUP', 'SHORT_PICKUP', 'LIKE')",
+        ("Amy",),
+    ),
+    (
+        "handle_matches._fetch_active_profiles",
+        "SELECT id, Name, last_activity FROM profiles "
+        "WHERE matched = 1 AND status IN ('my_turn', 'her_turn', 'active') ORDER BY last_activity DESC LIMIT ?",
+        (50,),
+    ),
+    (
+        "match_events._latest",
+        "SELECT kind, ts, text FROM events WHERE profile_id = ? AND kind IN ('message_sent', 'message_received') "
+        "ORDER BY ts DESC, id DESC LIMIT 1",
+        (1,),
+    ),
+    (
+        "match_events.existing_texts",
+        "SELECT DISTINCT text FROM events WHERE profile_id = ? AND text IN (?,?) "
+        "AND kind IN ('message_sent', 'message_received')",
+        (1, "haha", "ok"),
+    ),
+    (
+        "handle_matches._handle_stale_detection",
+        "SELECT id, Name FROM profiles WHERE matched = 1 AND status IN ('my_turn', 'her_turn') AND last_activity < ?",
+        ("2026-01-01T00:00:00",),
+    ),
+    (
+        "match_events._mark_stale",
+        "UPDATE profiles SET status = 'stale' WHERE matched = 1 AND status IN ('my_turn', 'her_turn') "
+        "AND last_activity < ? AND COALESCE(match_time, '') < ?",
+        ("2026-01-01T00:00:00", "2026-01-01T00:00:00"),
+    ),
+    (
+        "handle_matches._fetch_all_matched_profiles",
+        "SELECT id, Name FROM profiles WHERE matched = 1 ORDER BY match_time DESC, timestamp DESC LIMIT ?",
+        (100,),
+    ),
+]
+
+
+def apply_indexes(con: sqlite3.Connection) -> None:
+    con.execute("UPDATE profiles SET verdict = UPPER(TRIM(verdict)) WHERE verdict != UPPER(TRIM(verdict));")
+    for name, target in PROFILE_INDEXES:
+        con.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target};")
+
+
+def explain(con: sqlite3.Connection, sql: str, params: Sequence[Any] = ()) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines for sql."""
+    return [row[3] for row in con.execute(f"EXPLAIN QUERY PLAN {sql}", tuple(params))]
+
+
+def _is_full_scan(detail: str) -> bool:
+    # SEARCH is an index seek; any SCAN of a table (even over an index) grows with it.
+    return detail.startswith(("SCAN profiles", "SCAN events"))
+
+
+def check_plans(con: sqlite3.Connection) -> List[Tuple[str, List[str], bool]]:
+    """(label, plan, ok) per hot query; ok is False when the plan scans a table."""
+    out = []
+    for label, sql, params in HOT_QUERIES:
+        plan = explain(con, sql, params)
+        out.append((label, plan, not any(_is_full_scan(d) for d in plan)))
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Create/check profiles.db indexes")
+    parser.add_argument("--db", default=None, help="profiles.db path (default: repo root)")
+    parser.add_argument("--check", action="store_true", help="fail if a hot query plans a full table scan")
+    args = parser.parse_args()
+
+    import match_events  # noqa: F401  (registers the events table)
+    import sqlite_store  # registers the profiles + index schema components
+
+    db_path = args.db or sqlite_store.get_db_path()
+    if not os.path.isfile(db_path):
+        print(f"Database not found: {db_path}")
+        return 1
+    con = storage.connection(db_path)
+    failed = 0
+    for label, plan, ok in check_plans(con):
+        failed += 0 if ok else 1
+        print(f"[{'OK' if ok else 'SCAN'}] {label}")
+        for detail in plan:
+            print(f"    {detail}")
+    if args.check and failed:
+        print(f"{failed} hot quer{'y' if failed == 1 else 'ies'} scan the profiles table")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
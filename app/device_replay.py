@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+import time
+import zipfile
+from typing import Any, Dict, List, Optional
+
+from runtime import _log
+
+# Record/replay devices for offline scan runs.
+#
+# HINGE_RECORD_BUNDLE=path.zip  wraps the live device; every shell command,
+#                               hierarchy dump, screencap and gesture is archived
+#                               into a compressed bundle when the process exits.
+# HINGE_REPLAY_BUNDLE=path.zip  replaces the device with a ReplayDevice that serves
+#                               the recorded frames back without adb.
+#
+# A recording is a list of "states". A new state starts at every gesture
+# (input swipe/tap/text/keyevent); dumps and screencaps observed before the next
+# gesture belong to it. On replay, a gesture advances to the next recorded state
+# started by the same kind of gesture, so scroll logic walks through the
+# recorded scroll offsets in order.
+
+_BUNDLE_VERSION = 1
+
+
+def _gesture_kind(cmd: str) -> Optional[str]:
+    parts = (cmd or "").strip().split()
+    if len(parts) >= 2 and parts[0] == "input":
+        return parts[1]
+    return None
+
+
+def _is_dump_cmd(cmd: str) -> bool:
+    return "uiautomator dump" in (cmd or "")
+
+
+def _swipe_direction(cmd: str) -> int:
+    """+1 when the finger moves up (content scrolls down), -1 for the reverse, 0 otherwise."""
+    parts = (cmd or "").split()
+    try:
+        y1, y2 = int(parts[3]), int(parts[5])
+    except Exception:
+        return 0
+    return (y1 > y2) - (y1 < y2)
+
+
+class RecordingDevice:
+    """
+    Transparent proxy around a ppadb device that archives what it sees.
+    create_connection() is deliberately not exposed so every command and
+    screencap goes through shell()/screencap() and lands in the recording.
+    """
+
+    def __init__(self, device, bundle_path: str):
+        self._device = device
+        self.bundle_path = bundle_path
+        self.serial = getattr(device, "serial", "recording")
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self._states: List[Dict[str, Any]] = [{"gesture": None, "t": 0.0, "dumps": [], "screens": []}]
+        self._shell_outputs: Dict[str, str] = {}
+        self._blobs: Dict[str, bytes] = {}
+        self._saved = False
+
+    def _now(self) -> float:
+        return round(time.time() - self._start, 3)
+
+    def shell(self, cmd: str, *args, **kwargs):
+        out = self._device.shell(cmd, *args, **kwargs)
+        with self._lock:
+            if _gesture_kind(cmd):
+                self._states.append({"gesture": cmd, "t": self._now(), "dumps": [], "screens": []})
+            elif _is_dump_cmd(cmd):
+                state = self._states[-1]
+                name = f"dumps/{len(self._states) - 1:04d}_{len(state['dumps']):02d}.xml"
+                self._blobs[name] = (out or "").encode("utf-8")
+                state["dumps"].append(name)
+            else:
+                self._shell_outputs[cmd] = out if isinstance(out, str) else ""
+        return out
+
+    def screencap(self) -> bytes:
+        data = self._device.screencap()
+        with self._lock:
+            state = self._states[-1]
+            name = f"screens/{len(self._states) - 1:04d}_{len(state['screens']):02d}.png"
+            self._blobs[name] = data
+            state["screens"].append(name)
+        return data
+
+    def __getattr__(self, item):
+        if item == "create_connection":
+            raise AttributeError(item)
+        return getattr(self._device, item)
+
+    def save(self) -> None:
+        with self._lock:
+            if self._saved:
+                return
+            manifest = {
+                "version": _BUNDLE_VERSION,
+                "serial": self.serial,
+                "states": self._states,
+                "shell_outputs": self._shell_outputs,
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(self.bundle_path)), exist_ok=True)
+            with zipfile.ZipFile(self.bundle_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+                for name, blob in self._blobs.items():
+                    # PNGs are already compressed; store them as-is.
+                    ctype = zipfile.ZIP_STORED if name.endswith(".png") else zipfile.ZIP_DEFLATED
+                    zf.writestr(name, blob, compress_type=ctype)
+            self._saved = True
+        _log(f"[REPLAY] Recorded {len(self._states)} states -> {self.bundle_path}")
+
+
+class ReplayDevice:
+    """Serves a recorded bundle back as if it were a device."""
+
+    # Recorded frames only change on gestures, so there is never anything to wait for.
+    always_settled = True
+
+    def __init__(self, bundle_path: str, lookahead: int = 6):
+        self.bundle_path = bundle_path
+        self.lookahead = lookahead
+        self._zip = zipfile.ZipFile(bundle_path, "r")
+        manifest = json.loads(self._zip.read("manifest.json").decode("utf-8"))
+        self.serial = f"replay:{os.path.basename(bundle_path)}"
+        self._states: List[Dict[str, Any]] = manifest.get("states") or []
+        self._shell_outputs: Dict[str, str] = manifest.get("shell_outputs") or {}
+        self._lock = threading.Lock()
+        self._state = 0
+        self._dump_idx = 0
+        self._screen_idx = 0
+        self.gestures: List[str] = []
+
+    def _find_next_state(self, cmd: str) -> Optional[int]:
+        kind = _gesture_kind(cmd)
+        direction = _swipe_direction(cmd) if kind == "swipe" else 0
+        end = min(len(self._states), self._state + 1 + self.lookahead)
+        for i in range(self._state + 1, end):
+            rec = self._states[i].get("gesture") or ""
+            if _gesture_kind(rec) != kind:
+                continue
+            if kind == "swipe" and direction and _swipe_direction(rec) not in (0, direction):
+                continue
+            return i
+        return None
+
+    def _serve(self, key: str, idx_attr: str) -> Optional[str]:
+        # Walk back to the most recent state that observed something of this kind.
+        for i in range(self._state, -1, -1):
+            names = self._states[i].get(key) or []
+            if not names:
+                continue
+            if i != self._state:
+                return names[-1]
+            idx = getattr(self, idx_attr)
+            setattr(self, idx_attr, idx + 1)
+            return names[min(idx, len(names) - 1)]
+        return None
+
+    def shell(self, cmd: str, *args, **kwargs) -> str:
+        with self._lock:
+            if _gesture_kind(cmd):
+                self.gestures.append(cmd)
+                nxt = self._find_next_state(cmd)
+                if nxt is None:
+                    _log(f"[REPLAY] no recorded state for '{cmd}'; holding state {self._state}")
+                else:
+                    self._state = nxt
+                    self._dump_idx = 0
+                    self._screen_idx = 0
+                return ""
+            if _is_dump_cmd(cmd):
+                name = self._serve("dumps", "_dump_idx")
+                return self._zip.read(name).decode("utf-8") if name else ""
+            return self._shell_outputs.get(cmd, "")
+
+    def screencap(self) -> bytes:
+        with self._lock:
+            name = self._serve("screens", "_screen_idx")
+            return self._zip.read(name) if name else b""
+
+    def forward(self, local: str, remote: str) -> None:
+        raise RuntimeError("forward is not available on a replay device")
+
+    @property
+    def state_index(self) -> int:
+        return self._state
+
+    @property
+    def state_count(self) -> int:
+        return len(self._states)
+
+
+def open_replay_device(bundle_path: str) -> ReplayDevice:
+    device = ReplayDevice(bundle_path)
+    _log(f"[REPLAY] Serving {device.state_count} recorded states from {bundle_path}")
+    return device
+
+
+def wrap_for_recording(device, bundle_path: str) -> RecordingDevice:
+    import atexit
+
+    recorder = RecordingDevice(device, bundle_path)
+    atexit.register(recorder.save)
+    _log(f"[REPLAY] Recording device session to {bundle_path}")
+    return recorder
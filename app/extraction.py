@@ -1,11 +1,15 @@
 import base64
 import json
 import os
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
 
-from llm_client import LLMError, generate_completion, get_large_model
-from prompts import LLM1_VISUAL, LLM2, LLM_DUPE_DETECT
+import photo_store
+from image_payload import ImagePayload, encode_image_payload, summarize_payloads
+from llm_client import LLMError, discard_cached, generate_completion, get_large_model, get_small_model
+from prompts import LLM1_PHOTO_DESCRIBE, LLM1_TRAITS_AGGREGATE, LLM1_VISUAL, LLM2, LLM_DUPE_DETECT
 from ai_trace import (
     _ai_trace_image_lines,
     _ai_trace_log,
@@ -23,44 +27,7 @@ def _b64_image(image_path: str) -> str:
 
 
 def _b64_image_with_label(image_path: str, label: str) -> str:
-    import cv2
-    import numpy as np
-
-    with open(image_path, "rb") as f:
-        bytes_data = f.read()
-    numpyarray = np.asarray(bytearray(bytes_data), dtype=np.uint8)
-    img = cv2.imdecode(numpyarray, cv2.IMREAD_UNCHANGED)
-
-    if img is None:
-        raise ValueError(f"Failed to decode image from path: {image_path}")
-
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    font_scale = 1.0
-    thickness = 2
-
-    # Get text size
-    (text_width, text_height), baseline = cv2.getTextSize(label, font, font_scale, thickness)
-
-    x, y = 10, 30
-    
-    # Handle both 3-channel (BGR) and 4-channel (BGRA) images safely
-    if len(img.shape) == 3 and img.shape[2] == 4:
-        bg_color = (0, 0, 0, 255)
-        txt_color = (255, 255, 255, 255)
-    else:
-        bg_color = (0, 0, 0)
-        txt_color = (255, 255, 255)
-
-    # Draw black filled rectangle
-    cv2.rectangle(img, (x - 5, y - text_height - 5), (x + text_width + 5, y + baseline + 5), bg_color, cv2.FILLED)
-    # Draw white text
-    cv2.putText(img, label, (x, y), font, font_scale, txt_color, thickness, cv2.LINE_AA)
-
-    is_success, buffer = cv2.imencode(".png", img)
-    if not is_success:
-        raise ValueError(f"Failed to encode modified image: {image_path}")
-        
-    return base64.b64encode(buffer).decode("utf-8")
+    return encode_image_payload(image_path, label=label).b64
 
 
 def build_llm_batch_payload(
@@ -71,15 +38,17 @@ def build_llm_batch_payload(
     if not prompt:
         prompt = LLM1_VISUAL()
 
-    existing = [p for p in screenshots if isinstance(p, str) and os.path.exists(p)]
+    existing = [p for p in screenshots if isinstance(p, str) and photo_store.available(p)]
 
     if format == "openai_messages":
         content_parts = [{"type": "text", "text": prompt}]
+        payloads = []
         for i, p in enumerate(existing):
-            label = f"photo_{i + 1}"
+            payload = encode_image_payload(p, label=f"photo_{i + 1}")
+            payloads.append(payload)
             content_parts.append({
                 "type": "image_url",
-                "image_url": {"url": f"data:image/png;base64,{_b64_image_with_label(p, label)}"},
+                "image_url": {"url": payload.data_url},
             })
         return {
             "format": "openai_messages",
@@ -90,6 +59,7 @@ def build_llm_batch_payload(
             "meta": {
                 "images_count": len(existing),
                 "images_paths": existing,
+                "image_payload": summarize_payloads(payloads),
             },
         }
 
@@ -134,6 +104,7 @@ def run_profile_eval_llm(extracted: Dict[str, Any], model: str | None = None) ->
             model_type="large",
             response_format={"type": "json_object"},
             messages=[{"role": "user", "content": prompt}],
+            stage="profile_eval_llm",
         )
         resolved_model = resp.model_name
     except Exception as e:
@@ -171,6 +142,7 @@ def run_profile_eval_llm(extracted: Dict[str, Any], model: str | None = None) ->
     try:
         parsed = json.loads(clean_raw or "{}")
     except Exception as e:
+        discard_cached(resp)
         _ai_trace_log_response(
             "profile_eval_llm",
             resolved_model,
@@ -193,6 +165,7 @@ def run_profile_eval_llm(extracted: Dict[str, Any], model: str | None = None) ->
         parsed = parsed[0]
 
     if not isinstance(parsed, dict):
+        discard_cached(resp)
         _ai_trace_log_response(
             "profile_eval_llm",
             resolved_model,
@@ -224,32 +197,47 @@ def run_profile_eval_llm(extracted: Dict[str, Any], model: str | None = None) ->
     return parsed
 
 
-def run_llm1_visual(
+def _strip_json_fence(raw: str) -> str:
+    clean_raw = raw.strip()
+    if clean_raw.startswith("```json"):
+        clean_raw = clean_raw[7:]
+    elif clean_raw.startswith("```"):
+        clean_raw = clean_raw[3:]
+    if clean_raw.endswith("```"):
+        clean_raw = clean_raw[:-3]
+    return clean_raw.strip()
+
+
+def _call_llm1_json(
+    call_id: str,
+    prompt: str,
+    messages: List[Dict[str, Any]],
     image_paths: List[str],
-    model: str | None = None,
-) -> Tuple[Dict[str, Any], Dict[str, Any]]:
-    prompt = LLM1_VISUAL()
-    payload = build_llm_batch_payload(image_paths, prompt=prompt)
-    resolved_model = get_large_model()
+    model_type: str = "large",
+) -> Tuple[Dict[str, Any], str, float]:
+    """Traced JSON-object completion for the LLM1 stages. Returns (parsed, model_used, cost_usd)."""
+    resolved_model = get_large_model() if model_type == "large" else get_small_model()
     trace_lines = [
-        f"AI_CALL call_id=llm1_visual model={resolved_model} response_format=json_object"
+        f"AI_CALL call_id={call_id} model={resolved_model} response_format=json_object"
     ]
     trace_lines.extend(_ai_trace_prompt_lines(prompt))
-    trace_lines.extend(_ai_trace_image_lines(image_paths))
+    if image_paths:
+        trace_lines.extend(_ai_trace_image_lines(image_paths))
     _ai_trace_log(trace_lines)
-    
+
     t0 = time.perf_counter()
     try:
         resp = generate_completion(
-            model_type="large",
+            model_type=model_type,
             response_format={"type": "json_object"},
-            messages=payload.get("messages", []),
+            messages=messages,
+            stage=call_id,
         )
         resolved_model = resp.model_name
     except Exception as e:
         dt_ms = int((time.perf_counter() - t0) * 1000)
         _ai_trace_log_response(
-            "llm1_visual",
+            call_id,
             resolved_model,
             raw="",
             parsed=None,
@@ -257,7 +245,7 @@ def run_llm1_visual(
             error=f"call_error: {e}",
         )
         raise LLMError(
-            call_id="llm1_visual",
+            call_id=call_id,
             model=resolved_model,
             error_type="call_error",
             error_message=str(e),
@@ -265,24 +253,16 @@ def run_llm1_visual(
             raw_response="",
             duration_ms=dt_ms,
         )
-    
+
     dt_ms = int((time.perf_counter() - t0) * 1000)
     raw = resp.content or ""
-    
-    clean_raw = raw.strip()
-    if clean_raw.startswith("```json"):
-        clean_raw = clean_raw[7:]
-    elif clean_raw.startswith("```"):
-        clean_raw = clean_raw[3:]
-    if clean_raw.endswith("```"):
-        clean_raw = clean_raw[:-3]
-    clean_raw = clean_raw.strip()
-    
+
     try:
-        parsed = json.loads(clean_raw or "{}")
+        parsed = json.loads(_strip_json_fence(raw) or "{}")
     except Exception as e:
+        discard_cached(resp)
         _ai_trace_log_response(
-            "llm1_visual",
+            call_id,
             resolved_model,
             raw,
             parsed=None,
@@ -290,7 +270,7 @@ def run_llm1_visual(
             error=f"json_parse_error: {e}",
         )
         raise LLMError(
-            call_id="llm1_visual",
+            call_id=call_id,
             model=resolved_model,
             error_type="json_parse_error",
             error_message=str(e),
@@ -298,13 +278,14 @@ def run_llm1_visual(
             raw_response=raw,
             duration_ms=dt_ms,
         )
-    
+
     if isinstance(parsed, list) and len(parsed) > 0 and isinstance(parsed[0], dict):
         parsed = parsed[0]
 
     if not isinstance(parsed, dict):
+        discard_cached(resp)
         _ai_trace_log_response(
-            "llm1_visual",
+            call_id,
             resolved_model,
             raw,
             parsed=None,
@@ -312,7 +293,7 @@ def run_llm1_visual(
             error="parsed_not_dict",
         )
         raise LLMError(
-            call_id="llm1_visual",
+            call_id=call_id,
             model=resolved_model,
             error_type="format_error",
             error_message="Response is not a dictionary",
@@ -320,20 +301,152 @@ def run_llm1_visual(
             raw_response=raw,
             duration_ms=dt_ms,
         )
-    
+
     _ai_trace_log_response(
-        "llm1_visual",
+        call_id,
         resolved_model,
         raw,
         parsed=parsed,
         duration_ms=dt_ms,
     )
+    return parsed, resolved_model, resp.cost_usd
+
+
+def run_llm1_visual(
+    image_paths: List[str],
+    model: str | None = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    prompt = LLM1_VISUAL()
+    payload = build_llm_batch_payload(image_paths, prompt=prompt)
+    parsed, resolved_model, cost_usd = _call_llm1_json(
+        "llm1_visual",
+        prompt,
+        payload.get("messages", []),
+        image_paths,
+    )
     meta = payload.get("meta", {})
     meta["model_used"] = resolved_model
-    meta["cost_usd"] = resp.cost_usd
+    meta["cost_usd"] = cost_usd
     return parsed, meta
 
 
+def _llm1_stream_enabled() -> bool:
+    return os.getenv("HINGE_LLM1_STREAM", "1") != "0"
+
+
+def _describe_photo_llm1(image_path: str) -> Tuple[Dict[str, Any], str, float, ImagePayload]:
+    prompt = LLM1_PHOTO_DESCRIBE()
+    payload = encode_image_payload(image_path)
+    messages = [{
+        "role": "user",
+        "content": [
+            {"type": "text", "text": prompt},
+            {"type": "image_url", "image_url": {"url": payload.data_url}},
+        ],
+    }]
+    parsed, model_used, cost_usd = _call_llm1_json("llm1_photo", prompt, messages, [image_path])
+    return parsed, model_used, cost_usd, payload
+
+
+class LLM1PhotoStream:
+    """
+    Streaming LLM1: each photo is described in the background as soon as the scan
+    captures it, so most of the vision latency overlaps with scrolling. finish()
+    then runs one text-only aggregation call for the visual traits and returns the
+    same (parsed, meta) shape as run_llm1_visual.
+
+    HINGE_LLM1_STREAM=0 disables streaming (single batched call after the scan).
+    """
+
+    def __init__(self, max_workers: int = 3):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm1-photo")
+        self._futures: Dict[str, Future] = {}
+        self._submitted_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, photo: Dict[str, Any]) -> None:
+        """Scan callback: queue a freshly captured ui_map photo entry."""
+        if (photo.get("media_type") or "photo").lower() != "photo":
+            return
+        path = photo.get("crop_path")
+        if not path:
+            return
+        with self._lock:
+            if path in self._futures:
+                return
+            self._submitted_at[path] = time.perf_counter()
+            self._futures[path] = self._executor.submit(_describe_photo_llm1, path)
+        _log(f"[LLM1] streaming {os.path.basename(path)}")
+
+    def finish(self, image_paths: List[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        t0 = time.perf_counter()
+        existing = [p for p in image_paths if isinstance(p, str) and photo_store.available(p)]
+        with self._lock:
+            futures = dict(self._futures)
+        for p in existing:
+            if p not in futures:
+                futures[p] = self._executor.submit(_describe_photo_llm1, p)
+
+        photos: List[Dict[str, Any]] = []
+        notes: List[Dict[str, Any]] = []
+        total_cost = 0.0
+        models: List[str] = []
+        payloads: List[ImagePayload] = []
+        hidden = 0
+        for idx, p in enumerate(existing, start=1):
+            fut = futures[p]
+            if fut.done():
+                hidden += 1
+            described, model_used, cost_usd, payload = fut.result()
+            payloads.append(payload)
+            total_cost += cost_usd or 0.0
+            models.append(model_used)
+            desc = str(described.get("description") or "")
+            photos.append({"id": f"photo_{idx}", "description": desc})
+            notes.append({"id": f"photo_{idx}", "description": desc, "visual_notes": described.get("visual_notes") or ""})
+        wait_s = time.perf_counter() - t0
+
+        prompt = LLM1_TRAITS_AGGREGATE(json.dumps(notes, indent=2, ensure_ascii=False))
+        aggregated, agg_model, agg_cost = _call_llm1_json(
+            "llm1_aggregate",
+            prompt,
+            [{"role": "user", "content": prompt}],
+            [],
+            model_type="small",
+        )
+        total_cost += agg_cost or 0.0
+        visual_traits = aggregated.get("visual_traits")
+        if not isinstance(visual_traits, dict):
+            visual_traits = {}
+
+        # Keep the batch prompt's shape: six slots, missing ones left empty.
+        for idx in range(len(photos) + 1, 7):
+            photos.append({"id": f"photo_{idx}", "description": ""})
+
+        meta = {
+            "images_count": len(existing),
+            "images_paths": existing,
+            "model_used": models[0] if models else agg_model,
+            "aggregate_model": agg_model,
+            "cost_usd": total_cost,
+            "image_payload": summarize_payloads(payloads),
+            "stream": {
+                "photo_calls": len(existing),
+                "ready_at_scan_end": hidden,
+                "photo_wait_s": round(wait_s, 2),
+                "aggregate_s": round(time.perf_counter() - t0 - wait_s, 2),
+            },
+        }
+        _log(
+            f"[LLM1] stream: {hidden}/{len(existing)} photos ready at scan end, "
+            f"waited {wait_s:.2f}s, aggregate {meta['stream']['aggregate_s']:.2f}s"
+        )
+        return {"photos": photos, "visual_traits": visual_traits}, meta
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
 def run_duplicate_verification(old_profile: Dict[str, Any], new_profile: Dict[str, Any], model: str | None = None) -> Tuple[bool, Dict[str, Any]]:
     """Uses a fast LLM call to verify if two profiles represent the exact same person. Returns (is_same, full_json_response)."""
     old_json = json.dumps(old_profile, indent=2, ensure_ascii=False)
@@ -346,6 +459,7 @@ def run_duplicate_verification(old_profile: Dict[str, Any], new_profile: Dict[st
             model_type="small" if resolved_model != get_large_model() else "large",
             response_format={"type": "json_object"},
             messages=[{"role": "user", "content": prompt}],
+            stage="llm_dupe_detect",
         )
         raw = resp.content or ""
         clean_raw = raw.strip()
@@ -357,9 +471,14 @@ def run_duplicate_verification(old_profile: Dict[str, Any], new_profile: Dict[st
             clean_raw = clean_raw[:-3]
         clean_raw = clean_raw.strip()
 
-        parsed = json.loads(clean_raw or "{}")
+        try:
+            parsed = json.loads(clean_raw or "{}")
+        except ValueError:
+            parsed = None
         if isinstance(parsed, dict):
             return bool(parsed.get("is_same_person", False)), parsed
+        discard_cached(resp)
+        _log("[VERIFY] LLM duplicate verification returned malformed JSON")
     except Exception as e:
         _log(f"[VERIFY] LLM duplicate verification failed: {e}")
     
@@ -0,0 +1,108 @@
+import os
+import struct
+from io import BytesIO
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from runtime import _log
+
+# Raw framebuffer capture.
+#
+# `screencap` without -p streams the framebuffer as a small header followed by
+# uncompressed pixels, so the phone skips PNG encoding and the host skips PNG
+# decoding. The pixels are wrapped in a NumPy view (no copy); callers crop the
+# bounds they need and only that region is ever converted or hashed.
+#
+# HINGE_RAW_SCREENCAP=0 forces the PNG path.
+
+# Android PixelFormat values that map to 4 bytes/pixel.
+_FORMAT_RGBA = {1, 2}  # RGBA_8888, RGBX_8888
+_FORMAT_BGRA = {5}  # BGRA_8888
+
+
+class Framebuffer:
+    """A full-screen capture exposed as an (H, W, 4) RGBA array view."""
+
+    def __init__(self, pixels: np.ndarray, raw: bool):
+        self.pixels = pixels
+        self.raw = raw
+
+    @property
+    def width(self) -> int:
+        return int(self.pixels.shape[1])
+
+    @property
+    def height(self) -> int:
+        return int(self.pixels.shape[0])
+
+    def crop(self, bounds: Tuple[int, int, int, int]) -> np.ndarray:
+        """Zero-copy view of the requested region (RGBA)."""
+        x1, y1, x2, y2 = bounds
+        return self.pixels[y1:y2, x1:x2]
+
+    def crop_image(self, bounds: Tuple[int, int, int, int]) -> Image.Image:
+        """RGB PIL image of just the requested region (copies only the crop)."""
+        region = np.ascontiguousarray(self.crop(bounds)[:, :, :3])
+        return Image.fromarray(region, "RGB")
+
+
+def _raw_enabled() -> bool:
+    return os.getenv("HINGE_RAW_SCREENCAP", "1") != "0"
+
+
+def _exec_out(device, cmd: str) -> bytes:
+    conn = device.create_connection()
+    try:
+        conn.send(f"exec:{cmd}")
+        chunks = []
+        while True:
+            chunk = conn.socket.recv(1 << 20)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _parse_raw_screencap(data: bytes) -> Optional[np.ndarray]:
+    if len(data) < 12:
+        return None
+    w, h, fmt = struct.unpack_from("<III", data, 0)
+    if fmt not in _FORMAT_RGBA and fmt not in _FORMAT_BGRA:
+        return None
+    body = w * h * 4
+    # Android 9+ adds a 4-byte colour space field to the header.
+    header = len(data) - body
+    if header not in (12, 16):
+        return None
+    pixels = np.frombuffer(data, dtype=np.uint8, count=body, offset=header).reshape(h, w, 4)
+    if fmt in _FORMAT_BGRA:
+        pixels = pixels[:, :, [2, 1, 0, 3]]
+    return pixels
+
+
+def _capture_png(device) -> Framebuffer:
+    img = Image.open(BytesIO(device.screencap())).convert("RGBA")
+    return Framebuffer(np.asarray(img), raw=False)
+
+
+def capture_framebuffer(device) -> Framebuffer:
+    """
+    Grab the current screen. Uses raw exec-out when the device supports it and
+    falls back to the PNG screencap otherwise (fake devices, odd pixel formats).
+    """
+    if _raw_enabled() and hasattr(device, "create_connection"):
+        try:
+            pixels = _parse_raw_screencap(_exec_out(device, "screencap"))
+            if pixels is not None:
+                return Framebuffer(pixels, raw=True)
+            _log("[SCREENCAP] Unsupported raw format; using PNG")
+        except Exception as e:
+            _log(f"[SCREENCAP] Raw capture failed ({e}); using PNG")
+    return _capture_png(device)
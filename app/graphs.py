@@ -1,4 +1,3 @@
-import sqlite3
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mtick
@@ -7,6 +6,8 @@ import numpy as np
 import os
 import seaborn as sns
 
+import storage
+
 OUTPUT_DIR = r"C:\Users\danie\Documents\Hinge\AutoHinge\app\graphs"
 
 def database():
@@ -18,15 +19,14 @@ def database():
         return None
 
     # Pull all data
-    # sqlite3 connection with uri=True and mode=rw prevents creating a new db if it doesn't exist
-    conn = sqlite3.connect(f"file:{db_file}?mode=rw", uri=True)
+    # Read-only shared connection: never creates a new db if it doesn't exist
+    conn = storage.connection(db_file, readonly=True)
     query = """
     SELECT timestamp, score_breakdown, verdict, matched, Age 
     FROM profiles 
     WHERE timestamp IS NOT NULL 
     """
     df = pd.read_sql_query(query, conn)
-    conn.close()
 
     if df.empty:
         print("No data found in database.")
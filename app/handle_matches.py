@@ -1,11 +1,11 @@
-import sqlite3
-import json
 import sys
 import xml.etree.ElementTree as ET
 import os
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
+import match_events
+import storage
 from sqlite_store import get_db_path, init_db
 
 EVENT_TYPES = {
@@ -52,120 +52,24 @@ def _parse_timestamp(raw: str) -> Optional[str]:
             continue
     return None
 
-def _calculate_status(chat_log: List[Dict[str, Any]], milestones: List[Dict[str, Any]], match_time: str = None) -> str:
-    if milestones:
-        # Sort milestones chronologically in case they are out of order
-        sorted_milestones = sorted(milestones, key=lambda x: x['timestamp'])
-        last_milestone = sorted_milestones[-1]
-        m_type = last_milestone.get("event")
-        if m_type in ["unmatched_by_her", "unmatched_by_me", "ended"]:
-            return "ended"
-        if m_type == "moved_off_hinge":
-            return "moved_off_hinge"
-        if m_type == "stale":
-            return "stale"
-
-    all_events = chat_log + milestones
-    if all_events:
-        all_events.sort(key=lambda x: x['timestamp'])
-        # If the absolute last event (even chat) is stale, or if 14 days passed
-        # Find the last chat message to determine if it's stale organically
-        if chat_log:
-            sorted_chat = sorted(chat_log, key=lambda x: x['timestamp'])
-            last_chat_ts = sorted_chat[-1]['timestamp']
-            
-            effective_ts = last_chat_ts
-            if match_time and match_time > last_chat_ts:
-                effective_ts = match_time
-                
-            try:
-                last_dt = datetime.fromisoformat(effective_ts.replace('Z', '+00:00'))
-                if (datetime.now().timestamp() - last_dt.timestamp()) > (14 * 86400):
-                    return "stale"
-            except Exception:
-                pass
-
-    if chat_log:
-        sorted_chat = sorted(chat_log, key=lambda x: x['timestamp'])
-        last_msg = sorted_chat[-1]
-        return "her_turn" if last_msg.get("event") == "message_sent" else "my_turn"
-
-    return "active"
-
-def _recalculate_all_statuses() -> None:
-    """Self-healing function to recalculate the status of all active profiles."""
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute("SELECT id, chat_log, milestones, status, match_time FROM profiles WHERE matched = 1")
-        rows = cur.fetchall()
-        
-        updates = []
-        for r in rows:
-            p_id, c_log_str, m_log_str, current_status, match_time = r
-            chat_log = json.loads(c_log_str) if c_log_str else []
-            milestones = json.loads(m_log_str) if m_log_str else []
-            
-            new_status = _calculate_status(chat_log, milestones, match_time)
-            if new_status != current_status:
-                updates.append((new_status, p_id))
-                
-        if updates:
-            cur.executemany("UPDATE profiles SET status = ? WHERE id = ?", updates)
-            con.commit()
-    finally:
-        con.close()
-
-def _update_profile_data(profile_id: int, chat_log: List[Dict[str, Any]] = None, milestones: List[Dict[str, Any]] = None):
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute("SELECT chat_log, milestones, match_time FROM profiles WHERE id = ?", (profile_id,))
-        res = cur.fetchone()
-        
-        current_chat = json.loads(res[0]) if res and res[0] else []
-        current_milestones = json.loads(res[1]) if res and res[1] else []
-        match_time = res[2] if res else None
-        
-        final_chat = chat_log if chat_log is not None else current_chat
-        final_milestones = milestones if milestones is not None else current_milestones
-        
-        all_events = final_chat + final_milestones
-        all_events.sort(key=lambda x: x['timestamp'])
-        if not all_events:
-            raise RuntimeError(f"LOUD FAIL: Attempted to update profile {profile_id} with no activity data.")
-        
-        last_act = all_events[-1]['timestamp']
-        
-        new_status = _calculate_status(final_chat, final_milestones, match_time)
+def _sync_statuses() -> None:
+    """Bring statuses up to date: profiles changed since last time plus stale transitions."""
+    match_events.sync_statuses()
 
-        cur.execute("""
-            UPDATE profiles 
-            SET chat_log = ?, milestones = ?, last_activity = ?, status = ?
-            WHERE id = ?
-        """, (json.dumps(final_chat), json.dumps(final_milestones), last_act, new_status, profile_id))
-        con.commit()
-    finally:
-        con.close()
+def _append_messages(profile_id: int, messages: List[Dict[str, Any]]) -> int:
+    """Append captured messages not already logged (matched on text). Returns how many were new."""
+    # Hash check based pure on string content to prevent update bleeding. Only stored
+    # messages count: repeats inside one capture ("haha", "ok") are real messages.
+    seen_descs = match_events.existing_texts(profile_id, [m['description'] for m in messages])
+    new_msgs = [m for m in messages if m['description'] not in seen_descs]
+    return match_events.append_events(profile_id, new_msgs)
 
 def _log_milestone(profile_id: int, event_type: str, timestamp: str, description: str = ""):
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cur.execute("SELECT milestones FROM profiles WHERE id = ?", (profile_id,))
-    res = cur.fetchone()
-    con.close()
-    
-    milestones = json.loads(res[0]) if res and res[0] else []
-    milestones.append({
+    match_events.append_events(profile_id, [{
         "event": event_type,
         "timestamp": timestamp,
         "description": description.strip()
-    })
-    
-    _update_profile_data(profile_id, milestones=milestones)
+    }])
     print(f"✓ Logged milestone: {EVENT_TYPES.get(event_type, event_type)} at {timestamp}")
 
 def _parse_bounds(bounds_str: str) -> Optional[Tuple[int, int, int, int]]:
@@ -178,31 +82,24 @@ def _parse_bounds(bounds_str: str) -> Optional[Tuple[int, int, int, int]]:
     except Exception: return None
 
 def _get_conversation_starter(profile_id: int) -> List[Dict[str, Any]]:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute("""
-            SELECT answer_1, answer_2, answer_3, opening_pick_text, opening_pick_target_id, timestamp
-            FROM profiles WHERE id = ?
-        """, (profile_id,))
-        row = cur.fetchone()
-        if not row: return []
-        a1, a2, a3, pick_text, target_id, opener_ts = row
+    row = storage.query_one("""
+        SELECT answer_1, answer_2, answer_3, opening_pick_text, opening_pick_target_id, timestamp
+        FROM profiles WHERE id = ?
+    """, (profile_id,), db_path=get_db_path())
+    if not row: return []
+    a1, a2, a3, pick_text, target_id, opener_ts = row
+    
+    starter_content = ""
+    if target_id and target_id.startswith("prompt"):
+        idx = target_id.split('_')[-1]
+        starter_content = {'1': a1, '2': a2, '3': a3}.get(idx, "")
         
-        starter_content = ""
-        if target_id and target_id.startswith("prompt"):
-            idx = target_id.split('_')[-1]
-            starter_content = {'1': a1, '2': a2, '3': a3}.get(idx, "")
-            
-        log = []
-        if starter_content:
-            log.append({'event': 'message_received', 'timestamp': opener_ts, 'description': f"[Replied to Prompt]: {starter_content}"})
-        if pick_text:
-            log.append({'event': 'message_sent', 'timestamp': opener_ts, 'description': pick_text})
-        return log
-    finally:
-        con.close()
+    log = []
+    if starter_content:
+        log.append({'event': 'message_received', 'timestamp': opener_ts, 'description': f"[Replied to Prompt]: {starter_content}"})
+    if pick_text:
+        log.append({'event': 'message_sent', 'timestamp': opener_ts, 'description': pick_text})
+    return log
 
 def _extract_messages_from_xml(xml_content: str, match_name: str) -> List[Dict[str, Any]]:
     import re
@@ -377,15 +274,10 @@ def _handle_conversation_import(profile: Dict[str, Any]) -> None:
     profile_id = profile["id"]
     name = profile["name"]
     
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cur.execute("SELECT timestamp FROM profiles WHERE id = ?", (profile_id,))
-    row = cur.fetchone()
-    con.close()
-    if not row or not row[0]:
+    row = storage.query_one("SELECT timestamp FROM profiles WHERE id = ?", (profile_id,), db_path=get_db_path())
+    if not row or not row["timestamp"]:
         raise ValueError(f"LOUD FAIL: No Like 'timestamp' found for {name}.")
-    opener_ts = row[0]
+    opener_ts = row["timestamp"]
     
     captured = _automated_chat_capture(name, opener_ts)
     starter_log = _get_conversation_starter(profile_id)
@@ -400,109 +292,62 @@ def _handle_conversation_import(profile: Dict[str, Any]) -> None:
 
     full_log = starter_log + filtered_captured
     
-    _update_profile_data(profile_id, chat_log=full_log)
+    _append_messages(profile_id, full_log)
     print(f"✓ Imported {name}. Total messages: {len(full_log)}")
 
 def _handle_conversation_update(profile: Dict[str, Any]) -> None:
     profile_id = profile["id"]
     name = profile["name"]
     
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cur.execute("SELECT chat_log, timestamp FROM profiles WHERE id = ?", (profile_id,))
-    res = cur.fetchone()
-    con.close()
+    res = storage.query_one("SELECT timestamp FROM profiles WHERE id = ?", (profile_id,), db_path=get_db_path())
     
     if not res:
         raise ValueError(f"LOUD FAIL: Profile {profile_id} not found during update.")
         
-    current_chat = json.loads(res[0]) if res[0] else []
-    anchor_ts = current_chat[-1]['timestamp'] if current_chat else res[1]
+    last_msg = match_events.last_message(profile_id)
+    anchor_ts = last_msg['timestamp'] if last_msg else res["timestamp"]
     
     captured = _automated_chat_capture(name, anchor_ts)
     if not captured: return
     
-    # Hash check based pure on string content to prevent update bleeding
-    seen_descs = { m['description'] for m in current_chat }
-    
-    new_msgs = []
-    for c in captured:
-        if c['description'] not in seen_descs:
-            new_msgs.append(c)
-
-    if new_msgs:
-        current_chat.extend(new_msgs)
-        current_chat.sort(key=lambda x: x['timestamp'])
-        _update_profile_data(profile_id, chat_log=current_chat)
-        print(f"✓ Added {len(new_msgs)} new messages for {name}")
+    added = _append_messages(profile_id, captured)
+    if added:
+        print(f"✓ Added {added} new messages for {name}")
     else:
         print(f"No new messages found for {name}.")
 
 def _fetch_matched_profiles_with_no_events(limit: int = 50) -> List[Dict[str, Any]]:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute("""
-            SELECT id, Name, Age, Height_cm, timestamp, verdict, match_time
-            FROM profiles 
-            WHERE matched = 1 AND (chat_log IS NULL OR chat_log = '' OR chat_log = '[]')
-            AND (milestones IS NULL OR milestones = '' OR milestones = '[]')
-            ORDER BY match_time DESC, timestamp DESC
-            LIMIT ?
-        """, (limit,))
-        rows = cur.fetchall()
-        return [{"id": r[0], "name": r[1], "age": r[2], "height_cm": r[3], "timestamp": r[4], "verdict": r[5], "match_time": r[6]} for r in rows]
-    finally:
-        con.close()
+    rows = storage.query(f"""
+        SELECT id, Name AS name, Age AS age, Height_cm AS height_cm, timestamp, verdict, match_time
+        FROM profiles 
+        WHERE matched = 1 AND NOT {match_events.HAS_EVENTS}
+        ORDER BY match_time DESC, timestamp DESC
+        LIMIT ?
+    """, (limit,), db_path=get_db_path())
+    return [dict(r) for r in rows]
 
 def _fetch_all_matched_profiles(limit: int = 100) -> List[Dict[str, Any]]:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute("""
-            SELECT id, Name, Age, Height_cm, timestamp, verdict, match_time, chat_log, milestones, status, last_activity
-            FROM profiles 
-            WHERE matched = 1
-            ORDER BY match_time DESC, timestamp DESC
-            LIMIT ?
-        """, (limit,))
-        rows = cur.fetchall()
-        return [
-            {
-                "id": r[0], "name": r[1], "age": r[2], "height_cm": r[3], "timestamp": r[4], 
-                "verdict": r[5], "match_time": r[6], "chat_log": r[7], "milestones": r[8],
-                "status": r[9], "last_activity": r[10]
-            } for r in rows
-        ]
-    finally:
-        con.close()
+    rows = storage.query(f"""
+        SELECT id, Name AS name, Age AS age, Height_cm AS height_cm, timestamp, verdict, match_time,
+               status, last_activity, {match_events.COUNT_COLUMNS}
+        FROM profiles 
+        WHERE matched = 1
+        ORDER BY match_time DESC, timestamp DESC
+        LIMIT ?
+    """, (limit,), db_path=get_db_path())
+    return [dict(r) for r in rows]
 
 def _fetch_active_profiles(limit: int = 50) -> List[Dict[str, Any]]:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute("""
-            SELECT id, Name, Age, Height_cm, timestamp, verdict, match_time, status, last_activity, chat_log, milestones
-            FROM profiles 
-            WHERE matched = 1 AND status IN ('my_turn', 'her_turn', 'active')
-            AND (chat_log IS NOT NULL AND chat_log != '' AND chat_log != '[]')
-            ORDER BY last_activity DESC
-            LIMIT ?
-        """, (limit,))
-        rows = cur.fetchall()
-        return [
-            {
-                "id": r[0], "name": r[1], "age": r[2], "height_cm": r[3], "timestamp": r[4], 
-                "verdict": r[5], "match_time": r[6], "status": r[7], "last_activity": r[8],
-                "chat_log": r[9], "milestones": r[10]
-            } for r in rows
-        ]
-    finally:
-        con.close()
+    rows = storage.query(f"""
+        SELECT id, Name AS name, Age AS age, Height_cm AS height_cm, timestamp, verdict, match_time,
+               status, last_activity, {match_events.COUNT_COLUMNS}
+        FROM profiles 
+        WHERE matched = 1 AND status IN ('my_turn', 'her_turn', 'active')
+        AND {match_events.HAS_MESSAGES}
+        ORDER BY last_activity DESC
+        LIMIT ?
+    """, (limit,), db_path=get_db_path())
+    return [dict(r) for r in rows]
 
 def _print_profiles(rows: List[Dict[str, Any]], show_events: bool = False, start_idx: int = 1) -> None:
     for idx, r in enumerate(rows, start=start_idx):
@@ -526,10 +371,10 @@ def _print_profiles(rows: List[Dict[str, Any]], show_events: bool = False, start
 
         events_info = ""
         if show_events:
-            c_log = json.loads(r.get("chat_log") or "[]")
-            m_log = json.loads(r.get("milestones") or "[]")
-            if c_log or m_log:
-                events_info = f" | Chat: {len(c_log)} | Milestones: {len(m_log)}"
+            n_chat = r.get("message_count") or 0
+            n_miles = r.get("milestone_count") or 0
+            if n_chat or n_miles:
+                events_info = f" | Chat: {n_chat} | Milestones: {n_miles}"
         
         print(f"[{idx}] " + " | ".join(info) + events_info)
 
@@ -628,23 +473,13 @@ def _handle_ended(profile: Dict[str, Any]) -> None:
 
 def _handle_stale_detection() -> None:
     """Detects and prints the names of inactive profiles before marking as stale."""
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cur.execute("SELECT id, Name, last_activity FROM profiles WHERE matched = 1 AND status IN ('my_turn', 'her_turn')")
-    rows = cur.fetchall()
-    
-    stale_profiles = []
-    limit = datetime.now().timestamp() - (14 * 86400)
-    
-    for r in rows:
-        try:
-            ts = datetime.fromisoformat(r[2].replace('Z', '+00:00')).timestamp()
-            if ts < limit:
-                stale_profiles.append({"id": r[0], "name": r[1]})
-        except Exception:
-            continue
-            
+    rows = storage.query(
+        "SELECT id, Name FROM profiles WHERE matched = 1 AND status IN ('my_turn', 'her_turn') AND last_activity < ?",
+        (match_events.stale_cutoff(),),
+        db_path=get_db_path(),
+    )
+    stale_profiles = [{"id": r["id"], "name": r["Name"]} for r in rows]
+
     if stale_profiles:
         print("\n--- Stale Profiles Detected (No activity in 14+ days) ---")
         for p in stale_profiles:
@@ -654,26 +489,13 @@ def _handle_stale_detection() -> None:
             now = datetime.now().isoformat(timespec="seconds")
             for p in stale_profiles:
                 _log_milestone(p['id'], "stale", now, "Auto-detected stale")
-    con.close()
 
 def _has_conversation_events(profile_id: int) -> bool:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cur.execute("SELECT chat_log FROM profiles WHERE id = ?", (profile_id,))
-    res = cur.fetchone()
-    con.close()
-    return bool(res and res[0] and res[0] != "[]")
+    return match_events.last_message(profile_id) is not None
 
 def _show_event_log(profile: Dict[str, Any]) -> None:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cur.execute("SELECT chat_log, milestones FROM profiles WHERE id = ?", (profile['id'],))
-    res = cur.fetchone()
-    con.close()
-    chat = json.loads(res[0]) if res and res[0] else []
-    miles = json.loads(res[1]) if res and res[1] else []
+    chat = match_events.chat_log(profile['id'])
+    miles = match_events.milestones(profile['id'])
     print(f"\n--- Milestones for {profile['name']} ---")
     for m in miles: print(f"{m['timestamp']} - {m['event']} | {m.get('description', '')}")
     print(f"\n--- Chat History ---")
@@ -703,30 +525,18 @@ def _handle_milestone_menu(profile: Dict[str, Any]) -> None:
 
 def _find_profile_by_name(name_query: str) -> Optional[Dict[str, Any]]:
     """Searches for profiles by name and handles duplicates."""
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    
     # Search for all matched profiles with this name (case-insensitive)
-    cur.execute("""
-        SELECT id, Name, Age, Height_cm, match_time, verdict, chat_log, milestones 
+    rows = storage.query(f"""
+        SELECT id, Name AS name, Age AS age, Height_cm AS height_cm, match_time, verdict, {match_events.COUNT_COLUMNS}
         FROM profiles 
         WHERE Name LIKE ? AND matched = 1
-    """, (name_query,))
-    
-    rows = cur.fetchall()
-    con.close()
+    """, (name_query,), db_path=get_db_path())
     
     if not rows:
         print(f"No match found for '{name_query}'.")
         return None
 
-    profiles = [
-        {
-            "id": r[0], "name": r[1], "age": r[2], "height_cm": r[3], 
-            "match_time": r[4], "verdict": r[5], "chat_log": r[6], "milestones": r[7]
-        } for r in rows
-    ]
+    profiles = [dict(r) for r in rows]
 
     if len(profiles) == 1:
         p = profiles[0]
@@ -821,7 +631,7 @@ def _interactive_menu() -> None:
 
 def main() -> int:
     init_db()
-    _recalculate_all_statuses()
+    _sync_statuses()
     _handle_stale_detection()
     try:
         _interactive_menu()
@@ -1,10 +1,13 @@
 from ppadb.client import Client as AdbClient
+import os
 import subprocess
 import time
 
 
 def ensure_adb_running():
     """Ensure that the Android Debug Bridge (ADB) server is running."""
+    if os.getenv("HINGE_REPLAY_BUNDLE"):
+        return
     print("Checking ADB status...")
     try:
         result = subprocess.run(["adb", "get-state"], capture_output=True, text=True)
@@ -21,6 +24,12 @@ def ensure_adb_running():
 
 
 def connect_device(user_ip_address: str = "127.0.0.1"):
+    replay_bundle = os.getenv("HINGE_REPLAY_BUNDLE")
+    if replay_bundle:
+        from device_replay import open_replay_device
+        device = open_replay_device(replay_bundle)
+        print(f"Connected to {device.serial}")
+        return device
     adb = AdbClient(host=user_ip_address, port=5037)
     devices = adb.devices()
     if len(devices) == 0:
@@ -28,15 +37,56 @@ def connect_device(user_ip_address: str = "127.0.0.1"):
         return None
     device = devices[0]
     print(f"Connected to {device.serial}")
+    record_bundle = os.getenv("HINGE_RECORD_BUNDLE")
+    if record_bundle:
+        from device_replay import wrap_for_recording
+        device = wrap_for_recording(device, record_bundle)
     return device
 
 
+def connect_all_devices(user_ip_address: str = "127.0.0.1") -> list:
+    """
+    Return every device known to the adb server (USB and TCP).
+    HINGE_FLEET_CONNECT=host:port,host:port runs `adb connect` for each first.
+    """
+    if os.getenv("HINGE_REPLAY_BUNDLE"):
+        device = connect_device(user_ip_address)
+        return [device] if device else []
+    adb = AdbClient(host=user_ip_address, port=5037)
+    for target in (os.getenv("HINGE_FLEET_CONNECT") or "").split(","):
+        target = target.strip()
+        if not target:
+            continue
+        host, _, port = target.partition(":")
+        try:
+            adb.remote_connect(host, int(port or 5555))
+        except Exception as e:
+            print(f"Failed to connect {target}: {e}")
+    devices = [d for d in adb.devices() if d.get_state() == "device"]
+    record_bundle = os.getenv("HINGE_RECORD_BUNDLE")
+    for d in devices:
+        print(f"Connected to {d.serial}")
+    if record_bundle:
+        from device_replay import wrap_for_recording
+        root, ext = os.path.splitext(record_bundle)
+        devices = [
+            wrap_for_recording(d, f"{root}_{d.serial.replace(':', '_')}{ext or '.zip'}") for d in devices
+        ]
+    return devices
+
+
+def shell(device, cmd: str) -> str:
+    """Run a shell command over the device's persistent adb session."""
+    from adb_session import run_shell
+    return run_shell(device, cmd)
+
+
 def tap(device, x: int, y: int) -> None:
-    device.shell(f"input tap {x} {y}")
+    shell(device, f"input tap {x} {y}")
 
 
 def swipe(device, x1: int, y1: int, x2: int, y2: int, duration: int = 500) -> None:
-    device.shell(f"input swipe {x1} {y1} {x2} {y2} {duration}")
+    shell(device, f"input swipe {x1} {y1} {x2} {y2} {duration}")
 
 
 def input_text(device, text: str) -> None:
@@ -45,7 +95,7 @@ def input_text(device, text: str) -> None:
     s = text.replace("\n", " ").replace("\r", " ").replace("\t", " ").strip()
     s = s.replace(" ", "%s")
     s = _shell_quote(s)
-    device.shell(f"input text {s}")
+    shell(device, f"input text {s}")
 
 
 def _shell_quote(text: str) -> str:
@@ -53,18 +103,18 @@ def _shell_quote(text: str) -> str:
 
 
 def hide_keyboard(device) -> None:
-    device.shell("input keyevent 4")
+    shell(device, "input keyevent 4")
 
 
 def get_screen_resolution(device):
-    output = device.shell("wm size")
+    output = shell(device, "wm size")
     resolution = output.strip().split(":")[1].strip()
     width, height = map(int, resolution.split("x"))
     return width, height
 
 
 def open_hinge(device) -> None:
-    device.shell("monkey -p co.hinge.app 1")
+    shell(device, "monkey -p co.hinge.app 1")
     time.sleep(1)
 
 
@@ -0,0 +1,201 @@
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import photo_store
+
+# Image payload encoder for vision calls.
+#
+# Crops come off the phone as full-resolution PNGs, far larger than the model
+# needs. Before upload each image is downscaled so its longest side fits the
+# model's useful resolution (Gemini tiles images at 768px), optionally labelled,
+# and encoded to JPEG/WebP, stepping quality (then size) down until it fits
+# the byte budget. Results are memoized by content hash + label + settings, so
+# retries, the per-photo/batch LLM1 paths and ML validation never re-encode
+# the same crop. Crops captured in this run come straight from photo_store as
+# arrays, so there is no file read or PNG decode.
+#
+# HINGE_LLM_IMAGE_FORMAT=jpeg|webp|png   png keeps the original lossless payload
+# HINGE_LLM_IMAGE_MAX_SIDE=768           longest side in pixels
+# HINGE_LLM_IMAGE_MAX_BYTES=150000       per-image byte budget
+
+_MEMO_MAX = 256
+_QUALITIES = (90, 80, 70, 60, 50, 40)
+
+_LOCK = threading.Lock()
+_MEMO: "OrderedDict[tuple, ImagePayload]" = OrderedDict()
+_STATS: Dict[str, int] = {"images": 0, "memo_hits": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+class ImagePayload:
+    def __init__(self, data: bytes, mime: str, source_bytes: int, width: int, height: int):
+        self.data = data
+        self.mime = mime
+        self.source_bytes = source_bytes
+        self.width = width
+        self.height = height
+        self._b64: Optional[str] = None
+
+    @property
+    def b64(self) -> str:
+        if self._b64 is None:
+            self._b64 = base64.b64encode(self.data).decode("utf-8")
+        return self._b64
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime};base64,{self.b64}"
+
+
+def _settings() -> tuple:
+    fmt = (os.getenv("HINGE_LLM_IMAGE_FORMAT", "jpeg") or "jpeg").strip().lower()
+    if fmt not in {"jpeg", "webp", "png"}:
+        fmt = "jpeg"
+    try:
+        max_side = int(os.getenv("HINGE_LLM_IMAGE_MAX_SIDE", "768"))
+    except ValueError:
+        max_side = 768
+    try:
+        max_bytes = int(os.getenv("HINGE_LLM_IMAGE_MAX_BYTES", "150000"))
+    except ValueError:
+        max_bytes = 150000
+    return fmt, max_side, max_bytes
+
+
+def _draw_label(img: Any, label: str) -> None:
+    import cv2
+
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    font_scale = 1.0
+    thickness = 2
+
+    # Get text size
+    (text_width, text_height), baseline = cv2.getTextSize(label, font, font_scale, thickness)
+
+    x, y = 10, 30
+
+    # Handle both 3-channel (BGR) and 4-channel (BGRA) images safely
+    if len(img.shape) == 3 and img.shape[2] == 4:
+        bg_color = (0, 0, 0, 255)
+        txt_color = (255, 255, 255, 255)
+    else:
+        bg_color = (0, 0, 0)
+        txt_color = (255, 255, 255)
+
+    # Draw black filled rectangle
+    cv2.rectangle(img, (x - 5, y - text_height - 5), (x + text_width + 5, y + baseline + 5), bg_color, cv2.FILLED)
+    # Draw white text
+    cv2.putText(img, label, (x, y), font, font_scale, txt_color, thickness, cv2.LINE_AA)
+
+
+def _resize_to(img: Any, max_side: int) -> Any:
+    import cv2
+
+    h, w = img.shape[:2]
+    longest = max(h, w)
+    if max_side <= 0 or longest <= max_side:
+        return img
+    scale = max_side / float(longest)
+    return cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def _encode(img: Any, fmt: str, max_bytes: int) -> tuple:
+    import cv2
+
+    if fmt == "png":
+        ok, buf = cv2.imencode(".png", img)
+        if not ok:
+            raise ValueError("png encode failed")
+        return buf.tobytes(), "image/png", img
+
+    if len(img.shape) == 3 and img.shape[2] == 4:
+        img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    ext, flag, mime = (
+        (".webp", cv2.IMWRITE_WEBP_QUALITY, "image/webp")
+        if fmt == "webp"
+        else (".jpg", cv2.IMWRITE_JPEG_QUALITY, "image/jpeg")
+    )
+    data = b""
+    for _ in range(4):
+        for q in _QUALITIES:
+            ok, buf = cv2.imencode(ext, img, [flag, q])
+            if not ok:
+                raise ValueError(f"{fmt} encode failed")
+            data = buf.tobytes()
+            if max_bytes <= 0 or len(data) <= max_bytes:
+                return data, mime, img
+        # Lowest quality still over budget: shrink and try again.
+        h, w = img.shape[:2]
+        img = cv2.resize(img, (max(1, int(w * 0.75)), max(1, int(h * 0.75))), interpolation=cv2.INTER_AREA)
+    return data, mime, img
+
+
+def encode_image_payload(image_path: str, label: str = "") -> ImagePayload:
+    """Downscaled, optionally labelled, size-bounded payload for image_path (memoized by content)."""
+    import cv2
+    import numpy as np
+
+    fmt, max_side, max_bytes = _settings()
+    stored = photo_store.get_bgr(image_path)
+    if stored is not None:
+        raw = b""
+        source_bytes = os.path.getsize(image_path) if os.path.isfile(image_path) else int(stored.nbytes)
+        digest = hashlib.sha256(stored.tobytes()).hexdigest()
+    else:
+        with open(image_path, "rb") as f:
+            raw = f.read()
+        source_bytes = len(raw)
+        digest = hashlib.sha256(raw).hexdigest()
+    key = (digest, label, fmt, max_side, max_bytes)
+    with _LOCK:
+        hit = _MEMO.get(key)
+        if hit is not None:
+            _MEMO.move_to_end(key)
+            _STATS["memo_hits"] += 1
+            _STATS["bytes_in"] += hit.source_bytes
+            _STATS["bytes_out"] += len(hit.data)
+            return hit
+
+    if stored is not None:
+        img = stored
+    else:
+        img = cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        if img is None:
+            raise ValueError(f"Failed to decode image from path: {image_path}")
+    # Label after resizing so the text stays legible at the upload size.
+    img = _resize_to(img, max_side)
+    if label:
+        if img is stored:
+            img = img.copy()  # never draw on the shared in-memory crop
+        _draw_label(img, label)
+    data, mime, out_img = _encode(img, fmt, max_bytes)
+    payload = ImagePayload(data, mime, source_bytes, int(out_img.shape[1]), int(out_img.shape[0]))
+
+    with _LOCK:
+        _MEMO[key] = payload
+        while len(_MEMO) > _MEMO_MAX:
+            _MEMO.popitem(last=False)
+        _STATS["images"] += 1
+        _STATS["bytes_in"] += source_bytes
+        _STATS["bytes_out"] += len(data)
+    return payload
+
+
+def stats_snapshot() -> Dict[str, int]:
+    with _LOCK:
+        return dict(_STATS)
+
+
+def summarize_payloads(payloads: List[ImagePayload]) -> Dict[str, int]:
+    """Byte accounting for one request: source bytes vs uploaded bytes."""
+    bytes_in = sum(p.source_bytes for p in payloads)
+    bytes_out = sum(len(p.data) for p in payloads)
+    return {
+        "images": len(payloads),
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+        "bytes_saved": bytes_in - bytes_out,
+    }
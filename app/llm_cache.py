@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from runtime import _log
+
+# Content-addressed on-disk cache for LLM responses.
+#
+# Key = sha256 over the model, the request config and the normalized messages,
+# where inline images contribute the hash of their bytes rather than the
+# base64 text. Entries are one JSON file each; the file mtime is the LRU clock
+# (touched on every hit) and the oldest files are evicted once the directory
+# grows past the size bound.
+#
+# Only stages listed in HINGE_LLM_CACHE_STAGES are cached, each with its own TTL:
+#   HINGE_LLM_CACHE_STAGES="llm1_visual:86400,profile_eval_llm"   (ttl in seconds)
+# HINGE_LLM_CACHE=0 disables the cache, HINGE_LLM_CACHE_DIR moves it and
+# HINGE_LLM_CACHE_MAX_MB bounds it (default 256).
+#
+# JSON-mode responses are only stored once they parse, and stages that reject
+# a (cached) reply call discard() so a malformed answer is not replayed.
+
+_DEFAULT_STAGES = "llm1_visual,llm1_photo,llm1_aggregate,profile_eval_llm,llm_dupe_detect"
+_DEFAULT_TTL_S = 7 * 24 * 3600
+
+_LOCK = threading.Lock()
+_STATS: Dict[str, Dict[str, int]] = {}
+_DIR_BYTES: Optional[int] = None
+
+
+def _enabled() -> bool:
+    return os.getenv("HINGE_LLM_CACHE", "1") != "0"
+
+
+def _cache_dir() -> str:
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "llm_cache")
+    return os.getenv("HINGE_LLM_CACHE_DIR") or default
+
+
+def _max_bytes() -> int:
+    try:
+        return int(float(os.getenv("HINGE_LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+    except ValueError:
+        return 256 * 1024 * 1024
+
+
+def _stage_ttls() -> Dict[str, int]:
+    ttls: Dict[str, int] = {}
+    for item in (os.getenv("HINGE_LLM_CACHE_STAGES", _DEFAULT_STAGES) or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, ttl = item.partition(":")
+        try:
+            ttls[name.strip()] = int(ttl) if ttl.strip() else _DEFAULT_TTL_S
+        except ValueError:
+            ttls[name.strip()] = _DEFAULT_TTL_S
+    return ttls
+
+
+def stage_ttl(stage: Optional[str]) -> Optional[int]:
+    """TTL for a cacheable stage, or None if the stage is not opted in."""
+    if not stage or not _enabled():
+        return None
+    return _stage_ttls().get(stage)
+
+
+def _normalize_text(text: str) -> str:
+    return text.replace("\r\n", "\n").strip()
+
+
+def _normalize_part(part: Any) -> Any:
+    if not isinstance(part, dict):
+        return part
+    ptype = part.get("type")
+    if ptype == "text":
+        return {"type": "text", "text": _normalize_text(str(part.get("text") or ""))}
+    if ptype == "image_url":
+        image = part.get("image_url") or {}
+        url = image.get("url") if isinstance(image, dict) else ""
+        url = url if isinstance(url, str) else ""
+        if url.startswith("data:") and "," in url:
+            header, data = url.split(",", 1)
+            try:
+                import base64
+
+                raw = base64.b64decode(data)
+            except Exception:
+                raw = data.encode("utf-8")
+            return {"type": "image", "mime": header[5:].split(";")[0], "sha256": hashlib.sha256(raw).hexdigest()}
+        return {"type": "image", "url": url}
+    return part
+
+
+def _normalize_messages(messages: List[Dict[str, Any]]) -> List[Any]:
+    out: List[Any] = []
+    for msg in messages or []:
+        if not isinstance(msg, dict):
+            continue
+        content = msg.get("content", "")
+        if isinstance(content, str):
+            norm: Any = _normalize_text(content)
+        elif isinstance(content, list):
+            norm = [_normalize_part(p) for p in content]
+        else:
+            norm = content
+        out.append({"role": (msg.get("role") or "user").strip().lower(), "content": norm})
+    return out
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], config: Optional[Dict[str, Any]] = None) -> str:
+    blob = json.dumps(
+        {"model": model, "config": config or {}, "messages": _normalize_messages(messages)},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(_cache_dir(), key[:2], f"{key}.json")
+
+
+def _bump(stage: str, field: str) -> None:
+    with _LOCK:
+        counts = _STATS.setdefault(stage, {"hits": 0, "misses": 0, "stores": 0, "evictions": 0})
+        counts[field] += 1
+
+
+def lookup(stage: str, key: str, ttl_s: int) -> Optional[Dict[str, Any]]:
+    """Return the cached entry for key if present and younger than ttl_s."""
+    path = _path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        _bump(stage, "misses")
+        return None
+    except Exception as e:
+        _log(f"[LLM_CACHE] unreadable entry {os.path.basename(path)}: {e}")
+        _bump(stage, "misses")
+        return None
+    if ttl_s > 0 and time.time() - float(entry.get("created", 0)) > ttl_s:
+        _bump(stage, "misses")
+        return None
+    try:
+        os.utime(path, None)  # LRU touch
+    except OSError:
+        pass
+    _bump(stage, "hits")
+    return entry
+
+
+def _scan_dir() -> List[Tuple[float, int, str]]:
+    files: List[Tuple[float, int, str]] = []
+    for root, _, names in os.walk(_cache_dir()):
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            p = os.path.join(root, name)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+    return files
+
+
+def _evict_if_needed(stage: str, added: int) -> None:
+    global _DIR_BYTES
+    with _LOCK:
+        if _DIR_BYTES is None:
+            _DIR_BYTES = sum(size for _, size, _ in _scan_dir())
+        else:
+            _DIR_BYTES += added
+        limit = _max_bytes()
+        if _DIR_BYTES <= limit:
+            return
+        files = sorted(_scan_dir())
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        # Drop down to 90% so a full cache doesn't rescan on every store.
+        for _, size, p in files:
+            if total <= limit * 0.9:
+                break
+            try:
+                os.remove(p)
+                total -= size
+                evicted += 1
+            except OSError:
+                pass
+        _DIR_BYTES = total
+    for _ in range(evicted):
+        _bump(stage, "evictions")
+
+
+def store(stage: str, key: str, entry: Dict[str, Any]) -> None:
+    path = _path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({**entry, "stage": stage, "created": time.time()}, ensure_ascii=False)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception as e:
+        _log(f"[LLM_CACHE] store failed: {e}")
+        return
+    _bump(stage, "stores")
+    _evict_if_needed(stage, len(data.encode("utf-8")))
+
+
+def discard(stage: str, key: str) -> None:
+    """Drop an entry the calling stage could not use, so the next call goes to the model."""
+    global _DIR_BYTES
+    path = _path(key)
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+    except OSError:
+        return
+    with _LOCK:
+        if _DIR_BYTES is not None:
+            _DIR_BYTES = max(0, _DIR_BYTES - size)
+    _log(f"[LLM_CACHE] discarded unusable {stage} entry {key[:12]}")
+
+
+def stats_snapshot() -> Dict[str, Dict[str, int]]:
+    with _LOCK:
+        return {k: dict(v) for k, v in _STATS.items()}
+
+
+def stats_delta(before: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """Per-stage counts accumulated since the snapshot `before` (stages with no activity omitted)."""
+    out: Dict[str, Dict[str, int]] = {}
+    for stage, counts in stats_snapshot().items():
+        prev = before.get(stage, {})
+        diff = {k: v - prev.get(k, 0) for k, v in counts.items()}
+        if any(diff.values()):
+            out[stage] = diff
+    return out
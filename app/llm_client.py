@@ -1,7 +1,16 @@
+import asyncio
+import json
 import os
+import threading
+import time
 from typing import Any, Dict, List, Optional, Tuple
 from types import SimpleNamespace
 
+import llm_cache
+import llm_policy
+import llm_ratelimit
+from runtime import _log
+
 try:
     from google import genai
 except Exception:
@@ -173,40 +182,378 @@ def calculate_cost(model_name: str, usage_metadata: Any) -> float:
     return round(cost, 6)
 
 class LLMResponse:
-    def __init__(self, content: str, model_name: str, usage_metadata: Any = None):
+    def __init__(self, content: str, model_name: str, usage_metadata: Any = None, cached: bool = False):
         self.content = content
         self.model_name = model_name
         self.usage_metadata = usage_metadata
-        self.cost_usd = calculate_cost(model_name, usage_metadata)
+        self.cached = cached
+        # Set when the response came from, or was stored in, llm_cache.
+        self.cache_stage: Optional[str] = None
+        self.cache_key = ""
+        # A cache hit costs nothing; the original spend was logged on the miss.
+        self.cost_usd = 0.0 if cached else calculate_cost(model_name, usage_metadata)
 
-def generate_completion(
+def _usage_to_dict(usage: Any) -> Optional[Dict[str, int]]:
+    if not usage:
+        return None
+    return {
+        "prompt_token_count": int(getattr(usage, "prompt_token_count", 0) or 0),
+        "candidates_token_count": int(getattr(usage, "candidates_token_count", 0) or 0),
+    }
+
+# Concurrency.
+#
+# All Gemini traffic goes through one long-lived asyncio loop running on a daemon
+# thread, using the SDK's aio surface on the shared client, so every caller (the
+# stage graph, streaming LLM1, speculative openers, fleet workers) shares one
+# connection pool. A global semaphore bounds in-flight requests, with optional
+# tighter per-model limits:
+#   HINGE_LLM_MAX_CONCURRENCY=8
+#   HINGE_LLM_MODEL_CONCURRENCY="gemini-3.1-pro-preview=4,gemini-3-flash-preview=8"
+# HINGE_LLM_ASYNC=0 keeps the blocking client (same limits, enforced with thread semaphores).
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_THREAD: Optional[threading.Thread] = None
+_LOOP_LOCK = threading.Lock()
+_ASYNC_LIMITS: Dict[str, asyncio.Semaphore] = {}
+_SYNC_LIMITS: Dict[str, threading.BoundedSemaphore] = {}
+_SYNC_LIMITS_LOCK = threading.Lock()
+_GLOBAL_LIMIT_KEY = "*"
+
+
+def _async_enabled() -> bool:
+    return os.getenv("HINGE_LLM_ASYNC", "1") != "0"
+
+
+def _limit_for(name: str) -> int:
+    if name == _GLOBAL_LIMIT_KEY:
+        try:
+            return max(1, int(os.getenv("HINGE_LLM_MAX_CONCURRENCY", "8")))
+        except ValueError:
+            return 8
+    for item in (os.getenv("HINGE_LLM_MODEL_CONCURRENCY") or "").split(","):
+        model, _, n = item.partition("=")
+        if model.strip() == name:
+            try:
+                return max(1, int(n))
+            except ValueError:
+                break
+    return 0  # no per-model limit beyond the global one
+
+
+def _limit_keys(model: str) -> List[str]:
+    keys = [_GLOBAL_LIMIT_KEY]
+    if _limit_for(model):
+        keys.append(model)
+    return keys
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP, _LOOP_THREAD
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="llm-aio", daemon=True)
+            thread.start()
+            _LOOP, _LOOP_THREAD = loop, thread
+        return _LOOP
+
+
+def _run_sync(coro: Any) -> Any:
+    """Run a coroutine on the shared LLM loop from any (non-loop) thread and wait for it."""
+    loop = _get_loop()
+    if threading.current_thread() is _LOOP_THREAD:
+        coro.close()
+        raise RuntimeError("sync LLM shim called from the LLM event loop; await the async variant instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+class _AsyncLimits:
+    def __init__(self, model: str):
+        # Created lazily inside the loop so the semaphores belong to it.
+        self._sems = []
+        for k in _limit_keys(model):
+            if k not in _ASYNC_LIMITS:
+                _ASYNC_LIMITS[k] = asyncio.Semaphore(_limit_for(k))
+            self._sems.append(_ASYNC_LIMITS[k])
+
+    async def __aenter__(self):
+        for s in self._sems:
+            await s.acquire()
+
+    async def __aexit__(self, *exc):
+        for s in reversed(self._sems):
+            s.release()
+
+
+class _SyncLimits:
+    def __init__(self, model: str):
+        self._sems = []
+        with _SYNC_LIMITS_LOCK:
+            for k in _limit_keys(model):
+                if k not in _SYNC_LIMITS:
+                    _SYNC_LIMITS[k] = threading.BoundedSemaphore(_limit_for(k))
+                self._sems.append(_SYNC_LIMITS[k])
+
+    def __enter__(self):
+        for s in self._sems:
+            s.acquire()
+
+    def __exit__(self, *exc):
+        for s in reversed(self._sems):
+            s.release()
+
+
+def _prepare_request(
     model_type: str,
     messages: List[Dict[str, Any]],
-    response_format: Optional[Dict[str, Any]] = None,
-    **kwargs
-) -> LLMResponse:
+    response_format: Optional[Dict[str, Any]],
+    stage: Optional[str],
+    kwargs: Dict[str, Any],
+) -> Tuple[str, Dict[str, Any], str, Optional[LLMResponse]]:
+    """Resolve model + config and consult the cache. Returns (model, config, cache_key, cached_response)."""
+    if model_type == "large" and llm_ratelimit.should_downgrade(stage):
+        model_type = "small"
     model = get_large_model() if model_type == "large" else get_small_model()
-    client = get_gemini_client()
-    contents, system_instruction = _openai_messages_to_gemini(messages)
-    
+
     config: Dict[str, Any] = {}
-    if system_instruction:
-        config["system_instruction"] = system_instruction
     if isinstance(response_format, dict) and response_format.get("type") == "json_object":
         config["response_mime_type"] = "application/json"
-    
     for k in ("temperature", "top_p", "max_output_tokens"):
         if k in kwargs:
             config[k] = kwargs[k]
 
+    ttl_s = llm_cache.stage_ttl(stage)
+    key = ""
+    if ttl_s is not None:
+        key = llm_cache.cache_key(model, messages, config)
+        entry = llm_cache.lookup(stage, key, ttl_s)
+        if entry is not None:
+            usage = entry.get("usage")
+            hit = LLMResponse(
+                content=entry.get("content") or "",
+                model_name=entry.get("model_name") or model,
+                usage_metadata=SimpleNamespace(**usage) if usage else None,
+                cached=True,
+            )
+            hit.cache_stage, hit.cache_key = stage, key
+            return model, config, key, hit
+    return model, config, key, None
+
+
+def _request_args(model: str, messages: List[Dict[str, Any]], config: Dict[str, Any]) -> Dict[str, Any]:
+    contents, system_instruction = _openai_messages_to_gemini(messages)
+    config = dict(config)
+    if system_instruction:
+        config["system_instruction"] = system_instruction
+    args: Dict[str, Any] = {"model": model, "contents": contents}
     if config:
-        resp = client.models.generate_content(model=model, contents=contents, config=config)
-    else:
-        resp = client.models.generate_content(model=model, contents=contents)
-        
+        args["config"] = config
+    return args
+
+
+def _parses_as_json(text: str) -> bool:
+    clean = text.strip()
+    if clean.startswith("```json"):
+        clean = clean[7:]
+    elif clean.startswith("```"):
+        clean = clean[3:]
+    if clean.endswith("```"):
+        clean = clean[:-3]
+    try:
+        json.loads(clean.strip())
+    except ValueError:
+        return False
+    return True
+
+
+def discard_cached(resp: LLMResponse) -> None:
+    """Evict resp from llm_cache after the calling stage rejected its content."""
+    if resp.cache_key:
+        llm_cache.discard(resp.cache_stage or "", resp.cache_key)
+        resp.cache_key = ""
+
+
+def _finish_response(
+    resp: Any, model: str, config: Dict[str, Any], stage: Optional[str], key: str, est_tokens: int = 0
+) -> LLMResponse:
     text = _gemini_text_from_response(resp)
     
     # Optional usage info
     usage = getattr(resp, "usage_metadata", None)
-    
-    return LLMResponse(content=text, model_name=model, usage_metadata=usage)
+
+    out = LLMResponse(content=text, model_name=model, usage_metadata=usage)
+    # Never cache a JSON-mode reply that does not parse; the stage would fail on it for the whole TTL.
+    if key and text and (config.get("response_mime_type") != "application/json" or _parses_as_json(text)):
+        llm_cache.store(stage, key, {"content": text, "model_name": model, "usage": _usage_to_dict(usage)})
+        out.cache_stage, out.cache_key = stage, key
+    tokens = _usage_to_dict(usage) or {}
+    llm_ratelimit.record_usage(model, est_tokens, sum(tokens.values()), out.cost_usd)
+    return out
+
+
+async def generate_completion_async(
+    model_type: str,
+    messages: List[Dict[str, Any]],
+    response_format: Optional[Dict[str, Any]] = None,
+    stage: Optional[str] = None,
+    **kwargs
+) -> LLMResponse:
+    """Async generate_completion on the SDK's aio client, bounded by the global/per-model limits."""
+    # Cache lookup/store (with eviction walk) and payload conversion touch disk or copy
+    # image data; keep them off the shared loop so concurrent calls are not stalled.
+    model, config, key, cached = await asyncio.to_thread(
+        _prepare_request, model_type, messages, response_format, stage, kwargs
+    )
+    if cached is not None:
+        return cached
+    client = get_gemini_client()
+    args = await asyncio.to_thread(_request_args, model, messages, config)
+    est_tokens = llm_ratelimit.estimate_tokens(messages)
+
+    async def _acquire() -> float:
+        """Wait for the rate limiter; returns seconds spent queued. Runs outside any attempt deadline."""
+        t0 = time.monotonic()
+        while True:
+            # try_acquire takes a file lock and rewrites the shared state file.
+            wait_s = await asyncio.to_thread(llm_ratelimit.try_acquire, model, est_tokens)
+            if wait_s <= 0:
+                return time.monotonic() - t0
+            await asyncio.sleep(wait_s)
+
+    async def _may_hedge() -> bool:
+        # A hedge needs its own request token; skip it rather than queue inside the attempt.
+        return await asyncio.to_thread(llm_ratelimit.try_acquire, model, est_tokens) <= 0
+
+    async def _one_call() -> Any:
+        async with _AsyncLimits(model):
+            return await client.aio.models.generate_content(**args)
+
+    policy = llm_policy.stage_policy(stage)
+    if policy is None:
+        await _acquire()
+        resp = await _one_call()
+    else:
+        resp = await _call_with_policy(policy, _one_call, _acquire, _may_hedge)
+    return await asyncio.to_thread(_finish_response, resp, model, config, stage, key, est_tokens)
+
+
+async def _hedged(policy: "llm_policy.StagePolicy", call: Any, may_hedge: Any = None) -> Any:
+    """Run call(); if it outlives the stage's p95, race a duplicate and keep the first success."""
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    first = asyncio.ensure_future(call())
+    tasks = [first]
+    try:
+        hedge_after = policy.hedge_after_s()
+        if hedge_after is not None:
+            done, _ = await asyncio.wait({first}, timeout=hedge_after)
+            if not done and (may_hedge is None or await may_hedge()):
+                llm_policy.bump(policy.stage, "hedges")
+                _log(f"[LLM] {policy.stage} still running after {hedge_after:.1f}s (p95); sending hedged request")
+                tasks.append(asyncio.ensure_future(call()))
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if t.exception() is None:
+                    if t is not first:
+                        llm_policy.bump(policy.stage, "hedge_wins")
+                    llm_policy.record_latency(policy.stage, loop.time() - t0)
+                    return t.result()
+                error = t.exception()
+        raise error  # every request failed
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+
+
+async def _call_with_policy(
+    policy: "llm_policy.StagePolicy", call: Any, acquire: Any = None, may_hedge: Any = None
+) -> Any:
+    """
+    Deadline-aware retries (full-jitter backoff) around an optionally hedged call.
+    acquire() (the rate limiter) runs before each attempt; time spent queued there
+    does not count against the stage budget.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + policy.budget_s
+    llm_policy.bump(policy.stage, "calls")
+    attempt = 0
+    while True:
+        attempt += 1
+        if acquire is not None:
+            deadline += await acquire()
+        remaining = deadline - loop.time()
+        try:
+            return await asyncio.wait_for(
+                _hedged(policy, call, may_hedge), timeout=policy.attempt_timeout(attempt, remaining)
+            )
+        except asyncio.TimeoutError:
+            llm_policy.bump(policy.stage, "timeouts")
+            error: BaseException = TimeoutError(f"{policy.stage} attempt {attempt} timed out")
+        except Exception as e:
+            error = e
+        if attempt >= policy.max_attempts or not llm_policy.is_transient(error):
+            raise error
+        wait_s = policy.backoff_s(attempt)
+        if loop.time() + wait_s >= deadline - 1.0:
+            raise TimeoutError(f"{policy.stage} exceeded its {policy.budget_s:.0f}s budget: {error}")
+        llm_policy.bump(policy.stage, "retries")
+        _log(f"[LLM] {policy.stage} transient error ({error}); retry {attempt + 1}/{policy.max_attempts} in {wait_s:.1f}s")
+        await asyncio.sleep(wait_s)
+
+
+def generate_completion(
+    model_type: str,
+    messages: List[Dict[str, Any]],
+    response_format: Optional[Dict[str, Any]] = None,
+    stage: Optional[str] = None,
+    **kwargs
+) -> LLMResponse:
+    """
+    Blocking entry point used by every run_llm* stage.
+    stage names the calling stage (e.g. "llm1_visual"). Identical requests from
+    stages opted in via HINGE_LLM_CACHE_STAGES are served from llm_cache, and
+    stages with a latency budget get deadline-aware retries and hedging.
+    """
+    client = get_gemini_client()
+    if _async_enabled() and getattr(client, "aio", None) is not None:
+        return _run_sync(generate_completion_async(model_type, messages, response_format, stage, **kwargs))
+
+    model, config, key, cached = _prepare_request(model_type, messages, response_format, stage, kwargs)
+    if cached is not None:
+        return cached
+    args = _request_args(model, messages, config)
+    est_tokens = llm_ratelimit.estimate_tokens(messages)
+    policy = llm_policy.stage_policy(stage)
+    if policy is None:
+        llm_ratelimit.acquire(model, est_tokens)
+        with _SyncLimits(model):
+            resp = client.models.generate_content(**args)
+        return _finish_response(resp, model, config, stage, key, est_tokens)
+
+    # Blocking client: retries within the budget, but no per-attempt timeout or hedging.
+    deadline = time.monotonic() + policy.budget_s
+    llm_policy.bump(policy.stage, "calls")
+    attempt = 0
+    while True:
+        attempt += 1
+        t0 = time.monotonic()
+        try:
+            llm_ratelimit.acquire(model, est_tokens)
+            with _SyncLimits(model):
+                resp = client.models.generate_content(**args)
+            llm_policy.record_latency(policy.stage, time.monotonic() - t0)
+            return _finish_response(resp, model, config, stage, key, est_tokens)
+        except Exception as e:
+            if attempt >= policy.max_attempts or not llm_policy.is_transient(e):
+                raise
+            wait_s = policy.backoff_s(attempt)
+            if time.monotonic() + wait_s >= deadline - 1.0:
+                raise
+            llm_policy.bump(policy.stage, "retries")
+            _log(f"[LLM] {policy.stage} transient error ({e}); retry {attempt + 1}/{policy.max_attempts} in {wait_s:.1f}s")
+            time.sleep(wait_s)
@@ -0,0 +1,145 @@
+import os
+import random
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+# Latency policy for the large-model stages.
+#
+# A stage with a budget gets:
+#   - a total deadline (seconds) covering every attempt,
+#   - jittered exponential-backoff retries on transient errors (429/5xx/timeouts/
+#     dropped connections) while the deadline still leaves room,
+#   - optionally a hedged duplicate request once the first one has been running
+#     longer than the stage's observed p95 latency; the first answer wins.
+#
+# HINGE_LLM_DEADLINES="llm3_long=120,llm5_safety=60"  per-stage budgets (merged over defaults)
+# HINGE_LLM_RETRIES=3                                 max attempts per call
+# HINGE_LLM_HEDGE=1                                   enable hedged requests
+
+_DEFAULT_BUDGETS_S = {
+    "llm3_long": 120.0,
+    "llm3_short": 120.0,
+    "llm4_long": 120.0,
+    "llm4_short": 120.0,
+    "llm5_safety": 60.0,
+}
+_TRANSIENT_CODES = {408, 429, 500, 502, 503, 504}
+_TRANSIENT_MARKERS = ("RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL", "timed out", "Connection reset")
+_HEDGE_MIN_SAMPLES = 8
+_HEDGE_FLOOR_S = 5.0
+# A non-final attempt is cut off at this multiple of the stage's p95, never below the floor.
+_ATTEMPT_P95_MULT = 3.0
+_ATTEMPT_FLOOR_S = 20.0
+
+_LOCK = threading.Lock()
+_LATENCIES: Dict[str, Deque[float]] = {}
+_STATS: Dict[str, Dict[str, int]] = {}
+
+
+class StagePolicy:
+    def __init__(self, stage: str, budget_s: float, max_attempts: int, hedge: bool):
+        self.stage = stage
+        self.budget_s = budget_s
+        self.max_attempts = max_attempts
+        self.hedge = hedge
+
+    def attempt_timeout(self, attempt: int, remaining_s: float) -> float:
+        """
+        Earlier attempts are cut off once they run well past the observed p95 (a hung
+        request), leaving budget for a retry. Until there are enough samples, and on the
+        last attempt, a call may use everything left so slow-but-healthy calls finish.
+        """
+        p95 = latency_p95(self.stage)
+        if attempt >= self.max_attempts or p95 is None:
+            return remaining_s
+        return min(remaining_s, max(_ATTEMPT_FLOOR_S, _ATTEMPT_P95_MULT * p95))
+
+    def backoff_s(self, attempt: int) -> float:
+        # Full jitter: uniform over [0, min(cap, base * 2^n)].
+        return random.uniform(0.0, min(8.0, 1.0 * (2 ** (attempt - 1))))
+
+    def hedge_after_s(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        p95 = latency_p95(self.stage)
+        if p95 is None:
+            return None
+        return max(_HEDGE_FLOOR_S, p95)
+
+
+def _budgets() -> Dict[str, float]:
+    budgets = dict(_DEFAULT_BUDGETS_S)
+    for item in (os.getenv("HINGE_LLM_DEADLINES") or "").split(","):
+        name, _, val = item.partition("=")
+        if not name.strip():
+            continue
+        try:
+            budgets[name.strip()] = float(val)
+        except ValueError:
+            continue
+    return budgets
+
+
+def stage_policy(stage: Optional[str]) -> Optional[StagePolicy]:
+    if not stage:
+        return None
+    budget = _budgets().get(stage)
+    if not budget or budget <= 0:
+        return None
+    try:
+        attempts = max(1, int(os.getenv("HINGE_LLM_RETRIES", "3")))
+    except ValueError:
+        attempts = 3
+    return StagePolicy(stage, budget, attempts, os.getenv("HINGE_LLM_HEDGE", "0") == "1")
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    for attr in ("code", "status_code", "status"):
+        code = getattr(error, attr, None)
+        if isinstance(code, int) and code in _TRANSIENT_CODES:
+            return True
+    text = str(error)
+    return any(m in text for m in _TRANSIENT_MARKERS)
+
+
+def record_latency(stage: str, seconds: float) -> None:
+    with _LOCK:
+        _LATENCIES.setdefault(stage, deque(maxlen=50)).append(seconds)
+
+
+def latency_p95(stage: str) -> Optional[float]:
+    with _LOCK:
+        samples = sorted(_LATENCIES.get(stage) or ())
+    if len(samples) < _HEDGE_MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+
+
+def bump(stage: str, field: str) -> None:
+    with _LOCK:
+        counts = _STATS.setdefault(stage, {"calls": 0, "retries": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0})
+        counts[field] = counts.get(field, 0) + 1
+
+
+def stats_snapshot() -> Dict[str, Dict[str, Any]]:
+    with _LOCK:
+        out: Dict[str, Dict[str, Any]] = {k: dict(v) for k, v in _STATS.items()}
+    for stage, counts in out.items():
+        p95 = latency_p95(stage)
+        if p95 is not None:
+            counts["p95_s"] = round(p95, 2)
+    return out
+
+
+def stats_delta(before: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Counts accumulated since `before`; p95_s is reported as current."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for stage, counts in stats_snapshot().items():
+        prev = before.get(stage, {})
+        diff = {k: (v if k == "p95_s" else v - prev.get(k, 0)) for k, v in counts.items()}
+        if any(v for k, v in diff.items() if k != "p95_s"):
+            out[stage] = diff
+    return out
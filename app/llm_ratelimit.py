@@ -0,0 +1,296 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from runtime import _log
+
+# Request/token rate limiting and spend governor for LLM calls.
+#
+# Each model gets two token buckets, requests-per-minute and tokens-per-minute.
+# A call that would overdraw either bucket is told how long to wait, and the
+# caller sleeps and asks again, so bursts are smoothed out rather than rejected.
+# Token usage is estimated up front and corrected with the real usage_metadata
+# afterwards.
+#
+# A spend ceiling (USD per rolling hour) sits on top:
+#   - past HINGE_LLM_DOWNGRADE_AT (fraction of the ceiling, default 0.8), optional
+#     stages are moved to the small model;
+#   - at the ceiling, calls queue until older spend rolls out of the window.
+#
+# The state lives in one JSON file guarded by an OS file lock, so several
+# processes (e.g. parallel runs on different phones) share the same budget.
+#
+# HINGE_LLM_RPM="gemini-3.1-pro-preview=60,*=120"  requests/min per model (* = any other)
+# HINGE_LLM_TPM="*=1000000"                         tokens/min per model
+# HINGE_LLM_SPEND_PER_HOUR_USD=5                    spend ceiling
+# HINGE_LLM_OPTIONAL_STAGES=llm3_5_critique,...     stages that may be downgraded
+# HINGE_LLM_RATE_STATE=path.json                    shared state file
+
+_DEFAULT_OPTIONAL_STAGES = "llm3_5_critique,llm4_5_critique,llm_dupe_detect,llm1_aggregate"
+_SPEND_WINDOW_S = 3600.0
+_MAX_WAIT_STEP_S = 30.0
+_CHARS_PER_TOKEN = 4
+_TOKENS_PER_IMAGE = 260
+
+_LOCK = threading.Lock()
+_STATS: Dict[str, float] = {"waits": 0, "waited_s": 0.0, "downgrades": 0, "ceiling_waits": 0}
+_CEILING_LOGGED = [False]
+
+
+def _parse_limits(env: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for item in (os.getenv(env) or "").split(","):
+        name, _, val = item.partition("=")
+        if not name.strip():
+            continue
+        try:
+            out[name.strip()] = float(val)
+        except ValueError:
+            continue
+    return out
+
+
+def _limit(env: str, model: str) -> Optional[float]:
+    limits = _parse_limits(env)
+    val = limits.get(model, limits.get("*"))
+    return val if val and val > 0 else None
+
+
+def _ceiling_usd() -> Optional[float]:
+    try:
+        val = float(os.getenv("HINGE_LLM_SPEND_PER_HOUR_USD", "0") or 0)
+    except ValueError:
+        return None
+    return val if val > 0 else None
+
+
+def _active() -> bool:
+    return bool(_parse_limits("HINGE_LLM_RPM") or _parse_limits("HINGE_LLM_TPM") or _ceiling_usd())
+
+
+def _state_path() -> str:
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "llm_rate_state.json")
+    return os.getenv("HINGE_LLM_RATE_STATE") or default
+
+
+class _FileLock:
+    """Exclusive OS-level lock on a sidecar file (fcntl on POSIX, msvcrt on Windows)."""
+
+    def __init__(self, path: str):
+        self.path = path + ".lock"
+        self._fh = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._fh = open(self.path, "a+b")
+        if os.name == "nt":
+            import msvcrt
+
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+
+
+def _load(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if isinstance(state, dict):
+            return state
+    except (FileNotFoundError, ValueError):
+        pass
+    return {"buckets": {}, "spend": []}
+
+
+def _save(path: str, state: Dict[str, Any]) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _locked_update(fn):
+    """Run fn(state, now) under the thread + file lock and persist the state."""
+    path = _state_path()
+    with _LOCK, _FileLock(path):
+        state = _load(path)
+        now = time.time()
+        result = fn(state, now)
+        _save(path, state)
+    return result
+
+
+def _window_spend(state: Dict[str, Any], now: float) -> float:
+    spend = [e for e in state.get("spend", []) if now - e[0] < _SPEND_WINDOW_S]
+    state["spend"] = spend
+    return sum(e[1] for e in spend)
+
+
+def _refill(bucket: Dict[str, float], key: str, capacity: float, now: float) -> float:
+    last = bucket.get("ts", now)
+    level = bucket.get(key, capacity)
+    return min(capacity, level + (now - last) * capacity / 60.0)
+
+
+def estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    chars = 0
+    images = 0
+    for msg in messages or []:
+        content = msg.get("content", "") if isinstance(msg, dict) else ""
+        if isinstance(content, str):
+            chars += len(content)
+            continue
+        for part in content or []:
+            if not isinstance(part, dict):
+                continue
+            if part.get("type") == "text":
+                chars += len(str(part.get("text") or ""))
+            elif part.get("type") == "image_url":
+                images += 1
+    return chars // _CHARS_PER_TOKEN + images * _TOKENS_PER_IMAGE
+
+
+def should_downgrade(stage: Optional[str]) -> bool:
+    """True if stage is optional and the rolling spend is past the downgrade threshold."""
+    ceiling = _ceiling_usd()
+    if not stage or not ceiling:
+        return False
+    optional = {s.strip() for s in (os.getenv("HINGE_LLM_OPTIONAL_STAGES", _DEFAULT_OPTIONAL_STAGES) or "").split(",")}
+    if stage not in optional:
+        return False
+    try:
+        frac = float(os.getenv("HINGE_LLM_DOWNGRADE_AT", "0.8"))
+    except ValueError:
+        frac = 0.8
+    spent = _locked_update(_window_spend)
+    if spent < ceiling * frac:
+        return False
+    with _LOCK:
+        _STATS["downgrades"] += 1
+    _log(f"[LLM_LIMIT] ${spent:.2f}/h of ${ceiling:.2f}/h spent; running {stage} on the small model")
+    return True
+
+
+def try_acquire(model: str, est_tokens: int) -> float:
+    """Take one request + est_tokens for model. Returns 0 on success, else seconds to wait before retrying."""
+    if not _active():
+        return 0.0
+    rpm = _limit("HINGE_LLM_RPM", model)
+    tpm = _limit("HINGE_LLM_TPM", model)
+    ceiling = _ceiling_usd()
+
+    def _take(state: Dict[str, Any], now: float) -> Tuple[float, bool]:
+        if ceiling:
+            spent = _window_spend(state, now)
+            spend = sorted(state["spend"])
+            if spent >= ceiling:
+                # Wait until enough old spend has left the window.
+                excess = spent - ceiling
+                for ts, cost in spend:
+                    excess -= cost
+                    if excess < 0:
+                        return max(0.5, ts + _SPEND_WINDOW_S - now), True
+                return _MAX_WAIT_STEP_S, True
+        bucket = state.setdefault("buckets", {}).setdefault(model, {})
+        req_level = _refill(bucket, "req", rpm, now) if rpm else 0.0
+        tok_level = _refill(bucket, "tok", tpm, now) if tpm else 0.0
+        need_tok = min(float(est_tokens), tpm) if tpm else 0.0
+        wait = 0.0
+        if rpm and req_level < 1.0:
+            wait = max(wait, (1.0 - req_level) * 60.0 / rpm)
+        if tpm and tok_level < need_tok:
+            wait = max(wait, (need_tok - tok_level) * 60.0 / tpm)
+        if wait > 0:
+            return wait, False
+        if rpm:
+            bucket["req"] = req_level - 1.0
+        if tpm:
+            bucket["tok"] = tok_level - need_tok
+        bucket["ts"] = now
+        return 0.0, False
+
+    wait, ceiling_hit = _locked_update(_take)
+    if wait > 0:
+        with _LOCK:
+            _STATS["waits"] += 1
+            _STATS["waited_s"] += min(wait, _MAX_WAIT_STEP_S)
+            if ceiling_hit:
+                _STATS["ceiling_waits"] += 1
+        if ceiling_hit and not _CEILING_LOGGED[0]:
+            _CEILING_LOGGED[0] = True
+            _log(f"[LLM_LIMIT] spend ceiling ${ceiling:.2f}/h reached; queueing calls")
+    elif _CEILING_LOGGED[0]:
+        _CEILING_LOGGED[0] = False
+    return min(wait, _MAX_WAIT_STEP_S)
+
+
+def acquire(model: str, est_tokens: int) -> None:
+    """Blocking acquire (sync client path)."""
+    while True:
+        wait = try_acquire(model, est_tokens)
+        if wait <= 0:
+            return
+        time.sleep(wait)
+
+
+def record_usage(model: str, est_tokens: int, actual_tokens: int, cost_usd: float) -> None:
+    """Correct the token bucket with real usage and add the call's cost to the spend window."""
+    if not _active():
+        return
+    rpm = _limit("HINGE_LLM_RPM", model)
+    tpm = _limit("HINGE_LLM_TPM", model)
+    ceiling = _ceiling_usd()
+
+    def _record(state: Dict[str, Any], now: float) -> None:
+        if tpm and actual_tokens:
+            bucket = state.setdefault("buckets", {}).setdefault(model, {})
+            level = _refill(bucket, "tok", tpm, now)
+            bucket["tok"] = level - (actual_tokens - min(float(est_tokens), tpm))
+            # Both buckets share ts, so the request bucket must bank its refill too.
+            if rpm:
+                bucket["req"] = _refill(bucket, "req", rpm, now)
+            bucket["ts"] = now
+        if ceiling and cost_usd:
+            state.setdefault("spend", []).append([now, float(cost_usd)])
+
+    _locked_update(_record)
+
+
+def stats_snapshot() -> Dict[str, Any]:
+    with _LOCK:
+        return dict(_STATS)
+
+
+def stats_delta(before: Dict[str, Any]) -> Dict[str, Any]:
+    """Limiter activity since `before` plus the current shared spend window."""
+    if not _active():
+        return {}
+    now = stats_snapshot()
+    out: Dict[str, Any] = {k: round(v - before.get(k, 0), 2) for k, v in now.items()}
+    ceiling = _ceiling_usd()
+    if ceiling:
+        out["ceiling_usd_per_hour"] = ceiling
+        out["spend_last_hour_usd"] = round(_locked_update(_window_spend), 4)
+    out["rpm"] = _parse_limits("HINGE_LLM_RPM")
+    out["tpm"] = _parse_limits("HINGE_LLM_TPM")
+    return out
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 
-import sqlite3
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
+import storage
 from sqlite_store import get_db_path, init_db, update_profile_match
 
 
@@ -94,48 +94,28 @@ def _fetch_candidates(
     height_cm: Optional[int],
     limit: int = 30,
 ) -> List[Dict[str, Any]]:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        where = [
-            "UPPER(COALESCE(verdict, '')) IN (?,?,?)",
-            "Name LIKE ? COLLATE NOCASE",
-        ]
-        params: List[Any] = [*LIKED_VERDICTS, f"%{name}%"]
-        if age is not None:
-            where.append("Age = ?")
-            params.append(int(age))
-        if height_cm is not None:
-            where.append("Height_cm = ?")
-            params.append(int(height_cm))
-
-        sql = (
-            "SELECT id, Name, Age, Height_cm, timestamp, verdict, "
-            "COALESCE(matched, 0) AS matched, COALESCE(match_time, '') AS match_time "
-            "FROM profiles "
-            f"WHERE {' AND '.join(where)} "
-            "ORDER BY timestamp DESC "
-            "LIMIT ?"
-        )
-        params.append(int(limit))
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-        return [
-            {
-                "id": r[0],
-                "name": r[1],
-                "age": r[2],
-                "height_cm": r[3],
-                "timestamp": r[4],
-                "verdict": r[5],
-                "matched": r[6],
-                "match_time": r[7],
-            }
-            for r in rows
-        ]
-    finally:
-        con.close()
+    where = [
+        "verdict IN (?,?,?)",  # stored upper-case; sargable for idx_profiles_liked
+        "Name LIKE ? COLLATE NOCASE",
+    ]
+    params: List[Any] = [*LIKED_VERDICTS, f"%{name}%"]
+    if age is not None:
+        where.append("Age = ?")
+        params.append(int(age))
+    if height_cm is not None:
+        where.append("Height_cm = ?")
+        params.append(int(height_cm))
+
+    sql = (
+        "SELECT id, Name AS name, Age AS age, Height_cm AS height_cm, timestamp, verdict, "
+        "COALESCE(matched, 0) AS matched, COALESCE(match_time, '') AS match_time "
+        "FROM profiles "
+        f"WHERE {' AND '.join(where)} "
+        "ORDER BY timestamp DESC "
+        "LIMIT ?"
+    )
+    params.append(int(limit))
+    return [dict(r) for r in storage.query(sql, params, db_path=get_db_path())]
 
 
 def _print_candidates(rows: List[Dict[str, Any]]) -> None:
@@ -1,7 +1,7 @@
-import sqlite3
 import os
 import csv
 from datetime import datetime
+import storage
 from sqlite_store import get_db_path
 
 def collect_manual_rating() -> float:
@@ -26,10 +26,8 @@ def collect_manual_rating() -> float:
 def update_dan_rating(profile_id: int, rating: float):
     # Use the same DB path as the rest of the app
     db_path = get_db_path() 
-    with sqlite3.connect(db_path) as con:
-        con.execute("UPDATE profiles SET dan_rating = ? WHERE id = ?", (rating, profile_id))
-        con.commit()
-        print(f"[DB] Saved dan_rating: {rating} to ID: {profile_id}")
+    storage.execute("UPDATE profiles SET dan_rating = ? WHERE id = ?", (rating, profile_id), db_path=db_path)
+    print(f"[DB] Saved dan_rating: {rating} to ID: {profile_id}")
 
 def log_eval_metrics(pid, name, age, manual_score, ml_score, llm_tier, llm_long, llm_short):
     csv_path = os.path.join(os.path.dirname(get_db_path()), "scoring_eval.csv")
@@ -0,0 +1,267 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import storage
+from runtime import _log
+from sqlite_store import _serialized_write, get_db_path
+
+# Conversation events for matched profiles.
+#
+# Every chat message and milestone is one row in `events` (profile_id, kind, ts,
+# text), indexed on (profile_id, ts). Logging an event is an INSERT plus a
+# refresh of the profile's last_activity/status from the newest message and the
+# newest milestone. Each of those is an index seek, so the cost no longer
+# grows with the length of the conversation. Previously every event decoded,
+# re-sorted and rewrote the whole chat_log/milestones JSON blobs.
+#
+# kind is the old blob "event" value: message_sent / message_received for chat,
+# handle_matches.EVENT_TYPES keys for milestones. Readers that still want the
+# old list shape get [{"event", "timestamp", "description"}] from chat_log() /
+# milestones().
+#
+# The schema component migrates the legacy blobs once: profiles that have blob
+# entries but no events rows are copied over in blob order. The blob columns
+# are left in place but no longer written.
+#
+# Status is maintained incrementally. Triggers put a profile in status_dirty
+# whenever an event is inserted for it or its matched/match_time changes;
+# only those rows are recomputed. The one time-based transition (my_turn /
+# her_turn -> stale once the newest event, or the match if later, is
+# STALE_AFTER_S old) is a single UPDATE over idx_profiles_match_status.
+# sync_statuses() does both, so menu entry costs the same however long the
+# match history is.
+
+CHAT_KINDS = ("message_sent", "message_received")
+_CHAT_IN = "('message_sent', 'message_received')"
+ENDED_KINDS = ("unmatched_by_her", "unmatched_by_me", "ended")
+STALE_AFTER_S = 14 * 86400
+
+# Per-profile counts for list views (use inside a SELECT ... FROM profiles).
+COUNT_COLUMNS = (
+    f"(SELECT COUNT(*) FROM events e WHERE e.profile_id = profiles.id AND e.kind IN {_CHAT_IN}) AS message_count, "
+    f"(SELECT COUNT(*) FROM events e WHERE e.profile_id = profiles.id AND e.kind NOT IN {_CHAT_IN}) AS milestone_count"
+)
+HAS_MESSAGES = f"EXISTS (SELECT 1 FROM events e WHERE e.profile_id = profiles.id AND e.kind IN {_CHAT_IN})"
+HAS_EVENTS = "EXISTS (SELECT 1 FROM events e WHERE e.profile_id = profiles.id)"
+
+
+def _apply_schema(con: sqlite3.Connection) -> None:
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            profile_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            ts TEXT NOT NULL,
+            text TEXT NOT NULL DEFAULT ''
+        );
+        """
+    )
+    # kind trails so per-profile chat/milestone lookups and counts stay in the index.
+    con.execute("CREATE INDEX IF NOT EXISTS idx_events_profile_ts ON events(profile_id, ts, kind);")
+    # Dedup of captured messages looks texts up directly instead of reading the whole chat.
+    con.execute("CREATE INDEX IF NOT EXISTS idx_events_profile_text ON events(profile_id, text);")
+    _migrate_blobs(con)
+    con.execute("CREATE TABLE IF NOT EXISTS status_dirty (profile_id INTEGER PRIMARY KEY);")
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_events_status_dirty AFTER INSERT ON events
+        BEGIN INSERT OR IGNORE INTO status_dirty (profile_id) VALUES (NEW.profile_id); END;
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_profiles_status_dirty AFTER UPDATE OF matched, match_time ON profiles
+        WHEN NEW.matched = 1
+        BEGIN INSERT OR IGNORE INTO status_dirty (profile_id) VALUES (NEW.id); END;
+        """
+    )
+    # Recompute every match once so stored statuses follow the current rules.
+    con.execute("INSERT OR IGNORE INTO status_dirty (profile_id) SELECT id FROM profiles WHERE matched = 1;")
+
+
+def _blob_items(blob: Optional[str]) -> List[Dict[str, Any]]:
+    try:
+        items = json.loads(blob) if blob else []
+    except ValueError:
+        return []
+    return [i for i in items if isinstance(i, dict) and i.get("event") and i.get("timestamp")] if isinstance(items, list) else []
+
+
+def _migrate_blobs(con: sqlite3.Connection) -> None:
+    rows = con.execute(
+        """
+        SELECT id, chat_log, milestones FROM profiles
+        WHERE (COALESCE(chat_log, '') NOT IN ('', '[]') OR COALESCE(milestones, '') NOT IN ('', '[]'))
+        AND NOT EXISTS (SELECT 1 FROM events e WHERE e.profile_id = profiles.id)
+        """
+    ).fetchall()
+    batch = []
+    for r in rows:
+        for item in _blob_items(r["chat_log"]) + _blob_items(r["milestones"]):
+            batch.append((r["id"], item["event"], item["timestamp"], item.get("description") or ""))
+    if batch:
+        con.executemany("INSERT INTO events (profile_id, kind, ts, text) VALUES (?, ?, ?, ?);", batch)
+        con.commit()
+        _log(f"[EVENTS] migrated {len(batch)} chat/milestone entries from {len(rows)} profiles")
+
+
+storage.register_schema("events", 3, _apply_schema)
+
+
+def _as_entry(row: sqlite3.Row) -> Dict[str, Any]:
+    return {"event": row["kind"], "timestamp": row["ts"], "description": row["text"]}
+
+
+def calculate_status(
+    chat_log: List[Dict[str, Any]], milestones: List[Dict[str, Any]], match_time: Optional[str] = None
+) -> str:
+    """Status from a profile's messages and milestones (only the newest of each matters)."""
+    if milestones:
+        # Sort milestones chronologically in case they are out of order
+        last_milestone = sorted(milestones, key=lambda x: x["timestamp"])[-1]
+        m_type = last_milestone.get("event")
+        if m_type in ENDED_KINDS:
+            return "ended"
+        if m_type == "moved_off_hinge":
+            return "moved_off_hinge"
+        if m_type == "stale":
+            return "stale"
+
+    if chat_log:
+        last_msg = sorted(chat_log, key=lambda x: x["timestamp"])[-1]
+        # Organically stale once 14 days pass after the last message (or the match, if later)
+        effective_ts = last_msg["timestamp"]
+        if match_time and match_time > effective_ts:
+            effective_ts = match_time
+        try:
+            last_dt = datetime.fromisoformat(effective_ts.replace("Z", "+00:00"))
+            if (datetime.now().timestamp() - last_dt.timestamp()) > STALE_AFTER_S:
+                return "stale"
+        except Exception:
+            pass
+        return "her_turn" if last_msg.get("event") == "message_sent" else "my_turn"
+
+    return "active"
+
+
+def _latest(con: sqlite3.Connection, profile_id: int, chat: bool) -> Optional[Dict[str, Any]]:
+    op = "IN" if chat else "NOT IN"
+    row = con.execute(
+        f"SELECT kind, ts, text FROM events WHERE profile_id = ? AND kind {op} {_CHAT_IN} ORDER BY ts DESC, id DESC LIMIT 1",
+        (profile_id,),
+    ).fetchone()
+    return _as_entry(row) if row else None
+
+
+def _refresh_profile(con: sqlite3.Connection, profile_id: int) -> Tuple[Optional[str], str]:
+    """Recompute last_activity/status from the newest events; returns them."""
+    prof = con.execute("SELECT match_time FROM profiles WHERE id = ?", (profile_id,)).fetchone()
+    last_act = con.execute("SELECT MAX(ts) FROM events WHERE profile_id = ?", (profile_id,)).fetchone()[0]
+    last_chat = _latest(con, profile_id, chat=True)
+    last_milestone = _latest(con, profile_id, chat=False)
+    # Staleness counts from the newest event of any kind, matching the UPDATE in _mark_stale.
+    since = max(filter(None, [prof["match_time"] if prof else None, last_act]), default=None)
+    status = calculate_status([last_chat] if last_chat else [], [last_milestone] if last_milestone else [], since)
+    con.execute("UPDATE profiles SET last_activity = ?, status = ? WHERE id = ?", (last_act, status, profile_id))
+    return last_act, status
+
+
+def _refresh_dirty(con: sqlite3.Connection) -> int:
+    changed = 0
+    for (pid,) in con.execute("SELECT profile_id FROM status_dirty;").fetchall():
+        row = con.execute("SELECT status FROM profiles WHERE id = ?", (pid,)).fetchone()
+        if row is not None:
+            _, status = _refresh_profile(con, pid)
+            changed += int(row["status"] != status)
+    con.execute("DELETE FROM status_dirty;")
+    return changed
+
+
+def stale_cutoff() -> str:
+    return (datetime.now() - timedelta(seconds=STALE_AFTER_S)).isoformat(timespec="seconds")
+
+
+def _mark_stale(con: sqlite3.Connection) -> int:
+    cutoff = stale_cutoff()
+    cur = con.execute(
+        """
+        UPDATE profiles SET status = 'stale'
+        WHERE matched = 1 AND status IN ('my_turn', 'her_turn') AND last_activity < ?
+        AND COALESCE(match_time, '') < ?
+        """,
+        (cutoff, cutoff),
+    )
+    return cur.rowcount
+
+
+@_serialized_write
+def append_events(profile_id: int, entries: Iterable[Dict[str, Any]], db_path: Optional[str] = None) -> int:
+    """Insert {"event", "timestamp", "description"} entries and refresh the profile's status. Returns rows added."""
+    rows = [
+        (int(profile_id), e["event"], e["timestamp"], e.get("description") or "")
+        for e in entries or []
+    ]
+    if not rows:
+        return 0
+    with storage.transaction(db_path or get_db_path()) as con:
+        con.executemany("INSERT INTO events (profile_id, kind, ts, text) VALUES (?, ?, ?, ?);", rows)
+        _refresh_dirty(con)
+    return len(rows)
+
+
+@_serialized_write
+def sync_statuses(db_path: Optional[str] = None) -> int:
+    """Recompute dirty profiles and apply due stale transitions; returns how many statuses changed."""
+    with storage.transaction(db_path or get_db_path()) as con:
+        return _refresh_dirty(con) + _mark_stale(con)
+
+
+def _entries(profile_id: int, chat: bool, db_path: Optional[str]) -> List[Dict[str, Any]]:
+    op = "IN" if chat else "NOT IN"
+    rows = storage.query(
+        f"SELECT kind, ts, text FROM events WHERE profile_id = ? AND kind {op} {_CHAT_IN} ORDER BY ts, id",
+        (int(profile_id),),
+        db_path=db_path or get_db_path(),
+    )
+    return [_as_entry(r) for r in rows]
+
+
+def chat_log(profile_id: int, db_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Messages in time order, in the legacy blob shape."""
+    return _entries(profile_id, True, db_path)
+
+
+def milestones(profile_id: int, db_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    return _entries(profile_id, False, db_path)
+
+
+def last_message(profile_id: int, db_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    return _latest(storage.connection(db_path or get_db_path()), int(profile_id), chat=True)
+
+
+def existing_texts(profile_id: int, texts: Iterable[str], db_path: Optional[str] = None) -> Set[str]:
+    """The subset of texts already logged as messages for the profile (index seeks per text)."""
+    wanted = list({t for t in texts if t is not None})
+    found: Set[str] = set()
+    for i in range(0, len(wanted), 500):
+        chunk = wanted[i : i + 500]
+        rows = storage.query(
+            f"SELECT DISTINCT text FROM events WHERE profile_id = ? AND text IN ({','.join('?' * len(chunk))}) "
+            f"AND kind IN {_CHAT_IN}",
+            (int(profile_id), *chunk),
+            db_path=db_path or get_db_path(),
+        )
+        found.update(r["text"] for r in rows)
+    return found
+
+
+def has_kind(profile_id: int, kind: str, db_path: Optional[str] = None) -> bool:
+    row = storage.query_one(
+        "SELECT 1 FROM events WHERE profile_id = ? AND kind = ? LIMIT 1",
+        (int(profile_id), kind),
+        db_path=db_path or get_db_path(),
+    )
+    return row is not None
@@ -1,19 +1,19 @@
 #!/usr/bin/env python3
 
-import sqlite3
 import time
-import json
 import sys
 import os
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 from helper_functions import connect_device, ensure_adb_running, tap, swipe, get_screen_resolution
+import match_events
+import storage
 from sqlite_store import get_db_path, init_db, update_profile_match
 from ui_scan import _dump_ui_xml, _parse_ui_nodes, _bounds_center, _parse_bounds, _extract_biometrics_from_nodes
 from handle_matches import (
     _automated_chat_capture, 
-    _update_profile_data, 
+    _append_messages,
     _log_milestone,
     _fetch_matched_profiles_with_no_events,
     _fetch_active_profiles,
@@ -25,7 +25,7 @@ from handle_matches import (
     _show_event_log,
     _find_profile_by_name,
     _select_profile,
-    _recalculate_all_statuses,
+    _sync_statuses,
     _print_profiles,
     EVENT_TYPES
 )
@@ -207,22 +207,12 @@ def _extract_profiles_from_list(xml: str) -> List[Dict[str, Any]]:
 # -------------------------------------------------------------------------
 
 def _get_db_profiles_active_by_name(name: str) -> List[Dict[str, Any]]:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cur.execute("""
-        SELECT id, Name, chat_log, milestones, status, timestamp, opening_pick_text
+    rows = storage.query("""
+        SELECT id, Name AS name, status, timestamp, opening_pick_text
         FROM profiles 
         WHERE matched = 1 AND Name = ? AND status IN ('my_turn', 'her_turn', 'active')
-    """, (name,))
-    rows = cur.fetchall()
-    con.close()
-    return [
-        {
-            "id": r[0], "name": r[1], "chat_log": r[2], 
-            "milestones": r[3], "status": r[4], "timestamp": r[5], "opening_pick_text": r[6]
-        } for r in rows
-    ]
+    """, (name,), db_path=get_db_path())
+    return [{**dict(r), "last_message": match_events.last_message(r["id"])} for r in rows]
 
 def _disambiguate_profile(profiles: List[Dict[str, Any]], ui_preview: str) -> Optional[Dict[str, Any]]:
     if not profiles:
@@ -232,11 +222,11 @@ def _disambiguate_profile(profiles: List[Dict[str, Any]], ui_preview: str) -> Op
         
     ui_clean = ui_preview.replace('\n', ' ')
     
-    # Try to find the exact match via chat_log or opening text
+    # Try to find the exact match via the last message or opening text
     for p in profiles:
-        c_log = json.loads(p.get("chat_log") or "[]")
-        if c_log:
-            last_msg = c_log[-1]["description"].replace('\n', ' ')
+        last = p.get("last_message")
+        if last:
+            last_msg = last["description"].replace('\n', ' ')
             if last_msg.startswith(ui_clean[:15]):
                 return p
         else:
@@ -247,32 +237,23 @@ def _disambiguate_profile(profiles: List[Dict[str, Any]], ui_preview: str) -> Op
     return None
 
 def _all_active_profiles_in_db() -> List[Dict[str, Any]]:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cur.execute("""
-        SELECT id, Name FROM profiles 
+    rows = storage.query("""
+        SELECT id, Name AS name FROM profiles 
         WHERE matched = 1 AND status IN ('my_turn', 'her_turn', 'active')
-    """)
-    rows = cur.fetchall()
-    con.close()
-    return [{"id": r[0], "name": r[1]} for r in rows]
+    """, db_path=get_db_path())
+    return [dict(r) for r in rows]
 
 def _attempt_auto_link_profile(device, name: str, chat_log: List[Dict[str, Any]]) -> Optional[int]:
     """Attempts to auto-link a new match by matching first sent message or biometrics."""
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    
     # 1. Simple route: Try to match by opening text
     sent_msgs = [m for m in chat_log if m["event"] == "message_sent"]
     
-    cur.execute("""
+    # "+matched": most rows are unmatched, so seek idx_profiles_liked on verdict/Name instead.
+    candidates = storage.query("""
         SELECT id, opening_pick_text, Age, Height_cm
         FROM profiles 
-        WHERE matched = 0 AND Name = ? AND UPPER(COALESCE(verdict, '')) IN ('LONG_PICKUP', 'SHORT_PICKUP', 'LIKE')
-    """, (name,))
-    candidates = cur.fetchall()
+        WHERE +matched = 0 AND Name = ? AND verdict IN ('LONG_PICKUP', 'SHORT_PICKUP', 'LIKE')
+    """, (name,), db_path=get_db_path())
     
     if sent_msgs and candidates:
         for cand in candidates:
@@ -283,7 +264,6 @@ def _attempt_auto_link_profile(device, name: str, chat_log: List[Dict[str, Any]]
                 sent_msg_desc = sent_msg["description"].strip().lower()
                 print(f"[DEBUG] Comparing sent message: '{sent_msg_desc}' with DB opening_pick_text: '{cand_pick_lower}'")
                 if cand_pick and cand_pick_lower == sent_msg_desc:
-                    con.close()
                     print_success(f"Auto-linked {name} via matching opening message!")
                     return cand_id
                 
@@ -349,11 +329,9 @@ def _attempt_auto_link_profile(device, name: str, chat_log: List[Dict[str, Any]]
             match_height = not ui_height or cand_height == ui_height
             
             if match_age and match_height:
-                con.close()
                 print_success(f"Auto-linked {name} via biometrics (Age: {ui_age}, Height: {ui_height})!")
                 return cand_id
 
-    con.close()
     print_error(f"Failed to auto-link {name}.")
     return None
 
@@ -528,12 +506,11 @@ def _run_auto_sync():
                 needs_import = True
                 is_new_match = True
             else:
-                c_log_str = db_prof["chat_log"]
-                c_log = json.loads(c_log_str) if c_log_str else []
-                if not c_log:
+                last = db_prof.get("last_message")
+                if not last:
                     needs_import = True
                 else:
-                    last_msg = c_log[-1]["description"].replace('\n', ' ')
+                    last_msg = last["description"].replace('\n', ' ')
                     ui_preview = preview.replace('\n', ' ')
                     if not last_msg.startswith(ui_preview[:15]):
                         needs_import = True
@@ -553,10 +530,8 @@ def _run_auto_sync():
                 time.sleep(2)
                 
                 anchor_ts = None
-                if db_prof and db_prof.get("chat_log"):
-                    c_log = json.loads(db_prof["chat_log"])
-                    if c_log:
-                        anchor_ts = c_log[-1]['timestamp']
+                if db_prof and db_prof.get("last_message"):
+                    anchor_ts = db_prof["last_message"]['timestamp']
                 if not anchor_ts and db_prof:
                     anchor_ts = db_prof['timestamp']
                 if not anchor_ts:
@@ -580,8 +555,8 @@ def _run_auto_sync():
                             update_profile_match(cand_id, matched=True, match_time=match_time)
                             print_success(f"Logged new match for {name} at {match_time}.")
                             
-                            _update_profile_data(cand_id, chat_log=captured)
-                            print_success(f"Imported {len(captured)} new messages for {name}.")
+                            added = _append_messages(cand_id, captured)
+                            print_success(f"Imported {added} new messages for {name}.")
                             
                             # Prevent the block below from running
                             captured = None
@@ -589,17 +564,9 @@ def _run_auto_sync():
                             print_error(f"Could not link profile {name}. You may need to log it manually.")
                     
                     if db_prof and captured:
-                        prof_id = db_prof["id"]
-                        c_log_str = db_prof.get("chat_log")
-                        c_log = json.loads(c_log_str) if c_log_str else []
-                        
-                        seen_descs = { m['description'] for m in c_log }
-                        new_msgs = [c for c in captured if c['description'] not in seen_descs]
-                        if new_msgs:
-                            c_log.extend(new_msgs)
-                            c_log.sort(key=lambda x: x['timestamp'])
-                            _update_profile_data(prof_id, chat_log=c_log)
-                            print_success(f"Imported {len(new_msgs)} new messages for {name}.")
+                        added = _append_messages(db_prof["id"], captured)
+                        if added:
+                            print_success(f"Imported {added} new messages for {name}.")
                 except Exception as e:
                     print_error(f"Failed to capture chat for {name}: {e}")
                 
@@ -702,12 +669,12 @@ def _print_formatted_profiles(rows: List[Dict[str, Any]], title: str):
                 dt_str = f" | Last: {dt.strftime('%d %b %H:%M')}"
             except: pass
 
-        c_log = json.loads(r.get("chat_log") or "[]")
-        m_log = json.loads(r.get("milestones") or "[]")
+        n_msgs = r.get("message_count") or 0
+        n_miles = r.get("milestone_count") or 0
         
         events_info = ""
-        if c_log: events_info += f" | Msg: {len(c_log)}"
-        if m_log: events_info += f" | MS: {len(m_log)}"
+        if n_msgs: events_info += f" | Msg: {n_msgs}"
+        if n_miles: events_info += f" | MS: {n_miles}"
         
         print(f"[{idx}] {color}{status_str}{Colors.ENDC} {Colors.BOLD}{r['name']}{Colors.ENDC} (ID:{r['id']}, Age:{r['age']}){dt_str}{events_info}")
 
@@ -744,7 +711,7 @@ def _manual_log_match() -> None:
     print_success(f"Logged match for id={chosen['id']} at {match_time}.")
 
 def _unified_interactive_menu() -> None:
-    _recalculate_all_statuses()
+    _sync_statuses()
     
     while True:
         print("\n" + Colors.HEADER + "="*60 + Colors.ENDC)
@@ -834,7 +801,7 @@ def _profile_submenu(selected: Dict[str, Any]):
 
 def main() -> int:
     init_db()
-    _recalculate_all_statuses()
+    _sync_statuses()
     
     # Optional launch prompt
     print_header("Hinge Matches Manager")
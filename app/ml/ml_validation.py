@@ -1,12 +1,12 @@
 import os
 import csv
-import base64
 import time
 import numpy as np
 import cv2
 import joblib
 from datetime import datetime
 
+from image_payload import encode_image_payload
 from llm_client import generate_completion, get_large_model, LLMError
 from prompts import LLM_AESTHETIC_EVAL
 from sqlite_store import get_db_path
@@ -65,13 +65,12 @@ def _run_vlm_zero_shot(image_paths: list[str]) -> tuple[float, int]:
     
     for img_path in image_paths[:6]:
         try:
-            with open(img_path, 'rb') as f:
-                b64 = base64.b64encode(f.read()).decode('utf-8')
-                mime = "image/png" if img_path.lower().endswith('.png') else "image/jpeg"
-                messages[0]["content"].append({
-                    "type": "image_url",
-                    "image_url": {"url": f"data:{mime};base64,{b64}"}
-                })
+            # Shared encoder: downscaled + size-bounded, memoized with the LLM1 payloads.
+            payload = encode_image_payload(img_path)
+            messages[0]["content"].append({
+                "type": "image_url",
+                "image_url": {"url": payload.data_url}
+            })
         except Exception as e:
             print(f"[VALIDATION] Warning: skipped loading image {img_path} for VLM: {e}")
 
@@ -16,6 +16,10 @@ warnings.filterwarnings("ignore", category=UserWarning, module="huggingface_hub"
 # Suppress transformers logging (e.g. LOAD REPORT tables)
 from transformers import logging as hf_logging
 hf_logging.set_verbosity_error()
+try:
+    from photo_store import get_bgr as stored_bgr
+except ImportError:  # run standalone from ml/
+    stored_bgr = None
 # Suppress MediaPipe C++ GLOG output
 os.environ["GLOG_minloglevel"] = "2"
 
@@ -85,10 +89,13 @@ class AestheticScorer:
     def extract_faces_from_image(self, img_path):
         """Attempts to crop a face from a single image using the dual-model logic."""
         try:
-            with open(img_path, "rb") as stream:
-                bytes_data = bytearray(stream.read())
-            numpyarray = np.asarray(bytes_data, dtype=np.uint8)
-            img_cv2 = cv2.imdecode(numpyarray, cv2.IMREAD_UNCHANGED)
+            # Crops from the current scan are already decoded in memory.
+            img_cv2 = stored_bgr(img_path) if stored_bgr else None
+            if img_cv2 is None:
+                with open(img_path, "rb") as stream:
+                    bytes_data = bytearray(stream.read())
+                numpyarray = np.asarray(bytes_data, dtype=np.uint8)
+                img_cv2 = cv2.imdecode(numpyarray, cv2.IMREAD_UNCHANGED)
             
             if img_cv2 is None:
                 return None
@@ -46,6 +46,7 @@ def run_llm3_long(extracted: Dict[str, Any], model: str | None = None) -> Dict[s
             model_type="large",
             response_format={"type": "json_object"},
             messages=[{"role": "user", "content": prompt}],
+            stage="llm3_long",
         )
         resolved_model = resp.model_name
     except Exception as e:
@@ -138,6 +139,7 @@ def run_llm3_short(extracted: Dict[str, Any], model: str | None = None) -> Dict[
             model_type="large",
             response_format={"type": "json_object"},
             messages=[{"role": "user", "content": prompt}],
+            stage="llm3_short",
         )
         resolved_model = resp.model_name
     except Exception as e:
@@ -231,6 +233,7 @@ def run_llm3_5_critique(openers_json: Dict[str, Any], extracted: Dict[str, Any],
             model_type="large",
             response_format={"type": "json_object"},
             messages=[{"role": "user", "content": prompt}],
+            stage="llm3_5_critique",
         )
         resolved_model = resp.model_name
     except Exception as e:
@@ -323,6 +326,7 @@ def _run_llm4_prompt(prompt: str, call_id: str, model: str | None = None) -> Dic
             model_type="large",
             response_format={"type": "json_object"},
             messages=[{"role": "user", "content": prompt}],
+            stage=call_id,
         )
         resolved_model = resp.model_name
     except Exception as e:
@@ -421,6 +425,7 @@ def run_llm4_5_critique(llm4_result: Dict[str, Any], extracted: Dict[str, Any],
             model_type="large",
             response_format={"type": "json_object"},
             messages=[{"role": "user", "content": prompt}],
+            stage="llm4_5_critique",
         )
         resolved_model = resp.model_name
     except Exception as e:
@@ -519,6 +524,7 @@ def run_llm5_safety(
             model_type="large",
             response_format={"type": "json_object"},
             messages=[{"role": "user", "content": prompt}],
+            stage="llm5_safety",
         )
         resolved_model = resp.model_name
     except Exception as e:
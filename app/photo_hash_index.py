@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import storage
+from runtime import _log
+from sqlite_store import _serialized_write, get_db_path
+
+# Perceptual-hash index over every photo ever logged.
+#
+# The center aHash computed during the scan is persisted per photo in the
+# photo_hashes table (next to profiles in profiles.db) and mirrored in an
+# in-memory BK-tree keyed on Hamming distance. A new profile's photos are matched
+# against the whole history in milliseconds:
+#   - a candidate sharing >= HINGE_PHASH_MIN_MATCHES photos within
+#     HINGE_PHASH_RADIUS bits is a confirmed returning profile (no LLM call);
+#   - a name/age/height candidate that has indexed photos but shares none is
+#     ruled out (no LLM call);
+#   - anything in between (one shared photo, or a legacy row with no hashes)
+#     still goes to the LLM duplicate check.
+# The tree is loaded once per process and topped up from rows added by other
+# processes (rowid watermark) before each lookup.
+#
+# HINGE_PHASH_INDEX=0           disable (LLM-only duplicate verification)
+# HINGE_PHASH_RADIUS=6          max Hamming distance for "same photo"
+# HINGE_PHASH_MIN_MATCHES=2     shared photos needed to confirm without the LLM
+
+_HASH_BITS = 64
+
+_LOCK = threading.Lock()
+_STATE: Dict[str, Any] = {"tree": None, "watermark": 0, "db_path": None, "profiles": {}}
+
+
+def enabled() -> bool:
+    return os.getenv("HINGE_PHASH_INDEX", "1") != "0"
+
+
+def _radius() -> int:
+    try:
+        return max(0, int(os.getenv("HINGE_PHASH_RADIUS", "6")))
+    except ValueError:
+        return 6
+
+
+def min_matches() -> int:
+    try:
+        return max(1, int(os.getenv("HINGE_PHASH_MIN_MATCHES", "2")))
+    except ValueError:
+        return 2
+
+
+def _to_sql(h: int) -> int:
+    # SQLite integers are signed 64-bit.
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def _from_sql(v: int) -> int:
+    return v + (1 << 64) if v < 0 else v
+
+
+def _usable(h: Any) -> bool:
+    # Uniform crops (all bits equal) match each other regardless of content.
+    return isinstance(h, int) and 0 < h < (1 << _HASH_BITS) - 1
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes under Hamming distance."""
+
+    def __init__(self):
+        # node = [hash, [values...], {distance: child}]
+        self._root: Optional[list] = None
+        self.size = 0
+
+    def add(self, h: int, value: Any) -> None:
+        self.size += 1
+        if self._root is None:
+            self._root = [h, [value], {}]
+            return
+        node = self._root
+        while True:
+            d = (h ^ node[0]).bit_count()
+            if d == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [h, [value], {}]
+                return
+            node = child
+
+    def search(self, h: int, radius: int) -> List[Tuple[int, Any]]:
+        """All (distance, value) within radius of h."""
+        out: List[Tuple[int, Any]] = []
+        if self._root is None:
+            return out
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            d = (h ^ node[0]).bit_count()
+            if d <= radius:
+                out.extend((d, v) for v in node[1])
+            lo, hi = d - radius, d + radius
+            for cd, child in node[2].items():
+                if lo <= cd <= hi:
+                    stack.append(child)
+        return out
+
+
+def _apply_schema(con: sqlite3.Connection) -> None:
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS photo_hashes (
+            profile_id INTEGER NOT NULL,
+            photo_idx INTEGER NOT NULL,
+            ahash INTEGER NOT NULL,
+            UNIQUE(profile_id, photo_idx)
+        );
+        """
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS idx_photo_hashes_profile ON photo_hashes(profile_id);")
+
+
+storage.register_schema("photo_hashes", 1, _apply_schema)
+
+
+def _refresh_locked(db_path: str) -> BKTree:
+    """Load (or top up) the in-memory tree from rows past the watermark. Caller holds _LOCK."""
+    if _STATE["db_path"] != db_path or _STATE["tree"] is None:
+        _STATE.update(tree=BKTree(), watermark=0, db_path=db_path, profiles={})
+    tree: BKTree = _STATE["tree"]
+    if not os.path.exists(db_path):
+        return tree
+    rows = storage.query(
+        "SELECT rowid, profile_id, ahash FROM photo_hashes WHERE rowid > ? ORDER BY rowid",
+        (_STATE["watermark"],),
+        db_path=db_path,
+    )
+    profiles: Dict[int, int] = _STATE["profiles"]
+    for rowid, pid, ahash in rows:
+        tree.add(_from_sql(ahash), pid)
+        profiles[pid] = profiles.get(pid, 0) + 1
+        _STATE["watermark"] = rowid
+    if rows and tree.size == len(rows):
+        _log(f"[PHASH] indexed {tree.size} photo hashes from {len(profiles)} profiles")
+    return tree
+
+
+@_serialized_write
+def record_profile_hashes(profile_id: int, hashes: List[Optional[int]], db_path: Optional[str] = None) -> int:
+    """Persist a logged profile's photo hashes (in photo order). Returns how many were stored."""
+    if not enabled() or not profile_id:
+        return 0
+    db_path = db_path or get_db_path()
+    rows = [(int(profile_id), i, _to_sql(h)) for i, h in enumerate(hashes or []) if _usable(h)]
+    if not rows:
+        return 0
+    storage.executemany(
+        "INSERT OR REPLACE INTO photo_hashes (profile_id, photo_idx, ahash) VALUES (?, ?, ?);",
+        rows,
+        db_path=db_path,
+    )
+    # The new rows are picked up by the next lookup's watermark refresh.
+    return len(rows)
+
+
+def has_hashes(profile_id: Any, db_path: Optional[str] = None) -> bool:
+    """True if profile_id has indexed photos (legacy rows from before the index do not)."""
+    db_path = db_path or get_db_path()
+    with _LOCK:
+        _refresh_locked(db_path)
+        return bool(_STATE["profiles"].get(profile_id))
+
+
+def find_matching_profiles(hashes: List[Optional[int]], db_path: Optional[str] = None) -> Dict[int, Dict[str, int]]:
+    """
+    Match a new profile's photo hashes against every indexed photo.
+    Returns {profile_id: {"matched_photos": n, "min_distance": d}} where n counts
+    the new photos that have a near-duplicate among that profile's photos.
+    """
+    if not enabled():
+        return {}
+    db_path = db_path or get_db_path()
+    radius = _radius()
+    out: Dict[int, Dict[str, int]] = {}
+    with _LOCK:
+        tree = _refresh_locked(db_path)
+        for h in hashes or []:
+            if not _usable(h):
+                continue
+            best: Dict[int, int] = {}
+            for d, pid in tree.search(h, radius):
+                if d < best.get(pid, radius + 1):
+                    best[pid] = d
+            for pid, d in best.items():
+                hit = out.setdefault(pid, {"matched_photos": 0, "min_distance": d})
+                hit["matched_photos"] += 1
+                hit["min_distance"] = min(hit["min_distance"], d)
+    return out
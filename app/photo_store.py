@@ -0,0 +1,227 @@
+import atexit
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from runtime import _log
+
+# In-memory handoff for captured photo crops.
+#
+# A crop is decoded exactly once, when it is cut out of the framebuffer. The RGB
+# array is registered here under the path it will eventually live at, and the
+# PNG is written by a background thread. Everything downstream in the same run
+# (aHash, LLM image payloads, the ML scorer) asks the store for the array first
+# and only falls back to reading the file for crops it does not hold, e.g. older
+# profiles during duplicate verification.
+#
+# Call flush() before anything needs the files on disk (folder rename, DB
+# upsert); discard() drops a crop and cancels its pending write. Path filters
+# should use available(), not os.path.exists(), since a captured crop may not
+# be written yet. The writer is a daemon thread, so pending PNGs are also
+# flushed at exit.
+#
+# HINGE_PHOTO_LAZY_WRITE=0    write PNGs synchronously at capture time
+# HINGE_PHOTO_STORE_MAX=64    crops kept in memory (oldest written ones dropped first)
+
+_LOCK = threading.Lock()
+_COND = threading.Condition(_LOCK)
+_ENTRIES: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_PENDING: Dict[str, int] = {}
+_QUEUE: "queue.Queue[Optional[str]]" = queue.Queue()
+_WRITER: List[threading.Thread] = []
+_STATS: Dict[str, int] = {"puts": 0, "hits": 0, "misses": 0, "writes": 0, "cancelled": 0}
+
+
+def _lazy_enabled() -> bool:
+    return os.getenv("HINGE_PHOTO_LAZY_WRITE", "1") != "0"
+
+
+def _max_entries() -> int:
+    try:
+        return max(1, int(os.getenv("HINGE_PHOTO_STORE_MAX", "64")))
+    except ValueError:
+        return 64
+
+
+def _key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+def _write_png(path: str, rgb: Any) -> None:
+    from PIL import Image
+
+    tmp = f"{path}.tmp"
+    Image.fromarray(rgb, "RGB").save(tmp, format="PNG")
+    os.replace(tmp, path)
+
+
+def _writer_loop() -> None:
+    while True:
+        key = _QUEUE.get()
+        if key is None:
+            return
+        with _LOCK:
+            entry = _ENTRIES.get(key)
+            wanted = key in _PENDING and entry is not None
+        if wanted:
+            try:
+                _write_png(key, entry["rgb"])
+                with _LOCK:
+                    _STATS["writes"] += 1
+            except Exception as e:
+                _log(f"[PHOTO] background write failed {os.path.basename(key)}: {e}")
+        with _COND:
+            discarded = wanted and key not in _PENDING
+            _PENDING.pop(key, None)
+            _COND.notify_all()
+        if discarded:
+            # discard() ran while the write was in flight.
+            try:
+                os.remove(key)
+            except OSError:
+                pass
+
+
+def _ensure_writer() -> None:
+    with _LOCK:
+        if _WRITER and _WRITER[0].is_alive():
+            return
+        t = threading.Thread(target=_writer_loop, name="photo-writer", daemon=True)
+        _WRITER[:] = [t]
+    t.start()
+
+
+def _trim_locked() -> None:
+    limit = _max_entries()
+    for key in list(_ENTRIES):
+        if len(_ENTRIES) <= limit:
+            break
+        if key not in _PENDING:
+            del _ENTRIES[key]
+
+
+def put(path: str, rgb: Any) -> None:
+    """Register the decoded RGB crop for path and schedule (or perform) its PNG write."""
+    key = _key(path)
+    with _LOCK:
+        _ENTRIES[key] = {"rgb": rgb, "bgr": None}
+        _ENTRIES.move_to_end(key)
+        _STATS["puts"] += 1
+        _trim_locked()
+    if not _lazy_enabled():
+        _write_png(key, rgb)
+        with _LOCK:
+            _STATS["writes"] += 1
+        return
+    with _LOCK:
+        _PENDING[key] = 1
+    _ensure_writer()
+    _QUEUE.put(key)
+
+
+def holds(path: str) -> bool:
+    """True if the crop for path is in memory (its PNG may still be queued)."""
+    if not path:
+        return False
+    with _LOCK:
+        return _key(path) in _ENTRIES
+
+
+def available(path: str) -> bool:
+    """A crop that can be read: held in memory or already on disk."""
+    return holds(path) or os.path.exists(path)
+
+
+def get_rgb(path: str) -> Optional[Any]:
+    """The in-memory RGB array for path, or None if the store does not hold it."""
+    if not path:
+        return None
+    key = _key(path)
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is None:
+            _STATS["misses"] += 1
+            return None
+        _ENTRIES.move_to_end(key)
+        _STATS["hits"] += 1
+        return entry["rgb"]
+
+
+def get_bgr(path: str) -> Optional[Any]:
+    """BGR view of the stored crop for cv2 consumers (converted once, then shared)."""
+    rgb = get_rgb(path)
+    if rgb is None:
+        return None
+    key = _key(path)
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is not None and entry["bgr"] is not None:
+            return entry["bgr"]
+    bgr = rgb[:, :, ::-1].copy()
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is not None:
+            entry["bgr"] = bgr
+    return bgr
+
+
+def get_pil(path: str) -> Optional[Any]:
+    rgb = get_rgb(path)
+    if rgb is None:
+        return None
+    from PIL import Image
+
+    return Image.fromarray(rgb, "RGB")
+
+
+def discard(path: str) -> None:
+    """Forget path, cancel its pending write and remove the file if it was already written."""
+    if not path:
+        return
+    key = _key(path)
+    with _COND:
+        _ENTRIES.pop(key, None)
+        if _PENDING.pop(key, None) is not None:
+            _STATS["cancelled"] += 1
+        _COND.notify_all()
+    try:
+        if os.path.isfile(key):
+            os.remove(key)
+    except Exception:
+        pass
+
+
+def flush(timeout: Optional[float] = 30.0) -> bool:
+    """Block until every pending write is on disk. Returns False on timeout."""
+    with _COND:
+        ok = _COND.wait_for(lambda: not _PENDING, timeout=timeout)
+    if not ok:
+        _log(f"[PHOTO] flush timed out with {len(_PENDING)} writes pending")
+    return ok
+
+
+def _flush_at_exit() -> None:
+    if _PENDING:
+        flush()
+
+
+atexit.register(_flush_at_exit)
+
+
+def release(paths: List[str]) -> None:
+    """Drop already-written crops from memory (pending ones are kept until written)."""
+    with _LOCK:
+        for p in paths or []:
+            key = _key(p) if p else ""
+            if key in _ENTRIES and key not in _PENDING:
+                del _ENTRIES[key]
+
+
+def stats_snapshot() -> Dict[str, int]:
+    with _LOCK:
+        out = dict(_STATS)
+        out["held"] = len(_ENTRIES)
+        out["pending"] = len(_PENDING)
+    return out
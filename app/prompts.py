@@ -16,6 +16,38 @@ def LLM_AESTHETIC_EVAL() -> str:
     )
 
 
+def _llm1_trait_values() -> str:
+    """Allowed values for the LLM1 visual traits (shared by the batch and streaming prompts)."""
+    return (
+        "Visual traits allowed values (select exactly one unless it says multiple; for Apparent Age (Years) use an integer):\n\n"
+        '"Face Visibility Quality": "Clear face in 3+ photos", "Clear face in 1-2 photos", "Face often partially obscured", "Face mostly not visible"\n'
+        '"Photo Authenticity / Editing Level": "No obvious filters", "Some filters or mild editing", "Heavy filters/face smoothing", "Unclear"\n'
+        '"Apparent Body Fat Level": "Low", "Average", "High", "Very high", "Unclear"\n'
+        '"Profile Distinctiveness": "High (specific/unique)", "Medium", "Low (generic/boilerplate)", "Unclear"\n'
+        '"Apparent Build Category": "Very slender/petite", "Slender/lean", "Athletic/toned/fit", "Average build", "Curvy (defined waist)", "Curvy (softer proportions)", "Heavy-set/stocky", "Obese/high body fat", "Muscular/built"\n'
+        '"Apparent Skin Tone": "Very light/pale/fair", "Light/beige", "Warm light/tan", "Olive/medium-tan", "Golden/medium-brown", "Warm brown/deep tan", "Dark-brown/chestnut", "Very dark/ebony/deep"\n'
+        '"Apparent Ethnic Features": "White/European-presenting", "East Asian-presenting", "South Asian-presenting", "Southeast Asian-presenting", "Black/African-presenting", "Middle Eastern/Arab-presenting", "Mediterranean/Southern European-presenting", "Mixed/Ambiguous" - Note: South Asian = Indian/Pakistani/Bangladeshi/Sri Lankan; Southeast Asian = Thai/Vietnamese/Filipino/Indonesian/Malaysian\n'
+        '"Hair Color": "Black", "Dark brown", "Medium brown", "Light brown", "Blonde", "Platinum blonde", "Ginger", "Gray/white", "Bald/shaved", "Dyed red", "Dyed blue", "Dyed (unnatural other)", "Dyed (mixed/multiple colors)"\n'
+        '"Facial Symmetry Level": "Very high", "High", "Moderate", "Low"\n'
+        '"Visible Lip Filler": "None visible", "Subtle/natural", "Obvious", "Extreme"\n'
+        '"Indicators of Fitness or Lifestyle": "Visible muscle tone", "Athletic poses", "Sporty/athletic clothing", "Outdoor/active settings", "Gym/fitness context visible", "Sedentary/lounging poses", "No visible fitness indicators"\n'
+        '"Overall Visual Appeal Vibe": "Very low-key/understated", "Natural/effortless", "Polished/elegant", "High-energy/adventurous", "Playful/flirty", "Sensual/alluring", "Edgy/alternative"\n'
+        '"Apparent Age (Years)": integer estimate (e.g., 27). Leave empty if unclear.\n'
+        '"Attire and Style Indicators": "Very modest/covered", "Casual/comfortable", "Low-key/natural", "Polished/elegant", "Sporty/active", "Form-fitting/suggestive", "Highly revealing", "Edgy/alternative"\n'
+        '"Body Language and Expression": "Shy/reserved", "Relaxed/casual", "Approachable/open", "Confident/engaging", "Playful/flirty", "Energetic/vibrant"\n'
+        '"Visible Enhancements or Features": "None visible", "Glasses", "Sunglasses", "Makeup (light)", "Makeup (heavy)", "Jewelry", "Painted nails", "Very long nails (2cm+)", "Hair extensions/wig (obvious)", "False eyelashes (obvious)", "Hat/cap/beanie (worn in most photos)"\n'
+        '"Apparent Chest Proportions": "Petite/small/narrow", "Average/balanced/proportional", "Defined/toned", "Full/curvy", "Prominent/voluptuous", "Broad/strong"\n'
+        '"Apparent Attractiveness Tier": "Negligible", "Low / Unattractive", "Limited / Below Average", "Average / Moderate", "High / Above Average", "Exceptional / Elite". Classify based on a strict population bell curve: "Negligible" (1-2) is for deformity, age, obesity, etc. "Low / Unattractive" (3-4) includes obese, lack of physical care, or otherwise conventionally unattractive. "Limited / Below Average" (4-5) is for plain, invisible, or unremarkable subjects with zero striking appeal. "Average / Moderate" (5-6) is the "Promising Average" with balanced proportions and pleasant features. "High / Above Average" (7-8) requires multiple specific striking and remarkable features. "Exceptional / Elite" (9-10) is for model-tier beauty. Do not round up; accurate diagnostic binning is the priority.\n'
+        '"Reasoning for attractiveness tier": "Identify the primary physical assets and constraints. List the \'striking assets\' (e.g., exceptional fitness, magnetic expression, high-tier features) alongside \'limiting factors\' (e.g., poor lighting, rounded structure). Do not invent flaws or praise to justify a tier, honesty is required."\n'
+        '"Facial Proportion Balance": "Balanced/proportional", "Slightly unbalanced", "Noticeably unbalanced"\n'
+        '"Grooming Effort Level": "Minimal/natural", "Moderate/casual", "High/polished", "Heavy/overdone"\n'
+        '"Presentation Red Flags": "None", "Poor lighting", "Blurry/low resolution", "Unflattering angle", "Heavy filters/face smoothing", "Too many distant shots", "Messy background", "Only one clear solo photo", "Awkward cropping", "Overexposed/washed out", "Inconsistent appearance across photos"\n'
+        '"Visible Tattoo Level": "None visible", "Small/minimal", "Moderate", "High"\n'
+        '"Visible Piercing Level": "None visible", "Minimal", "Moderate", "High" - Note: If visible belly or nose piercings, piercing level must be at least moderate or higher. If 2+ earrings per ear, must be at least minimal or higher.\n'
+        '"Short-Term / Hookup Orientation Signals": "None evident", "Low", "Moderate", "High"\n'
+    )
+
+
 def LLM1_VISUAL() -> str:
     """
     Visual-only prompt for LLM1: describe photos + infer visual traits.
@@ -75,35 +107,90 @@ def LLM1_VISUAL() -> str:
         "- Provide a detailed, visual summary of the main subject: clothing, pose, activity, background, "
         "facial features when visible, skin tone, build, accessories, and overall presentation. "
         "Unbiased, accurate responses are required. Include negatives like poor proportions, unusual facial structures or high body fat if observable.\n\n"
-        "Visual traits allowed values (select exactly one unless it says multiple; for Apparent Age (Years) use an integer):\n\n"
-        '"Face Visibility Quality": "Clear face in 3+ photos", "Clear face in 1-2 photos", "Face often partially obscured", "Face mostly not visible"\n'
-        '"Photo Authenticity / Editing Level": "No obvious filters", "Some filters or mild editing", "Heavy filters/face smoothing", "Unclear"\n'
-        '"Apparent Body Fat Level": "Low", "Average", "High", "Very high", "Unclear"\n'
-        '"Profile Distinctiveness": "High (specific/unique)", "Medium", "Low (generic/boilerplate)", "Unclear"\n'
-        '"Apparent Build Category": "Very slender/petite", "Slender/lean", "Athletic/toned/fit", "Average build", "Curvy (defined waist)", "Curvy (softer proportions)", "Heavy-set/stocky", "Obese/high body fat", "Muscular/built"\n'
-        '"Apparent Skin Tone": "Very light/pale/fair", "Light/beige", "Warm light/tan", "Olive/medium-tan", "Golden/medium-brown", "Warm brown/deep tan", "Dark-brown/chestnut", "Very dark/ebony/deep"\n'
-        '"Apparent Ethnic Features": "White/European-presenting", "East Asian-presenting", "South Asian-presenting", "Southeast Asian-presenting", "Black/African-presenting", "Middle Eastern/Arab-presenting", "Mediterranean/Southern European-presenting", "Mixed/Ambiguous" - Note: South Asian = Indian/Pakistani/Bangladeshi/Sri Lankan; Southeast Asian = Thai/Vietnamese/Filipino/Indonesian/Malaysian\n'
-        '"Hair Color": "Black", "Dark brown", "Medium brown", "Light brown", "Blonde", "Platinum blonde", "Ginger", "Gray/white", "Bald/shaved", "Dyed red", "Dyed blue", "Dyed (unnatural other)", "Dyed (mixed/multiple colors)"\n'
-        '"Facial Symmetry Level": "Very high", "High", "Moderate", "Low"\n'
-        '"Visible Lip Filler": "None visible", "Subtle/natural", "Obvious", "Extreme"\n'
-        '"Indicators of Fitness or Lifestyle": "Visible muscle tone", "Athletic poses", "Sporty/athletic clothing", "Outdoor/active settings", "Gym/fitness context visible", "Sedentary/lounging poses", "No visible fitness indicators"\n'
-        '"Overall Visual Appeal Vibe": "Very low-key/understated", "Natural/effortless", "Polished/elegant", "High-energy/adventurous", "Playful/flirty", "Sensual/alluring", "Edgy/alternative"\n'
-        '"Apparent Age (Years)": integer estimate (e.g., 27). Leave empty if unclear.\n'
-        '"Attire and Style Indicators": "Very modest/covered", "Casual/comfortable", "Low-key/natural", "Polished/elegant", "Sporty/active", "Form-fitting/suggestive", "Highly revealing", "Edgy/alternative"\n'
-        '"Body Language and Expression": "Shy/reserved", "Relaxed/casual", "Approachable/open", "Confident/engaging", "Playful/flirty", "Energetic/vibrant"\n'
-        '"Visible Enhancements or Features": "None visible", "Glasses", "Sunglasses", "Makeup (light)", "Makeup (heavy)", "Jewelry", "Painted nails", "Very long nails (2cm+)", "Hair extensions/wig (obvious)", "False eyelashes (obvious)", "Hat/cap/beanie (worn in most photos)"\n'
-        '"Apparent Chest Proportions": "Petite/small/narrow", "Average/balanced/proportional", "Defined/toned", "Full/curvy", "Prominent/voluptuous", "Broad/strong"\n'
-        '"Apparent Attractiveness Tier": "Negligible", "Low / Unattractive", "Limited / Below Average", "Average / Moderate", "High / Above Average", "Exceptional / Elite". Classify based on a strict population bell curve: "Negligible" (1-2) is for deformity, age, obesity, etc. "Low / Unattractive" (3-4) includes obese, lack of physical care, or otherwise conventionally unattractive. "Limited / Below Average" (4-5) is for plain, invisible, or unremarkable subjects with zero striking appeal. "Average / Moderate" (5-6) is the "Promising Average" with balanced proportions and pleasant features. "High / Above Average" (7-8) requires multiple specific striking and remarkable features. "Exceptional / Elite" (9-10) is for model-tier beauty. Do not round up; accurate diagnostic binning is the priority.\n'
-        '"Reasoning for attractiveness tier": "Identify the primary physical assets and constraints. List the \'striking assets\' (e.g., exceptional fitness, magnetic expression, high-tier features) alongside \'limiting factors\' (e.g., poor lighting, rounded structure). Do not invent flaws or praise to justify a tier, honesty is required."\n'
-        '"Facial Proportion Balance": "Balanced/proportional", "Slightly unbalanced", "Noticeably unbalanced"\n'
-        '"Grooming Effort Level": "Minimal/natural", "Moderate/casual", "High/polished", "Heavy/overdone"\n'
-        '"Presentation Red Flags": "None", "Poor lighting", "Blurry/low resolution", "Unflattering angle", "Heavy filters/face smoothing", "Too many distant shots", "Messy background", "Only one clear solo photo", "Awkward cropping", "Overexposed/washed out", "Inconsistent appearance across photos"\n'
-        '"Visible Tattoo Level": "None visible", "Small/minimal", "Moderate", "High"\n'
-        '"Visible Piercing Level": "None visible", "Minimal", "Moderate", "High" - Note: If visible belly or nose piercings, piercing level must be at least moderate or higher. If 2+ earrings per ear, must be at least minimal or higher.\n'
-        '"Short-Term / Hookup Orientation Signals": "None evident", "Low", "Moderate", "High"\n'
+        + _llm1_trait_values()
+    )
+
+
+
+_LLM1_TRAIT_KEYS = [
+    "Face Visibility Quality",
+    "Photo Authenticity / Editing Level",
+    "Apparent Body Fat Level",
+    "Profile Distinctiveness",
+    "Apparent Build Category",
+    "Apparent Skin Tone",
+    "Apparent Ethnic Features",
+    "Hair Color",
+    "Facial Symmetry Level",
+    "Visible Lip Filler",
+    "Indicators of Fitness or Lifestyle",
+    "Overall Visual Appeal Vibe",
+    "Apparent Age (Years)",
+    "Attire and Style Indicators",
+    "Body Language and Expression",
+    "Visible Enhancements or Features",
+    "Apparent Chest Proportions",
+    "Apparent Attractiveness Tier",
+    "Reasoning for attractiveness tier",
+    "Facial Proportion Balance",
+    "Grooming Effort Level",
+    "Presentation Red Flags",
+    "Visible Tattoo Level",
+    "Visible Piercing Level",
+    "Short-Term / Hookup Orientation Signals",
+]
+
+
+def LLM1_PHOTO_DESCRIBE() -> str:
+    """
+    Streaming LLM1, stage 1: one photo per call, issued while the scan is still scrolling.
+    Returns a description plus visual notes the aggregation call can merge without the image.
+    """
+    return (
+        "You are a lead scout for an elite, boutique dating agency vetting candidates based on high-level sexual appeal and physical vitality. "
+        "You are shown ONE cropped photo from a dating profile. Other photos are reviewed separately.\n\n"
+        "Return exactly one JSON object:\n\n"
+        "{\n"
+        '  "description": "",\n'
+        '  "visual_notes": ""\n'
+        "}\n\n"
+        "Rules:\n"
+        "- Return only the JSON object, nothing else.\n"
+        "- Base everything ONLY on the photo.\n"
+        "- description: a detailed, visual summary of the main subject: clothing, pose, activity, background, "
+        "facial features when visible, skin tone, build, accessories, and overall presentation. "
+        "Unbiased, accurate responses are required. Include negatives like poor proportions, unusual facial structures or high body fat if observable.\n"
+        "- visual_notes: terse, diagnostic observations someone who cannot see the photo would need to fill in the traits below: "
+        "whether the face is clearly visible, filters/editing, body fat and build, skin tone, hair, symmetry and proportions, lip filler, "
+        "makeup/enhancements, tattoos, piercings, attire, expression, apparent age, photo quality problems, and how attractive the subject looks in this photo. "
+        "Be brutally honest; do not use false positivity or exaggeration.\n\n"
+        + _llm1_trait_values()
     )
 
 
+def LLM1_TRAITS_AGGREGATE(photo_notes_json: str) -> str:
+    """
+    Streaming LLM1, stage 2: merge per-photo notes into the visual traits summary.
+    Text only, so it is cheap enough to run after the last photo is described.
+    """
+    traits = json.dumps({"visual_traits": {k: "" for k in _LLM1_TRAIT_KEYS}}, indent=2)
+    return (
+        "You are a lead scout for an elite, boutique dating agency vetting candidates based on high-level sexual appeal and physical vitality. "
+        "Another scout has already reviewed each profile photo individually. Their per-photo descriptions and notes are below, in order.\n"
+        "Do not weight for age. All weighting must be objective and visual, i.e. 'good for a 50 year old' must be avoided.\n\n"
+        "Per-photo review:\n"
+        f"{photo_notes_json}\n\n"
+        "Return exactly one JSON object:\n\n"
+        f"{traits}\n\n"
+        "Rules:\n"
+        "- Return only the JSON object, nothing else.\n"
+        "- Base everything ONLY on the per-photo review (no other profile info).\n"
+        "- Traits describe the subject across ALL photos (e.g. Face Visibility Quality counts the photos with a clear face).\n"
+        "- If something is unclear, leave the field empty.\n"
+        "- Be brutally honest in assessments; do not use false positivity or exaggeration. Avoid overly optimistic ratings unless features are clearly above average.\n\n"
+        + _llm1_trait_values()
+    )
+
 
 
 def LLM2(home_town: str, job_title: str, university: str, prompts_text: str = "") -> str:
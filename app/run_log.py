@@ -0,0 +1,261 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from runtime import _log
+
+# Per-profile run log (profile.json) written as an append-only journal.
+#
+# start.py updates log_state ~20 times per profile. Rewriting profile.json with
+# indent=2 every time meant reserializing every LLM payload at every step.
+# Instead write() serializes only the top-level keys that changed, on the
+# caller's thread, because log_state keeps being mutated. A background thread
+# appends them to profile.journal.jsonl as {"ts", "set": {key: value}} lines.
+# Updates queued within HINGE_RUN_LOG_COALESCE_MS of each other are merged per
+# key, so a burst of writes becomes one line.
+#
+# finish() materializes profile.json once, from the in-memory state, at the
+# end of the profile and then deletes the journal. If the process dies
+# first, read_run() rebuilds the state by replaying the journal. A torn final
+# line is skipped. start.py calls recover() at startup, which does that for
+# every journal left under logs/.
+#
+# Call flush() before moving the run folder, then move() to re-key the run.
+#
+# HINGE_RUN_LOG_JOURNAL=0        rewrite profile.json on every update (old behaviour)
+# HINGE_RUN_LOG_COALESCE_MS=200  how long the writer waits to merge a burst of updates
+
+# Results whose "cost_usd" adds up to meta.total_cost_usd.
+COST_KEYS = (
+    "llm1_meta",
+    "profile_eval",
+    "llm3_result",
+    "llm3_5_result",
+    "llm4_result",
+    "llm4_5_result",
+    "llm5_result",
+)
+
+_LOCK = threading.Lock()
+_COND = threading.Condition(_LOCK)
+_QUEUE: "queue.Queue[Optional[Tuple[str, Dict[str, str]]]]" = queue.Queue()
+_WRITER: List[threading.Thread] = []
+_FLUSH_NOW = threading.Event()
+# Queued updates not yet on disk.
+_PENDING = [0]
+# json path -> {"data": live log_state, "thread": owning thread ident}
+_RUNS: Dict[str, Dict[str, Any]] = {}
+
+
+def _journal_enabled() -> bool:
+    return os.getenv("HINGE_RUN_LOG_JOURNAL", "1") != "0"
+
+
+def _coalesce_s() -> float:
+    try:
+        return max(0.0, float(os.getenv("HINGE_RUN_LOG_COALESCE_MS", "200"))) / 1000.0
+    except ValueError:
+        return 0.2
+
+
+def _key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+def journal_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".journal.jsonl"
+
+
+def total_cost(data: Dict[str, Any]) -> float:
+    total = 0.0
+    for key in COST_KEYS:
+        if isinstance(data.get(key), dict):
+            total += data[key].get("cost_usd", 0.0)
+    return round(total, 6)
+
+
+def _append(path: str, fields: Dict[str, str]) -> None:
+    body = ", ".join(f"{json.dumps(k)}: {v}" for k, v in fields.items())
+    line = f'{{"ts": "{datetime.now().isoformat(timespec="milliseconds")}", "set": {{{body}}}}}\n'
+    with open(journal_path(path), "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+def _writer_loop() -> None:
+    while True:
+        item = _QUEUE.get()
+        if item is None:
+            return
+        _FLUSH_NOW.wait(_coalesce_s())
+        batch = [item]
+        while True:
+            try:
+                nxt = _QUEUE.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:
+                _QUEUE.put(None)
+                break
+            batch.append(nxt)
+        merged: Dict[str, Dict[str, str]] = {}
+        for path, fields in batch:
+            merged.setdefault(path, {}).update(fields)
+        for path, fields in merged.items():
+            try:
+                _append(path, fields)
+            except Exception as e:
+                _log(f"[LOG] journal append failed {path}: {e}")
+        with _COND:
+            _PENDING[0] -= len(batch)
+            if _PENDING[0] <= 0:
+                _FLUSH_NOW.clear()
+            _COND.notify_all()
+
+
+def _ensure_writer() -> None:
+    with _LOCK:
+        if _WRITER and _WRITER[0].is_alive():
+            return
+        t = threading.Thread(target=_writer_loop, name="run-log-writer", daemon=True)
+        _WRITER[:] = [t]
+    t.start()
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    if isinstance(data.get("meta"), dict):
+        data["meta"]["total_cost_usd"] = total_cost(data)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def write(path: str, data: Dict[str, Any], keys: Optional[Iterable[str]] = None) -> None:
+    """Journal data[key] for each key (every key when keys is None); the first call opens the run."""
+    if not path:
+        return
+    if not _journal_enabled():
+        _write_json(path, data)
+        return
+    key = _key(path)
+    with _LOCK:
+        run = _RUNS.get(key)
+        if run is None or run["data"] is not data:
+            _RUNS[key] = {"data": data, "thread": threading.get_ident()}
+            keys = None
+    names = list(data) if keys is None else [k for k in keys if k in data]
+    if not names:
+        return
+    fields = {k: json.dumps(data[k], ensure_ascii=False, default=str) for k in names}
+    with _LOCK:
+        _PENDING[0] += 1
+    _ensure_writer()
+    _QUEUE.put((key, fields))
+
+
+def flush(timeout: Optional[float] = 30.0) -> bool:
+    """Block until every queued update is in its journal. Returns False on timeout."""
+    _FLUSH_NOW.set()
+    with _COND:
+        ok = _COND.wait_for(lambda: _PENDING[0] <= 0, timeout=timeout)
+    if not ok:
+        _log(f"[LOG] run log flush timed out with {_PENDING[0]} updates pending")
+    return ok
+
+
+def move(old_path: str, new_path: str) -> None:
+    """Re-key a run after its folder was renamed (flush() first so nothing lands in the old folder)."""
+    with _LOCK:
+        run = _RUNS.pop(_key(old_path), None)
+        if run is not None:
+            _RUNS[_key(new_path)] = run
+
+
+def finish(path: str, data: Optional[Dict[str, Any]] = None) -> None:
+    """Write profile.json once from the final state and drop the journal."""
+    if not path:
+        return
+    key = _key(path)
+    flush()
+    with _LOCK:
+        run = _RUNS.pop(key, None)
+    if data is None:
+        data = run["data"] if run else read_run(key)
+    if not data:
+        return
+    try:
+        _write_json(key, data)
+        if os.path.isfile(journal_path(key)):
+            os.remove(journal_path(key))
+    except Exception as e:
+        print(f"[LOG] failed to write {path}: {e}")
+
+
+def finish_thread() -> None:
+    """Finish every run this thread opened (for early returns and errors)."""
+    me = threading.get_ident()
+    with _LOCK:
+        mine = [p for p, run in _RUNS.items() if run["thread"] == me]
+    for path in mine:
+        finish(path)
+
+
+def read_run(path: str) -> Dict[str, Any]:
+    """State of a run: replayed from its journal if one is left, else profile.json."""
+    jpath = journal_path(path)
+    if os.path.isfile(jpath):
+        state: Dict[str, Any] = {}
+        with open(jpath, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    state.update(json.loads(line)["set"])
+                except (ValueError, KeyError, TypeError):
+                    # Torn write from a crash; later lines are still valid updates.
+                    continue
+        if isinstance(state.get("meta"), dict):
+            state["meta"]["total_cost_usd"] = total_cost(state)
+        return state
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def recover(root: str = "logs") -> int:
+    """Materialize profile.json for journals left behind by a crashed run. Returns how many."""
+    suffix = ".journal.jsonl"
+    with _LOCK:
+        open_runs = {journal_path(p) for p in _RUNS}
+    recovered = 0
+    for jpath in glob.glob(os.path.join(glob.escape(root), "**", f"*{suffix}"), recursive=True):
+        jpath = _key(jpath)
+        if jpath in open_runs:
+            continue
+        path = jpath[: -len(suffix)] + ".json"
+        try:
+            data = read_run(path)
+            if data:
+                _write_json(path, data)
+            os.remove(jpath)
+            recovered += 1
+        except Exception as e:
+            _log(f"[LOG] could not recover {jpath}: {e}")
+    if recovered:
+        _log(f"[LOG] recovered {recovered} run log(s) from leftover journals")
+    return recovered
+
+
+def _finish_all() -> None:
+    with _LOCK:
+        paths = list(_RUNS)
+    for path in paths:
+        finish(path)
+
+
+atexit.register(_finish_all)
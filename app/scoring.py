@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from profile_utils import _get_core, _get_visual, _norm_value, _split_csv
 
@@ -28,10 +28,301 @@ def _calc_age_delta_years(declared_age: Optional[int], apparent_age: Optional[in
     return int(declared_age) - int(apparent_age)
 
 
+# Rule tables
+#
+# Scoring is data: each side is an ordered list of rules, evaluated in order, and
+# every non-zero delta becomes one "contributions" entry (<= -1000 is a hard kill).
+# Rule kinds:
+#   match    normalized field value looked up in `deltas`; `default` applies to any
+#            other non-empty value; optional `caps` clamp the delta when another
+#            field of the same source matches (== / !=) a value
+#   present  `delta` if the raw value is non-blank
+#   any_of   comma-separated field; `delta` once if any item is in `values`
+#   each     comma-separated field; every item looked up in `deltas` (else
+#            `default`); `suppress` skips an item when another field equals a value
+#   age      declared age on a two-sided curve around `pivot`:
+#            peak - a*(age-pivot)^2 - b*(age-pivot), (a, b) from `below`/`above`
+#   height   first (min_cm, delta) band the declared height reaches
+#   flag     integer LLM2 flag; `values` maps the flag to (label, delta)
+#   eval     LLM2 value at `path`, normalized by `normalize` ("norm"/"upper"),
+#            looked up in `deltas`; the table key is logged as the value
+# Keys in the tables are written as they appear in the prompts; _compile_rules
+# normalizes them once at import so evaluation only normalizes the profile side.
+
+_CORE = "Core Biometrics"
+_VISUAL = "Visual Analysis"
+_EVAL = "Profile Eval"
+
+_ACTIVE_NOW = {"now": 5, "today": 5, "active now": 5, "active today": 5}
+_SEXUALITY = {"kind": "match", "section": _CORE, "source": "core", "key": "Sexuality",
+              "deltas": {"Bisexual": 5, "Straight": 0}, "default": -5}
+_HEIGHT = {"kind": "height", "section": _CORE, "key": "Height", "bands": [(185, 20), (176, 10)]}
+_FACE_VISIBILITY = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Face Visibility Quality",
+                    "deltas": {"Clear face in 3+ photos": 0, "Clear face in 1-2 photos": -5,
+                               "Face often partially obscured": -10, "Face mostly not visible": -20}}
+_PHOTO_EDITING = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Photo Authenticity / Editing Level",
+                  "deltas": {"No obvious filters": 0, "Some filters or mild editing": -5,
+                             "Heavy filters/face smoothing": -20, "Unclear": 0}}
+_BODY_FAT = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Apparent Body Fat Level",
+             "deltas": {"Low": 0, "Average": 0, "High": -10, "Very high": -1000, "Unclear": 0}}
+_DISTINCTIVENESS = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Profile Distinctiveness",
+                    "deltas": {"High (specific/unique)": 5, "Medium": 0, "Low (generic/boilerplate)": -5, "Unclear": 0}}
+_ATTRACTIVENESS = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Apparent Attractiveness Tier",
+                   "deltas": {"Negligible": -1000, "Low / Unattractive": -1000, "Limited / Below Average": -30,
+                              "Average / Moderate": 0, "High / Above Average": 0, "Exceptional / Elite": 0},
+                   "caps": [("Face Visibility Quality", "!=", "Clear face in 3+ photos", 5),
+                            ("Photo Authenticity / Editing Level", "==", "Heavy filters/face smoothing", 0)]}
+_SYMMETRY = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Facial Symmetry Level",
+             "deltas": {"Low": -1000}}
+_LIP_FILLER = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Visible Lip Filler",
+               "deltas": {"Obvious": -15, "Extreme": -30}}
+_PIERCING = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Visible Piercing Level",
+             "deltas": {"High": -1000, "Moderate": -25, "None visible": 10}}
+_BUILD = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Apparent Build Category",
+          "deltas": {"Obese/high body fat": -1000, "Curvy (softer proportions)": 5, "Muscular/built": 10}}
+_SKIN = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Apparent Skin Tone",
+         "deltas": {"Light/beige": 5, "Very light/pale/fair": 10}}
+_ETHNIC = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Apparent Ethnic Features",
+           "deltas": {"Southeast Asian-presenting": -20, "South Asian-presenting": -30,
+                      "Middle Eastern/Arab-presenting": -10, "Mixed/Ambiguous": -5, "Black/African-presenting": -1000}}
+_CHEST = {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Apparent Chest Proportions",
+          "deltas": {"Petite/small/narrow": -5, "Average/balanced/proportional": 0}, "default": 5}
+_ENHANCEMENTS = {"kind": "each", "section": _VISUAL, "source": "visual", "key": "Visible Enhancements or Features",
+                 "deltas": {"Glasses": 5, "Makeup (heavy)": -10, "Very long nails (2cm+)": -10}}
+_RED_FLAGS = {"kind": "each", "section": _VISUAL, "source": "visual", "key": "Presentation Red Flags",
+              "deltas": {"None": 0}, "default": -5,
+              "suppress": {"Heavy filters/face smoothing": ("Photo Authenticity / Editing Level", "Heavy filters/face smoothing")}}
+_FINANCIAL = {"kind": "flag", "section": _EVAL, "key": "financial_expectation_flag",
+              "field": "Financial Expectation Flag", "values": {1: ("Yes", -1000)}}
+_WITCHY = {"kind": "flag", "section": _EVAL, "key": "spiritual_witchy_flag",
+           "field": "Spiritual/Witchy Flag", "values": {1: ("Medium", -10), 2: ("High", -20)}}
+_UNI_ELITE = {"kind": "flag", "section": _EVAL, "key": "university_elite",
+              "field": "University Elite", "values": {1: ("Yes", 10)}}
+
 # Long Weightings
-def _score_profile_long(extracted: Dict[str, Any], eval_result: Dict[str, Any]) -> Dict[str, Any]:
-    core = _get_core(extracted)
-    visual = _get_visual(extracted)
+LONG_RULES: List[Dict[str, Any]] = [
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Gender", "deltas": {"Non-binary": -1000}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Children", "deltas": {"Have children": -1000}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Dating Intentions", "deltas": {"Life partner": -20}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Smoking", "deltas": {"Yes": -1000, "Sometimes": -20}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Marijuana", "deltas": {"Yes": -1000, "Sometimes": -20}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Drugs", "deltas": {"Yes": -1000, "Sometimes": -20}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Active Status", "deltas": _ACTIVE_NOW},
+    _SEXUALITY,
+    {"kind": "present", "section": _CORE, "source": "core", "key": "Zodiac Sign", "delta": -5},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Religious Beliefs",
+     "deltas": {"Atheist": 10, "Jewish": 10, "Muslim": -1000, "Buddhist": 0, "Agnostic": 0}, "default": -10},
+    {"kind": "age", "section": _CORE, "key": "Age", "pivot": 25, "peak": 30, "below": (0.7, 0.0), "above": (0.6, 2.0)},
+    _HEIGHT,
+    _FACE_VISIBILITY,
+    _PHOTO_EDITING,
+    _BODY_FAT,
+    _DISTINCTIVENESS,
+    {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Short-Term / Hookup Orientation Signals",
+     "deltas": {"High": -5}},
+    _ATTRACTIVENESS,
+    _SYMMETRY,
+    _LIP_FILLER,
+    {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Hair Color", "deltas": {"Red/ginger": 10}},
+    {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Visible Tattoo Level", "deltas": {"High": -10}},
+    _PIERCING,
+    _BUILD,
+    _SKIN,
+    _ETHNIC,
+    _CHEST,
+    _ENHANCEMENTS,
+    _RED_FLAGS,
+    _FINANCIAL,
+    _WITCHY,
+    {"kind": "flag", "section": _EVAL, "key": "exhausting_demands_flag",
+     "field": "Exhausting Demands Flag", "values": {1: ("Yes", -10)}},
+    {"kind": "eval", "section": _EVAL, "path": ("job", "band"), "normalize": "norm",
+     "field": "Job Tier", "deltas": {"T0": -20, "T1": -5, "T3": 10, "T4": 20}},
+    _UNI_ELITE,
+    {"kind": "eval", "section": _EVAL, "path": ("home_country_iso",), "normalize": "upper",
+     "field": "Home Country", "deltas": {"US": 15}},
+]
+
+# Short Weightings
+SHORT_RULES: List[Dict[str, Any]] = [
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Gender", "deltas": {"Non-binary": -1000}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Children", "deltas": {"Have children": -20}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Dating Intentions",
+     "deltas": {"Life partner": -5, "Long-term relationship, open to short": 10, "Short-term relationship": 15,
+                "Short-term relationship, open to long": 10, "Figuring out my dating goals": 10}},
+    {"kind": "any_of", "section": _CORE, "source": "core", "key": "Relationship type",
+     "values": ["Non-Monogamy", "Figuring out my relationship type"], "delta": 10},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Drinking", "deltas": {"Sometimes": 5}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Smoking", "deltas": {"Yes": -1000, "Sometimes": -20}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Marijuana", "deltas": {"Yes": -20, "Sometimes": -20}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Drugs", "deltas": {"Yes": -1000, "Sometimes": -20}},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Active Status", "deltas": _ACTIVE_NOW},
+    _SEXUALITY,
+    {"kind": "present", "section": _CORE, "source": "core", "key": "Zodiac Sign", "delta": -5},
+    {"kind": "match", "section": _CORE, "source": "core", "key": "Religious Beliefs", "deltas": {"Muslim": -10}},
+    {"kind": "age", "section": _CORE, "key": "Age", "pivot": 23, "peak": 30, "below": (0.4, 0.0), "above": (0.6, 0.0)},
+    _HEIGHT,
+    _FACE_VISIBILITY,
+    _PHOTO_EDITING,
+    _BODY_FAT,
+    _DISTINCTIVENESS,
+    {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Overall Visual Appeal Vibe",
+     "deltas": {"Playful/flirty": 5, "Sensual/alluring": 5, "Very low-key/understated": -5}},
+    {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Attire and Style Indicators",
+     "deltas": {"Very modest/covered": -10, "Form-fitting/suggestive": 10, "Highly revealing": 10, "Edgy/alternative": 10}},
+    {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Body Language and Expression",
+     "deltas": {"Confident/engaging": 5, "Playful/flirty": 5}},
+    {"kind": "each", "section": _VISUAL, "source": "visual", "key": "Indicators of Fitness or Lifestyle",
+     "deltas": {"Visible muscle tone": 10, "Athletic poses": 10}},
+    {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Short-Term / Hookup Orientation Signals",
+     "deltas": {"Low": 0, "Moderate": 10, "High": 15}},
+    _ATTRACTIVENESS,
+    _SYMMETRY,
+    _LIP_FILLER,
+    {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Hair Color",
+     "deltas": {"Red/ginger": 20, "Dyed blue": 10, "Dyed pink": 10, "Dyed (unnatural other)": 10,
+                "Dyed (mixed/multiple colors)": 10}},
+    _PIERCING,
+    _BUILD,
+    _SKIN,
+    _ETHNIC,
+    _CHEST,
+    _ENHANCEMENTS,
+    _RED_FLAGS,
+    {"kind": "match", "section": _VISUAL, "source": "visual", "key": "Grooming Effort Level",
+     "deltas": {"Minimal/natural": -5}},
+    _FINANCIAL,
+    _WITCHY,
+    {"kind": "flag", "section": _EVAL, "key": "exhausting_demands_flag",
+     "field": "Exhausting Demands Flag", "values": {1: ("Yes", -20)}},
+    {"kind": "eval", "section": _EVAL, "path": ("job", "band"), "normalize": "norm",
+     "field": "Job Tier", "deltas": {"T0": -10, "T1": -5, "T3": 5, "T4": 10}},
+    _UNI_ELITE,
+]
+
+
+def _normalizer(name: str) -> Callable[[Any], str]:
+    if name == "upper":
+        return lambda v: str(v or "").upper().strip()
+    return _norm_value
+
+
+def _compile_rules(rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pre-normalize every table key so evaluation is one dict lookup per field."""
+    compiled: List[Dict[str, Any]] = []
+    for rule in rules:
+        c = dict(rule)
+        c.setdefault("field", rule.get("key"))
+        kind = rule["kind"]
+        if kind in ("match", "each"):
+            c["deltas"] = {_norm_value(k): v for k, v in rule.get("deltas", {}).items()}
+            c["caps"] = [(key, op, _norm_value(val), cap) for key, op, val, cap in rule.get("caps", [])]
+            c["suppress"] = {_norm_value(k): (key, _norm_value(val)) for k, (key, val) in rule.get("suppress", {}).items()}
+        elif kind == "any_of":
+            c["values"] = frozenset(_norm_value(v) for v in rule["values"])
+        elif kind == "eval":
+            norm = _normalizer(rule.get("normalize", "norm"))
+            c["norm"] = norm
+            c["deltas"] = {norm(k): (k, v) for k, v in rule["deltas"].items()}
+        elif kind not in ("present", "age", "height", "flag"):
+            raise ValueError(f"unknown scoring rule kind: {kind}")
+        compiled.append(c)
+    return compiled
+
+
+def _declared_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None and str(value).strip() != "" else None
+    except Exception:
+        return None
+
+
+def _eval_path(eval_result: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    node: Any = eval_result
+    for key in path[:-1]:
+        node = node.get(key) or {}
+    return node.get(path[-1], "")
+
+
+def _apply_rule(
+    rule: Dict[str, Any],
+    sources: Dict[str, Dict[str, Any]],
+    eval_result: Dict[str, Any],
+    norm_of: Callable[[str, str], str],
+) -> List[Tuple[Any, int]]:
+    """(value, delta) pairs one compiled rule produces for a profile; zero deltas included."""
+    kind = rule["kind"]
+    out: List[Tuple[Any, int]] = []
+    if kind == "match":
+        src = rule["source"]
+        norm = norm_of(src, rule["key"])
+        if norm in rule["deltas"]:
+            delta = rule["deltas"][norm]
+        elif norm and "default" in rule:
+            delta = rule["default"]
+        else:
+            return out
+        for key, op, val, cap in rule["caps"]:
+            if (norm_of(src, key) == val) == (op == "=="):
+                delta = min(delta, cap)
+        out.append((sources[src].get(rule["key"], ""), delta))
+    elif kind == "present":
+        raw = sources[rule["source"]].get(rule["key"], "")
+        if str(raw).strip():
+            out.append((raw, rule["delta"]))
+    elif kind == "any_of":
+        raw = sources[rule["source"]].get(rule["key"], "")
+        if any(_norm_value(v) in rule["values"] for v in _split_csv(raw)):
+            out.append((raw, rule["delta"]))
+    elif kind == "each":
+        src = rule["source"]
+        for item in _split_csv(sources[src].get(rule["key"], "")):
+            item_norm = _norm_value(item)
+            guard = rule["suppress"].get(item_norm)
+            if guard and norm_of(src, guard[0]) == guard[1]:
+                continue
+            if item_norm in rule["deltas"]:
+                out.append((item, rule["deltas"][item_norm]))
+            elif "default" in rule:
+                out.append((item, rule["default"]))
+    elif kind == "age":
+        raw = sources["core"].get(rule["key"], "")
+        age = _declared_int(raw)
+        if age is not None:
+            d = age - rule["pivot"]
+            a, b = rule["below"] if age < rule["pivot"] else rule["above"]
+            out.append((raw, int(round(rule["peak"] - a * d**2 - b * d))))
+    elif kind == "height":
+        height_int = _declared_int(sources["core"].get(rule["key"], ""))
+        if height_int is not None:
+            for min_cm, delta in rule["bands"]:
+                if height_int >= min_cm:
+                    out.append((f"{height_int}", delta))
+                    break
+    elif kind == "flag":
+        hit = rule["values"].get(int(eval_result.get(rule["key"], 0) or 0))
+        if hit:
+            out.append(hit)
+    elif kind == "eval":
+        hit = rule["deltas"].get(rule["norm"](_eval_path(eval_result, rule["path"])))
+        if hit:
+            out.append(hit)
+    return out
+
+
+def _evaluate_rules(
+    compiled: List[Dict[str, Any]],
+    extracted: Dict[str, Any],
+    eval_result: Dict[str, Any],
+) -> Dict[str, Any]:
+    sources = {"core": _get_core(extracted), "visual": _get_visual(extracted)}
+    norms: Dict[Tuple[str, str], str] = {}
+
+    def norm_of(source: str, key: str) -> str:
+        nk = (source, key)
+        if nk not in norms:
+            norms[nk] = _norm_value(sources[source].get(key, ""))
+        return norms[nk]
 
     contribs: List[Dict[str, Any]] = []
     hard_kills: List[Dict[str, Any]] = []
@@ -44,329 +335,18 @@ def _score_profile_long(extracted: Dict[str, Any], eval_result: Dict[str, Any])
         if delta <= -1000:
             hard_kills.append(entry)
 
-    def core_val(key: str) -> Any:
-        return core.get(key, "")
-
-    def visual_val(key: str) -> Any:
-        return visual.get(key, "")
-
-    # Core Biometrics
-    gender = core_val("Gender")
-    gender_norm = _norm_value(gender)
-    if gender_norm == _norm_value("Non-binary"):
-        record("Core Biometrics", "Gender", gender, -1000)
-
-    children = core_val("Children")
-    if _norm_value(children) == _norm_value("Have children"):
-        record("Core Biometrics", "Children", children, -1000)
-
-    dating = core_val("Dating Intentions")
-    dating_norm = _norm_value(dating)
-    if dating_norm == _norm_value("Life partner"):
-        record("Core Biometrics", "Dating Intentions", dating, -20)
-
-    smoking = core_val("Smoking")
-    smoking_norm = _norm_value(smoking)
-    if smoking_norm == _norm_value("Yes"):
-        record("Core Biometrics", "Smoking", smoking, -1000)
-    elif smoking_norm == _norm_value("Sometimes"):
-        record("Core Biometrics", "Smoking", smoking, -20)
-
-    marijuana = core_val("Marijuana")
-    marijuana_norm = _norm_value(marijuana)
-    if marijuana_norm == _norm_value("Yes"):
-        record("Core Biometrics", "Marijuana", marijuana, -1000)
-    elif marijuana_norm == _norm_value("Sometimes"):
-        record("Core Biometrics", "Marijuana", marijuana, -20)
-
-    drugs = core_val("Drugs")
-    drugs_norm = _norm_value(drugs)
-    if drugs_norm == _norm_value("Yes"):
-        record("Core Biometrics", "Drugs", drugs, -1000)
-    elif drugs_norm == _norm_value("Sometimes"):
-        record("Core Biometrics", "Drugs", drugs, -20)
-
-    active_status = core_val("Active Status")
-    active_norm = _norm_value(active_status)
-    if active_norm in {_norm_value("now"), _norm_value("today"), _norm_value("active now"), _norm_value("active today")}:
-        record("Core Biometrics", "Active Status", active_status, +5)
-
-    sexuality = core_val("Sexuality")
-    sexuality_norm = _norm_value(sexuality)
-    if sexuality_norm == _norm_value("Bisexual"):
-        record("Core Biometrics", "Sexuality", sexuality, +5)
-    elif sexuality_norm and sexuality_norm != _norm_value("Straight"):
-        record("Core Biometrics", "Sexuality", sexuality, -5)
-
-    zodiac = core_val("Zodiac Sign")
-    if str(zodiac).strip():
-        record("Core Biometrics", "Zodiac Sign", zodiac, -5)
-
-    religion = core_val("Religious Beliefs")
-    religion_norm = _norm_value(religion)
-    if religion_norm == _norm_value("Atheist"):
-        record("Core Biometrics", "Religious Beliefs", religion, +10)
-    elif religion_norm == _norm_value("Jewish"):
-        record("Core Biometrics", "Religious Beliefs", religion, +10)
-    elif religion_norm == _norm_value("Muslim"):
-        record("Core Biometrics", "Religious Beliefs", religion, -1000)
-    elif religion_norm == _norm_value("Buddhist"):
-        record("Core Biometrics", "Religous Beliefs", religion, 0)
-    elif religion_norm == _norm_value("Agnostic"):
-        record("Core Biometrics", "Religious Beliefs", religion, 0)
-    elif religion_norm:
-        record("Core Biometrics", "Religious Beliefs", religion, -10)
-
-    # Age weighting (declared age only)
-    declared_age = core_val("Age")
-    declared_age_int = None
-    try:
-        declared_age_int = int(declared_age) if declared_age is not None and str(declared_age).strip() != "" else None
-    except Exception:
-        declared_age_int = None
-    if declared_age_int is not None:
-        if declared_age_int < 25:
-            age_score = int(round(30 - 0.7 * (declared_age_int - 25)**2))
-        else:
-            age_score = int(round(30 - 0.6 * (declared_age_int - 25)**2 - 2.0 * (declared_age_int - 25)))
-        record("Core Biometrics", "Age", declared_age, age_score)
-
-    # Height weighting (declared height only)
-    height = core_val("Height")
-    height_int = None
-    try:
-        height_int = int(height) if height is not None and str(height).strip() != "" else None
-    except Exception:
-        height_int = None
-    if height_int is not None:
-        if height_int >= 185:
-            record("Core Biometrics", "Height", f"{height_int}", +20)
-        elif height_int > 175:
-            record("Core Biometrics", "Height", f"{height_int}", +10)
-
-    # Visual Analysis
-    face_visibility = visual_val("Face Visibility Quality")
-    face_visibility_norm = _norm_value(face_visibility)
-    face_visibility_deltas = {
-        _norm_value("Clear face in 3+ photos"): 0,
-        _norm_value("Clear face in 1-2 photos"): -5,
-        _norm_value("Face often partially obscured"): -10,
-        _norm_value("Face mostly not visible"): -20,
-    }
-    if face_visibility_norm in face_visibility_deltas:
-        record(
-            "Visual Analysis",
-            "Face Visibility Quality",
-            face_visibility,
-            face_visibility_deltas[face_visibility_norm],
-        )
+    declared_age_int = _declared_int(sources["core"].get("Age", ""))
 
-    photo_editing = visual_val("Photo Authenticity / Editing Level")
-    photo_editing_norm = _norm_value(photo_editing)
-    photo_editing_deltas = {
-        _norm_value("No obvious filters"): 0,
-        _norm_value("Some filters or mild editing"): -5,
-        _norm_value("Heavy filters/face smoothing"): -20,
-        _norm_value("Unclear"): 0,
-    }
-    if photo_editing_norm in photo_editing_deltas:
-        record(
-            "Visual Analysis",
-            "Photo Authenticity / Editing Level",
-            photo_editing,
-            photo_editing_deltas[photo_editing_norm],
-        )
-
-    body_fat = visual_val("Apparent Body Fat Level")
-    body_fat_norm = _norm_value(body_fat)
-    body_fat_deltas = {
-        _norm_value("Low"): 0,
-        _norm_value("Average"): 0,
-        _norm_value("High"): -10,
-        _norm_value("Very high"): -1000,
-        _norm_value("Unclear"): 0,
-    }
-    if body_fat_norm in body_fat_deltas:
-        record(
-            "Visual Analysis",
-            "Apparent Body Fat Level",
-            body_fat,
-            body_fat_deltas[body_fat_norm],
-        )
-
-    distinctiveness = visual_val("Profile Distinctiveness")
-    distinctiveness_norm = _norm_value(distinctiveness)
-    distinctiveness_deltas = {
-        _norm_value("High (specific/unique)"): 5,
-        _norm_value("Medium"): 0,
-        _norm_value("Low (generic/boilerplate)"): -5,
-        _norm_value("Unclear"): 0,
-    }
-    if distinctiveness_norm in distinctiveness_deltas:
-        record(
-            "Visual Analysis",
-            "Profile Distinctiveness",
-            distinctiveness,
-            distinctiveness_deltas[distinctiveness_norm],
-        )
-
-    short_term = visual_val("Short-Term / Hookup Orientation Signals")
-    short_term_norm = _norm_value(short_term)
-    if short_term_norm == _norm_value("High"):
-        record("Visual Analysis", "Short-Term / Hookup Orientation Signals", short_term, -5)
-
-    attractiveness = visual_val("Apparent Attractiveness Tier")
-    attractiveness_norm = _norm_value(attractiveness)
-    attractiveness_deltas = {
-        _norm_value("Negligible"): -1000,
-        _norm_value("Low / Unattractive"): -1000,
-        _norm_value("Limited / Below Average"): -30,
-        _norm_value("Average / Moderate"): 0,
-        _norm_value("High / Above Average"): 0,
-        _norm_value("Exceptional / Elite"): 0,
-    }
-    if attractiveness_norm in attractiveness_deltas:
-        att_delta = attractiveness_deltas[attractiveness_norm]
-        if face_visibility_norm != _norm_value("Clear face in 3+ photos"):
-            att_delta = min(att_delta, 5)
-        if photo_editing_norm == _norm_value("Heavy filters/face smoothing"):
-            att_delta = min(att_delta, 0)
-        record(
-            "Visual Analysis",
-            "Apparent Attractiveness Tier",
-            attractiveness,
-            att_delta,
-        )
-
-    symmetry = visual_val("Facial Symmetry Level")
-    symmetry_norm = _norm_value(symmetry)
-    if symmetry_norm == _norm_value("Low"):
-        record("Visual Analysis", "Facial Symmetry Level", symmetry, -1000)
-
-    lip_filler = visual_val("Visible Lip Filler")
-    lip_filler_norm = _norm_value(lip_filler)
-    if lip_filler_norm == _norm_value("Obvious"):
-        record("Visual Analysis", "Visible Lip Filler", lip_filler, -15)
-    elif lip_filler_norm == _norm_value("Extreme"):
-        record("Visual Analysis", "Visible Lip Filler", lip_filler, -30)
-
-    hair_color = visual_val("Hair Color")
-    if _norm_value(hair_color) == _norm_value("Red/ginger"):
-        record("Visual Analysis", "Hair Color", hair_color, +10)
-
-    tattoo = visual_val("Visible Tattoo Level")
-    if _norm_value(tattoo) == _norm_value("High"):
-        record("Visual Analysis", "Visible Tattoo Level", tattoo, -10)
-
-    piercing = visual_val("Visible Piercing Level")
-    piercing_norm = _norm_value(piercing)
-    if piercing_norm == _norm_value("High"):
-        record("Visual Analysis", "Visible Piercing Level", piercing, -1000)
-    elif piercing_norm == _norm_value("Moderate"):
-        record("Visual Analysis", "Visible Piercing Level", piercing, -25)
-    elif piercing_norm == _norm_value("None visible"):
-        record("Visual Analysis", "Visible Piercing Level", piercing, +10)
-
-    build = visual_val("Apparent Build Category")
-    build_norm = _norm_value(build)
-    if build_norm == _norm_value("Obese/high body fat"):
-        record("Visual Analysis", "Apparent Build Category", build, -1000)
-    elif build_norm == _norm_value("Curvy (softer proportions)"):
-        record("Visual Analysis", "Apparent Build Category", build, +5)
-    elif build_norm == _norm_value("Muscular/built"):
-        record("Visual Analysis", "Apparent Build Category", build, +10)
-
-    skin = visual_val("Apparent Skin Tone")
-    skin_norm = _norm_value(skin)
-    if skin_norm == _norm_value("Light/beige"):
-        record("Visual Analysis", "Apparent Skin Tone", skin, +5)
-    elif skin_norm == _norm_value("Very light/pale/fair"):
-        record("Visual Analysis", "Apparent Skin Tone", skin, +10)
-
-    ethnic = visual_val("Apparent Ethnic Features")
-    ethnic_norm = _norm_value(ethnic)
-    if ethnic_norm == _norm_value("Southeast Asian-presenting"):
-        record("Visual Analysis", "Apparent Ethnic Features", ethnic, -20)
-    elif ethnic_norm == _norm_value("South Asian-presenting"):
-        record("Visual Analysis", "Apparent Ethnic Features", ethnic, -30)
-    elif ethnic_norm == _norm_value("Middle Eastern/Arab-presenting"):
-        record("Visual Analysis", "Apparent Ethnic Features", ethnic, -10)
-    elif ethnic_norm == _norm_value("Mixed/Ambiguous"):
-        record("Visual Analysis", "Apparent Ethnic Features", ethnic, -5)
-    elif ethnic_norm == _norm_value("Black/African-presenting"):
-        record("Visual Analysis", "Apparent Ethnic Features", ethnic, -1000)
-
-
-    chest = visual_val("Apparent Chest Proportions")
-    chest_norm = _norm_value(chest)
-    if chest_norm == _norm_value("Petite/small/narrow"):
-        record("Visual Analysis", "Apparent Chest Proportions", chest, -5)
-    elif chest_norm and chest_norm != _norm_value("Average/balanced/proportional"):
-        record("Visual Analysis", "Apparent Chest Proportions", chest, +5)
-
-    enhancements = _split_csv(visual_val("Visible Enhancements or Features"))
-    for item in enhancements:
-        item_norm = _norm_value(item)
-        if item_norm == _norm_value("Glasses"):
-            record("Visual Analysis", "Visible Enhancements or Features", item, +5)
-        elif item_norm == _norm_value("Makeup (heavy)"):
-            record("Visual Analysis", "Visible Enhancements or Features", item, -10)
-        elif item_norm == _norm_value("Very long nails (2cm+)"):
-            record("Visual Analysis", "Visible Enhancements or Features", item, -10)
-
-    red_flags = _split_csv(visual_val("Presentation Red Flags"))
-    for flag in red_flags:
-        flag_norm = _norm_value(flag)
-        if flag_norm == _norm_value("None"):
-            continue
-        if flag_norm == _norm_value("Heavy filters/face smoothing") and photo_editing_norm == _norm_value("Heavy filters/face smoothing"):
-            continue
-        record("Visual Analysis", "Presentation Red Flags", flag, -5)
-
-    # Profile Evaluation (LLM2)
-    financial_expectation_flag = int(eval_result.get("financial_expectation_flag", 0) or 0)
-    if financial_expectation_flag == 1:
-        record("Profile Eval", "Financial Expectation Flag", "Yes", -1000)
-
-    spiritual_witchy_flag = int(eval_result.get("spiritual_witchy_flag", 0) or 0)
-    if spiritual_witchy_flag == 1:
-        record("Profile Eval", "Spiritual/Witchy Flag", "Medium", -10)
-    elif spiritual_witchy_flag == 2:
-        record("Profile Eval", "Spiritual/Witchy Flag", "High", -20)
-
-    exhausting_demands_flag = int(eval_result.get("exhausting_demands_flag", 0) or 0)
-    if exhausting_demands_flag == 1:
-        record("Profile Eval", "Exhausting Demands Flag", "Yes", -10)
-
-    job_band = _norm_value((eval_result.get("job") or {}).get("band", ""))
-    if job_band == _norm_value("T0"):
-        record("Profile Eval", "Job Tier", "T0", -20)
-    elif job_band == _norm_value("T1"):
-        record("Profile Eval", "Job Tier", "T1", -5)
-    elif job_band == _norm_value("T3"):
-        record("Profile Eval", "Job Tier", "T3", +10)
-    elif job_band == _norm_value("T4"):
-        record("Profile Eval", "Job Tier", "T4", +20)
-
-    university_elite = int(eval_result.get("university_elite", 0) or 0)
-    if university_elite == 1:
-        record("Profile Eval", "University Elite", "Yes", +10)
-
-    home_iso = str(eval_result.get("home_country_iso", "") or "").upper().strip()
-    home_score = 0
-    if home_iso == "US":
-        home_score = 15
-    if home_score:
-        record("Profile Eval", "Home Country", home_iso or "(unresolved)", home_score)
+    for rule in compiled:
+        for value, delta in _apply_rule(rule, sources, eval_result, norm_of):
+            record(rule["section"], rule["field"], value, delta)
 
     # Age delta (logged only)
-    apparent_age_years = _parse_int(visual_val("Apparent Age (Years)"))
+    apparent_age_years = _parse_int(sources["visual"].get("Apparent Age (Years)", ""))
     age_delta_years = _calc_age_delta_years(declared_age_int, apparent_age_years)
 
-    score_total = sum(c["delta"] for c in contribs)
-
     return {
-        "score": int(score_total),
+        "score": int(sum(c["delta"] for c in contribs)),
         "hard_kills": hard_kills,
         "contributions": contribs,
         "signals": {
@@ -376,422 +356,22 @@ def _score_profile_long(extracted: Dict[str, Any], eval_result: Dict[str, Any])
         },
         "profile_eval_inputs": {
             "job_band": (eval_result.get("job") or {}).get("band", ""),
-            "university_elite": university_elite,
-            "home_country_iso": home_iso,
+            "university_elite": int(eval_result.get("university_elite", 0) or 0),
+            "home_country_iso": str(eval_result.get("home_country_iso", "") or "").upper().strip(),
         },
     }
 
 
-# Short Weightings
-def _score_profile_short(extracted: Dict[str, Any], eval_result: Dict[str, Any]) -> Dict[str, Any]:
-    core = _get_core(extracted)
-    visual = _get_visual(extracted)
+_LONG_COMPILED = _compile_rules(LONG_RULES)
+_SHORT_COMPILED = _compile_rules(SHORT_RULES)
 
-    contribs: List[Dict[str, Any]] = []
-    hard_kills: List[Dict[str, Any]] = []
-
-    def record(section: str, field: str, value: Any, delta: int) -> None:
-        if delta == 0:
-            return
-        entry = {"section": section, "field": field, "value": value, "delta": int(delta)}
-        contribs.append(entry)
-        if delta <= -1000:
-            hard_kills.append(entry)
 
-    def core_val(key: str) -> Any:
-        return core.get(key, "")
-
-    def visual_val(key: str) -> Any:
-        return visual.get(key, "")
-
-    # Core Biometrics
-    gender = core_val("Gender")
-    gender_norm = _norm_value(gender)
-    if gender_norm == _norm_value("Non-binary"):
-        record("Core Biometrics", "Gender", gender, -1000)
-
-    children = core_val("Children")
-    if _norm_value(children) == _norm_value("Have children"):
-        record("Core Biometrics", "Children", children, -20)
-
-    dating = core_val("Dating Intentions")
-    dating_norm = _norm_value(dating)
-    dating_deltas = {
-        _norm_value("Life partner"): -5,
-        _norm_value("Long-term relationship, open to short"): +10,
-        _norm_value("Short-term relationship"): +15,
-        _norm_value("Short-term relationship, open to long"): +10,
-        _norm_value("Figuring out my dating goals"): +10,
-    }
-    if dating_norm in dating_deltas:
-        record("Core Biometrics", "Dating Intentions", dating, dating_deltas[dating_norm])
-
-    relationship = core_val("Relationship type")
-    relationship_norms = {_norm_value(r) for r in _split_csv(relationship)}
-    if relationship_norms.intersection({
-        _norm_value("Non-Monogamy"),
-        _norm_value("Figuring out my relationship type"),
-    }):
-        record("Core Biometrics", "Relationship type", relationship, +10)
-
-    drinking = core_val("Drinking")
-    if _norm_value(drinking) == _norm_value("Sometimes"):
-        record("Core Biometrics", "Drinking", drinking, +5)
-
-    smoking = core_val("Smoking")
-    smoking_norm = _norm_value(smoking)
-    if smoking_norm == _norm_value("Yes"):
-        record("Core Biometrics", "Smoking", smoking, -1000)
-    elif smoking_norm == _norm_value("Sometimes"):
-        record("Core Biometrics", "Smoking", smoking, -20)
-
-    marijuana = core_val("Marijuana")
-    marijuana_norm = _norm_value(marijuana)
-    if marijuana_norm == _norm_value("Yes"):
-        record("Core Biometrics", "Marijuana", marijuana, -20)
-    elif marijuana_norm == _norm_value("Sometimes"):
-        record("Core Biometrics", "Marijuana", marijuana, -20)
-
-    drugs = core_val("Drugs")
-    drugs_norm = _norm_value(drugs)
-    if drugs_norm == _norm_value("Yes"):
-        record("Core Biometrics", "Drugs", drugs, -1000)
-    elif drugs_norm == _norm_value("Sometimes"):
-        record("Core Biometrics", "Drugs", drugs, -20)
-
-    active_status = core_val("Active Status")
-    active_norm = _norm_value(active_status)
-    if active_norm in {_norm_value("now"), _norm_value("today"), _norm_value("active now"), _norm_value("active today")}:
-        record("Core Biometrics", "Active Status", active_status, +5)
-
-    sexuality = core_val("Sexuality")
-    sexuality_norm = _norm_value(sexuality)
-    if sexuality_norm == _norm_value("Bisexual"):
-        record("Core Biometrics", "Sexuality", sexuality, +5)
-    elif sexuality_norm and sexuality_norm != _norm_value("Straight"):
-        record("Core Biometrics", "Sexuality", sexuality, -5)
-
-    zodiac = core_val("Zodiac Sign")
-    if str(zodiac).strip():
-        record("Core Biometrics", "Zodiac Sign", zodiac, -5)
-
-    religion = core_val("Religious Beliefs")
-    religion_norm = _norm_value(religion)
-    if religion_norm == _norm_value("Muslim"):
-        record("Core Biometrics", "Religious Beliefs", religion, -10)
-
-    # Age weighting (declared age only)
-    declared_age = core_val("Age")
-    declared_age_int = None
-    try:
-        declared_age_int = int(declared_age) if declared_age is not None and str(declared_age).strip() != "" else None
-    except Exception:
-        declared_age_int = None
-    if declared_age_int is not None:
-        if declared_age_int < 23:
-            age_score = int(round(30 - 0.4 * (declared_age_int - 23)**2))
-        else:
-            age_score = int(round(30 - 0.6 * (declared_age_int - 23)**2))
-        record("Core Biometrics", "Age", declared_age, age_score)
-
-    # Height weighting (declared height only)
-    height = core_val("Height")
-    height_int = None
-    try:
-        height_int = int(height) if height is not None and str(height).strip() != "" else None
-    except Exception:
-        height_int = None
-    if height_int is not None:
-        if height_int >= 185:
-            record("Core Biometrics", "Height", f"{height_int}", +20)
-        elif height_int > 175:
-            record("Core Biometrics", "Height", f"{height_int}", +10)
-
-    # Visual Analysis
-    face_visibility = visual_val("Face Visibility Quality")
-    face_visibility_norm = _norm_value(face_visibility)
-    face_visibility_deltas = {
-        _norm_value("Clear face in 3+ photos"): 0,
-        _norm_value("Clear face in 1-2 photos"): -5,
-        _norm_value("Face often partially obscured"): -10,
-        _norm_value("Face mostly not visible"): -20,
-    }
-    if face_visibility_norm in face_visibility_deltas:
-        record(
-            "Visual Analysis",
-            "Face Visibility Quality",
-            face_visibility,
-            face_visibility_deltas[face_visibility_norm],
-        )
-
-    photo_editing = visual_val("Photo Authenticity / Editing Level")
-    photo_editing_norm = _norm_value(photo_editing)
-    photo_editing_deltas = {
-        _norm_value("No obvious filters"): 0,
-        _norm_value("Some filters or mild editing"): -5,
-        _norm_value("Heavy filters/face smoothing"): -20,
-        _norm_value("Unclear"): 0,
-    }
-    if photo_editing_norm in photo_editing_deltas:
-        record(
-            "Visual Analysis",
-            "Photo Authenticity / Editing Level",
-            photo_editing,
-            photo_editing_deltas[photo_editing_norm],
-        )
-
-    body_fat = visual_val("Apparent Body Fat Level")
-    body_fat_norm = _norm_value(body_fat)
-    body_fat_deltas = {
-        _norm_value("Low"): 0,
-        _norm_value("Average"): 0,
-        _norm_value("High"): -10,
-        _norm_value("Very high"): -1000,
-        _norm_value("Unclear"): 0,
-    }
-    if body_fat_norm in body_fat_deltas:
-        record(
-            "Visual Analysis",
-            "Apparent Body Fat Level",
-            body_fat,
-            body_fat_deltas[body_fat_norm],
-        )
-
-    distinctiveness = visual_val("Profile Distinctiveness")
-    distinctiveness_norm = _norm_value(distinctiveness)
-    distinctiveness_deltas = {
-        _norm_value("High (specific/unique)"): 5,
-        _norm_value("Medium"): 0,
-        _norm_value("Low (generic/boilerplate)"): -5,
-        _norm_value("Unclear"): 0,
-    }
-    if distinctiveness_norm in distinctiveness_deltas:
-        record(
-            "Visual Analysis",
-            "Profile Distinctiveness",
-            distinctiveness,
-            distinctiveness_deltas[distinctiveness_norm],
-        )
-
-    overall_vibe = visual_val("Overall Visual Appeal Vibe")
-    overall_vibe_norm = _norm_value(overall_vibe)
-    if overall_vibe_norm in {
-        _norm_value("Playful/flirty"),
-        _norm_value("Sensual/alluring"),
-    }:
-        record("Visual Analysis", "Overall Visual Appeal Vibe", overall_vibe, +5)
-    elif overall_vibe_norm == _norm_value("Very low-key/understated"):
-        record("Visual Analysis", "Overall Visual Appeal Vibe", overall_vibe, -5)
-
-    attire = visual_val("Attire and Style Indicators")
-    attire_norm = _norm_value(attire)
-    if attire_norm == _norm_value("Very modest/covered"):
-        record("Visual Analysis", "Attire and Style Indicators", attire, -10)
-    elif attire_norm in {
-        _norm_value("Form-fitting/suggestive"),
-        _norm_value("Highly revealing"),
-        _norm_value("Edgy/alternative"),
-    }:
-        record("Visual Analysis", "Attire and Style Indicators", attire, +10)
-
-    body_language = visual_val("Body Language and Expression")
-    body_language_norm = _norm_value(body_language)
-    if body_language_norm in {
-        _norm_value("Confident/engaging"),
-        _norm_value("Playful/flirty"),
-    }:
-        record("Visual Analysis", "Body Language and Expression", body_language, +5)
-
-    fitness = _split_csv(visual_val("Indicators of Fitness or Lifestyle"))
-    for item in fitness:
-        item_norm = _norm_value(item)
-        if item_norm in {
-            _norm_value("Visible muscle tone"),
-            _norm_value("Athletic poses"),
-        }:
-            record("Visual Analysis", "Indicators of Fitness or Lifestyle", item, +10)
-
-    short_term = visual_val("Short-Term / Hookup Orientation Signals")
-    short_term_norm = _norm_value(short_term)
-    short_term_deltas = {
-        _norm_value("Low"): 0,
-        _norm_value("Moderate"): 10,
-        _norm_value("High"): 15,
-    }
-    if short_term_norm in short_term_deltas:
-        record(
-            "Visual Analysis",
-            "Short-Term / Hookup Orientation Signals",
-            short_term,
-            short_term_deltas[short_term_norm],
-        )
-
-    attractiveness = visual_val("Apparent Attractiveness Tier")
-    attractiveness_norm = _norm_value(attractiveness)
-    attractiveness_deltas = {
-        _norm_value("Negligible"): -1000,
-        _norm_value("Low / Unattractive"): -1000,
-        _norm_value("Limited / Below Average"): -30,
-        _norm_value("Average / Moderate"): 0,
-        _norm_value("High / Above Average"): 0,
-        _norm_value("Exceptional / Elite"): 0,
-    }
-    if attractiveness_norm in attractiveness_deltas:
-        att_delta = attractiveness_deltas[attractiveness_norm]
-        if face_visibility_norm != _norm_value("Clear face in 3+ photos"):
-            att_delta = min(att_delta, 5)
-        if photo_editing_norm == _norm_value("Heavy filters/face smoothing"):
-            att_delta = min(att_delta, 0)
-        record(
-            "Visual Analysis",
-            "Apparent Attractiveness Tier",
-            attractiveness,
-            att_delta,
-        )
-
-    symmetry = visual_val("Facial Symmetry Level")
-    symmetry_norm = _norm_value(symmetry)
-    if symmetry_norm == _norm_value("Low"):
-        record("Visual Analysis", "Facial Symmetry Level", symmetry, -1000)
-
-    lip_filler = visual_val("Visible Lip Filler")
-    lip_filler_norm = _norm_value(lip_filler)
-    if lip_filler_norm == _norm_value("Obvious"):
-        record("Visual Analysis", "Visible Lip Filler", lip_filler, -15)
-    elif lip_filler_norm == _norm_value("Extreme"):
-        record("Visual Analysis", "Visible Lip Filler", lip_filler, -30)
-
-    hair_color = visual_val("Hair Color")
-    hair_norm = _norm_value(hair_color)
-    if hair_norm == _norm_value("Red/ginger"):
-        record("Visual Analysis", "Hair Color", hair_color, +20)
-    elif hair_norm in {
-        _norm_value("Dyed blue"),
-        _norm_value("Dyed pink"),
-        _norm_value("Dyed (unnatural other)"),
-        _norm_value("Dyed (mixed/multiple colors)"),
-    }:
-        record("Visual Analysis", "Hair Color", hair_color, +10)
-
-    piercing = visual_val("Visible Piercing Level")
-    piercing_norm = _norm_value(piercing)
-    if piercing_norm == _norm_value("High"):
-        record("Visual Analysis", "Visible Piercing Level", piercing, -1000)
-    elif piercing_norm == _norm_value("Moderate"):
-        record("Visual Analysis", "Visible Piercing Level", piercing, -25)
-    elif piercing_norm == _norm_value("None visible"):
-        record("Visual Analysis", "Visible Piercing Level", piercing, +10)
-
-    build = visual_val("Apparent Build Category")
-    build_norm = _norm_value(build)
-    if build_norm == _norm_value("Obese/high body fat"):
-        record("Visual Analysis", "Apparent Build Category", build, -1000)
-    elif build_norm == _norm_value("Curvy (softer proportions)"):
-        record("Visual Analysis", "Apparent Build Category", build, +5)
-    elif build_norm == _norm_value("Muscular/built"):
-        record("Visual Analysis", "Apparent Build Category", build, +10)
-
-    skin = visual_val("Apparent Skin Tone")
-    skin_norm = _norm_value(skin)
-    if skin_norm == _norm_value("Light/beige"):
-        record("Visual Analysis", "Apparent Skin Tone", skin, +5)
-    elif skin_norm == _norm_value("Very light/pale/fair"):
-        record("Visual Analysis", "Apparent Skin Tone", skin, +10)
-
-    ethnic = visual_val("Apparent Ethnic Features")
-    ethnic_norm = _norm_value(ethnic)
-    if ethnic_norm == _norm_value("Southeast Asian-presenting"):
-        record("Visual Analysis", "Apparent Ethnic Features", ethnic, -20)
-    elif ethnic_norm == _norm_value("South Asian-presenting"):
-        record("Visual Analysis", "Apparent Ethnic Features", ethnic, -30)
-    elif ethnic_norm == _norm_value("Middle Eastern/Arab-presenting"):
-        record("Visual Analysis", "Apparent Ethnic Features", ethnic, -10)
-    elif ethnic_norm == _norm_value("Mixed/Ambiguous"):
-        record("Visual Analysis", "Apparent Ethnic Features", ethnic, -5)
-    elif ethnic_norm == _norm_value("Black/African-presenting"):
-        record("Visual Analysis", "Apparent Ethnic Features", ethnic, -1000)
-
-    chest = visual_val("Apparent Chest Proportions")
-    chest_norm = _norm_value(chest)
-    if chest_norm == _norm_value("Petite/small/narrow"):
-        record("Visual Analysis", "Apparent Chest Proportions", chest, -5)
-    elif chest_norm and chest_norm != _norm_value("Average/balanced/proportional"):
-        record("Visual Analysis", "Apparent Chest Proportions", chest, +5)
-
-    enhancements = _split_csv(visual_val("Visible Enhancements or Features"))
-    for item in enhancements:
-        item_norm = _norm_value(item)
-        if item_norm == _norm_value("Glasses"):
-            record("Visual Analysis", "Visible Enhancements or Features", item, +5)
-        elif item_norm == _norm_value("Makeup (heavy)"):
-            record("Visual Analysis", "Visible Enhancements or Features", item, -10)
-        elif item_norm == _norm_value("Very long nails (2cm+)"):
-            record("Visual Analysis", "Visible Enhancements or Features", item, -10)
-
-    red_flags = _split_csv(visual_val("Presentation Red Flags"))
-    for flag in red_flags:
-        flag_norm = _norm_value(flag)
-        if flag_norm == _norm_value("None"):
-            continue
-        if flag_norm == _norm_value("Heavy filters/face smoothing") and photo_editing_norm == _norm_value("Heavy filters/face smoothing"):
-            continue
-        record("Visual Analysis", "Presentation Red Flags", flag, -5)
-
-    grooming = visual_val("Grooming Effort Level")
-    if _norm_value(grooming) == _norm_value("Minimal/natural"):
-        record("Visual Analysis", "Grooming Effort Level", grooming, -5)
-
-    # Profile Evaluation (LLM2)
-    financial_expectation_flag = int(eval_result.get("financial_expectation_flag", 0) or 0)
-    if financial_expectation_flag == 1:
-        record("Profile Eval", "Financial Expectation Flag", "Yes", -1000)
-
-    spiritual_witchy_flag = int(eval_result.get("spiritual_witchy_flag", 0) or 0)
-    if spiritual_witchy_flag == 1:
-        record("Profile Eval", "Spiritual/Witchy Flag", "Medium", -10)
-    elif spiritual_witchy_flag == 2:
-        record("Profile Eval", "Spiritual/Witchy Flag", "High", -20)
-
-    exhausting_demands_flag = int(eval_result.get("exhausting_demands_flag", 0) or 0)
-    if exhausting_demands_flag == 1:
-        record("Profile Eval", "Exhausting Demands Flag", "Yes", -20)
-
-    job_band = _norm_value((eval_result.get("job") or {}).get("band", ""))
-    if job_band == _norm_value("T0"):
-        record("Profile Eval", "Job Tier", "T0", -10)
-    elif job_band == _norm_value("T1"):
-        record("Profile Eval", "Job Tier", "T1", -5)
-    elif job_band == _norm_value("T3"):
-        record("Profile Eval", "Job Tier", "T3", +5)
-    elif job_band == _norm_value("T4"):
-        record("Profile Eval", "Job Tier", "T4", +10)
-
-    university_elite = int(eval_result.get("university_elite", 0) or 0)
-    if university_elite == 1:
-        record("Profile Eval", "University Elite", "Yes", +10)
-
-    # Age delta (logged only)
-    apparent_age_years = _parse_int(visual_val("Apparent Age (Years)"))
-    age_delta_years = _calc_age_delta_years(declared_age_int, apparent_age_years)
+def _score_profile_long(extracted: Dict[str, Any], eval_result: Dict[str, Any]) -> Dict[str, Any]:
+    return _evaluate_rules(_LONG_COMPILED, extracted, eval_result)
 
-    score_total = sum(c["delta"] for c in contribs)
 
-    home_iso = str(eval_result.get("home_country_iso", "") or "").upper().strip()
-    return {
-        "score": int(score_total),
-        "hard_kills": hard_kills,
-        "contributions": contribs,
-        "signals": {
-            "declared_age": declared_age_int,
-            "apparent_age_years": apparent_age_years,
-            "age_delta_years": age_delta_years,
-        },
-        "profile_eval_inputs": {
-            "job_band": (eval_result.get("job") or {}).get("band", ""),
-            "university_elite": university_elite,
-            "home_country_iso": home_iso,
-        },
-    }
+def _score_profile_short(extracted: Dict[str, Any], eval_result: Dict[str, Any]) -> Dict[str, Any]:
+    return _evaluate_rules(_SHORT_COMPILED, extracted, eval_result)
 
 
 DEFAULT_T_LONG = 10
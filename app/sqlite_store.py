@@ -1,8 +1,13 @@
+import functools
 import os
 import sqlite3
+import threading
 from datetime import datetime
 from typing import Optional, Dict, Any, Tuple, List
 
+import db_indexes
+import storage
+
 
 VISUAL_TRAIT_FIELDS: List[Tuple[str, str]] = [
     ("Face Visibility Quality", "Face_Visibility_Quality"),
@@ -32,6 +37,18 @@ VISUAL_TRAIT_FIELDS: List[Tuple[str, str]] = [
 ]
 
 
+# One writer at a time when several device workers share this process (fleet mode).
+_WRITE_LOCK = threading.RLock()
+
+
+def _serialized_write(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _WRITE_LOCK:
+            return fn(*args, **kwargs)
+    return wrapper
+
+
 def _repo_root() -> str:
     return os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 
@@ -40,205 +57,207 @@ def get_db_path() -> str:
     return os.path.join(_repo_root(), "profiles.db")
 
 
-def init_db(db_path: Optional[str] = None) -> None:
+# Bump when the profiles DDL below changes; storage applies it once per database.
+PROFILES_SCHEMA_VERSION = 1
+
+
+def _apply_profiles_schema(con: sqlite3.Connection) -> None:
     """
-    Initialize the SQLite database with WAL mode and the flattened profiles table.
+    Create the flattened profiles table and add any columns older databases lack.
     Schema mirrors extracted profile fields (core biometrics, prompts, poll, photos, visual traits),
     LLM2 enrichment, and long/short scores. Dedup is enforced via UNIQUE(Name COLLATE NOCASE, Age, Height_cm).
     """
-    db_path = db_path or get_db_path()
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    cur = con.cursor()
+
+    # Main flattened table
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS profiles (
+            id INTEGER PRIMARY KEY, -- Auto-incrementing unique identifier for each profile
+            -- Core extracted fields
+            Name TEXT NOT NULL, -- Profile name used for deduplication
+            Gender TEXT, -- Self-identified gender from profile
+            Sexuality TEXT, -- Sexual orientation stated in profile
+            Age INTEGER NOT NULL, -- Profile age used for deduplication
+            Height_cm INTEGER NOT NULL, -- Height in centimeters used for deduplication
+            Location TEXT, -- Geographic location from profile
+            Active_status TEXT, -- Profile activity status indicator
+            Ethnicity TEXT, -- Explicitly stated ethnicity
+            Children TEXT, -- Children status or attitude toward kids
+            Family_plans TEXT, -- Future family planning intentions
+            Covid_vaccine TEXT, -- COVID-19 vaccination status
+            Pets TEXT, -- Pet ownership or attitude toward animals
+            Zodiac_Sign TEXT, -- Astrological sign from profile
+            Job_title TEXT, -- Professional occupation/job title
+            University TEXT, -- Educational institution attended
+            Religious_Beliefs TEXT, -- Religious views or beliefs
+            Home_town TEXT, -- Hometown or origin city
+            Politics TEXT, -- Political views or affiliations
+            Languages_spoken TEXT, -- Languages the person speaks
+            Dating_Intentions TEXT, -- Relationship goals and intentions
+            Relationship_type TEXT, -- Preferred relationship structure
+            Drinking TEXT, -- Alcohol consumption habits
+            Smoking TEXT, -- Tobacco smoking habits
+            Marijuana TEXT, -- Marijuana usage habits
+            Drugs TEXT, -- Other drug usage habits
+            Biometrics_Other_Text TEXT, -- Additional biometric information not covered elsewhere
+            prompt_1 TEXT, -- First profile prompt question
+            answer_1 TEXT, -- Answer to first profile prompt
+            prompt_2 TEXT, -- Second profile prompt question
+            answer_2 TEXT, -- Answer to second profile prompt
+            prompt_3 TEXT, -- Third profile prompt question
+            answer_3 TEXT, -- Answer to third profile prompt
+            Poll_question TEXT, -- Poll question text
+            Poll_answer_1 TEXT, -- First poll answer option
+            Poll_answer_2 TEXT, -- Second poll answer option
+            Poll_answer_3 TEXT, -- Third poll answer option
+            Other_text TEXT, -- Additional text content not covered by other fields
+            Media_description TEXT, -- Description of non-photo media (videos, voice notes)
+            Photo1_desc TEXT, -- Description of first profile photo
+            Photo2_desc TEXT, -- Description of second profile photo
+            Photo3_desc TEXT, -- Description of third profile photo
+            Photo4_desc TEXT, -- Description of fourth profile photo
+            Photo5_desc TEXT, -- Description of fifth profile photo
+            Photo6_desc TEXT, -- Description of sixth profile photo
+            Face_Visibility_Quality TEXT, -- Assessment of how clearly face is visible in photos
+            Photo_Authenticity_Editing_Level TEXT, -- Level of photo editing or filters detected
+            Apparent_Body_Fat_Level TEXT, -- Visual assessment of body fat percentage
+            Profile_Distinctiveness TEXT, -- How unique or distinctive the profile appears
+            Apparent_Build_Category TEXT, -- Body type classification (slender, athletic, etc.)
+            Apparent_Skin_Tone TEXT, -- Visual skin tone description
+            Apparent_Ethnic_Features TEXT, -- Visual ethnic characteristics observed
+            Hair_Color TEXT, -- Hair color from photos
+            Facial_Symmetry_Level TEXT, -- Assessment of facial symmetry
+            Indicators_of_Fitness_or_Lifestyle TEXT, -- Visual signs of fitness or active lifestyle
+            Overall_Visual_Appeal_Vibe TEXT, -- Overall attractiveness and appeal assessment
+            Apparent_Age_Years INTEGER, -- Visually estimated age in years
+            Attire_and_Style_Indicators TEXT, -- Clothing style and fashion sense indicators
+            Body_Language_and_Expression TEXT, -- Body language and facial expression analysis
+            Visible_Enhancements_or_Features TEXT, -- Visible modifications like makeup, glasses, etc.
+            Apparent_Chest_Proportions TEXT, -- Visual assessment of chest size/proportions
+            Apparent_Attractiveness_Tier TEXT, -- Attractiveness classification tier
+            Reasoning_for_attractiveness_tier TEXT, -- Explanation for attractiveness tier assignment
+            Facial_Proportion_Balance TEXT, -- Assessment of facial feature proportions
+            Grooming_Effort_Level TEXT, -- Level of grooming and personal care effort
+            Presentation_Red_Flags TEXT, -- Negative presentation indicators or concerns
+            Visible_Tattoo_Level TEXT, -- Visibility level of tattoos
+            Visible_Piercing_Level TEXT, -- Visibility level of piercings
+            Short_Term_Hookup_Orientation_Signals TEXT, -- Indicators of casual relationship preferences
+            -- Enrichment (profile_eval)
+            home_country_iso TEXT, -- ISO country code derived from hometown
+            home_country_confidence REAL, -- Confidence score in country resolution (0.0-1.0)
+            home_country_modifier INTEGER, -- Country-based scoring modifier value
+            job_normalized_title TEXT, -- Standardized job title for analysis
+            job_est_salary_gbp INTEGER, -- Estimated annual salary in British pounds
+            job_band TEXT, -- Job earning potential tier (T0-T4)
+            job_confidence REAL, -- Confidence in job assessment (0.0-1.0)
+            job_band_reason TEXT, -- Explanation for job band assignment
+            job_modifier INTEGER, -- Job-based scoring modifier value
+            university_elite INTEGER, -- Flag indicating elite university (1) or not (0)
+            matched_university_name TEXT, -- Canonical name of matched elite university
+            university_modifier INTEGER, -- University-based scoring modifier value
+            -- Derived
+            long_score INTEGER, -- Long-term relationship compatibility score
+            short_score INTEGER, -- Short-term relationship compatibility score
+            score_breakdown TEXT, -- Detailed explanation of scoring calculations
+            timestamp TEXT, -- ISO timestamp when profile was processed
+            -- Opening messages (JSON blob of 10 generated openers)
+            opening_messages_json TEXT, -- JSON array of generated opening messages
+            -- Opening pick (full JSON of selection) and chosen text for analysis
+            opening_pick_json TEXT, -- JSON object containing selected opening message details
+            opening_pick_text TEXT, -- Text of the chosen opening message
+            -- Verdict (LIKE/DISLIKE)
+            verdict TEXT, -- Final decision on profile (LIKE/DISLIKE)
+            -- Manual rating (temporary feature)
+            dan_rating INTEGER,
+            -- Match logging
+            matched INTEGER DEFAULT 0, -- Match status flag (0 = not matched, 1 = matched)
+            match_time TEXT -- ISO timestamp when match occurred
+        );
+        """
+    )
+
+    # Ensure the unique index is dropped if it existed from earlier versions
+    cur.execute("DROP INDEX IF EXISTS idx_profiles_unique;")
+    
+    extra_cols = [
+        "long_score INTEGER",
+        "short_score INTEGER",
+        "score_breakdown TEXT",
+        "Poll_question TEXT",
+        "Poll_answer_1 TEXT",
+        "Poll_answer_2 TEXT",
+        "Poll_answer_3 TEXT",
+        "Biometrics_Other_Text TEXT",
+        "Active_status TEXT",
+        "Face_Visibility_Quality TEXT",
+        "Photo_Authenticity_Editing_Level TEXT",
+        "Apparent_Body_Fat_Level TEXT",
+        "Profile_Distinctiveness TEXT",
+        "Apparent_Build_Category TEXT",
+        "Apparent_Skin_Tone TEXT",
+        "Apparent_Ethnic_Features TEXT",
+        "Hair_Color TEXT",
+        "Facial_Symmetry_Level TEXT",
+        "Indicators_of_Fitness_or_Lifestyle TEXT",
+        "Overall_Visual_Appeal_Vibe TEXT",
+        "Apparent_Age_Years INTEGER",
+        "Attire_and_Style_Indicators TEXT",
+        "Body_Language_and_Expression TEXT",
+        "Visible_Enhancements_or_Features TEXT",
+        "Apparent_Chest_Proportions TEXT",
+        "Apparent_Attractiveness_Tier TEXT",
+        "Reasoning_for_attractiveness_tier TEXT",
+        "Facial_Proportion_Balance TEXT",
+        "Grooming_Effort_Level TEXT",
+        "Presentation_Red_Flags TEXT",
+        "Visible_Tattoo_Level TEXT",
+        "Visible_Piercing_Level TEXT",
+        "Short_Term_Hookup_Orientation_Signals TEXT",
+        "opening_messages_json TEXT",
+        "opening_pick_json TEXT",
+        "opening_pick_text TEXT",
+        "opening_pick_target_id TEXT",
+        "opening_pick_target_type TEXT",
+        "verdict TEXT",
+        "dan_rating INTEGER",
+        "matched INTEGER DEFAULT 0",
+        "match_time TEXT",
+        "linked_profile_id INTEGER",
+        # New columns for match handling
+        "status TEXT",
+        "last_activity TEXT",
+        "chat_log TEXT",
+        "milestones TEXT",
+        # New columns for critique pipeline
+        "opening_critiques_json TEXT",
+        "humanity_score INTEGER",
+        "llm4_action TEXT",
+        "llm4_fail_reason TEXT",
+    ]
+    for col in extra_cols:
+        try:
+            cur.execute(f"ALTER TABLE profiles ADD COLUMN {col};")
+        except Exception:
+            pass
 
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        # WAL for read-while-write; NORMAL synchronous for perf
-        cur.execute("PRAGMA journal_mode=WAL;")
-        cur.execute("PRAGMA synchronous=NORMAL;")
 
-        # Main flattened table
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS profiles (
-                id INTEGER PRIMARY KEY, -- Auto-incrementing unique identifier for each profile
-                -- Core extracted fields
-                Name TEXT NOT NULL, -- Profile name used for deduplication
-                Gender TEXT, -- Self-identified gender from profile
-                Sexuality TEXT, -- Sexual orientation stated in profile
-                Age INTEGER NOT NULL, -- Profile age used for deduplication
-                Height_cm INTEGER NOT NULL, -- Height in centimeters used for deduplication
-                Location TEXT, -- Geographic location from profile
-                Active_status TEXT, -- Profile activity status indicator
-                Ethnicity TEXT, -- Explicitly stated ethnicity
-                Children TEXT, -- Children status or attitude toward kids
-                Family_plans TEXT, -- Future family planning intentions
-                Covid_vaccine TEXT, -- COVID-19 vaccination status
-                Pets TEXT, -- Pet ownership or attitude toward animals
-                Zodiac_Sign TEXT, -- Astrological sign from profile
-                Job_title TEXT, -- Professional occupation/job title
-                University TEXT, -- Educational institution attended
-                Religious_Beliefs TEXT, -- Religious views or beliefs
-                Home_town TEXT, -- Hometown or origin city
-                Politics TEXT, -- Political views or affiliations
-                Languages_spoken TEXT, -- Languages the person speaks
-                Dating_Intentions TEXT, -- Relationship goals and intentions
-                Relationship_type TEXT, -- Preferred relationship structure
-                Drinking TEXT, -- Alcohol consumption habits
-                Smoking TEXT, -- Tobacco smoking habits
-                Marijuana TEXT, -- Marijuana usage habits
-                Drugs TEXT, -- Other drug usage habits
-                Biometrics_Other_Text TEXT, -- Additional biometric information not covered elsewhere
-                prompt_1 TEXT, -- First profile prompt question
-                answer_1 TEXT, -- Answer to first profile prompt
-                prompt_2 TEXT, -- Second profile prompt question
-                answer_2 TEXT, -- Answer to second profile prompt
-                prompt_3 TEXT, -- Third profile prompt question
-                answer_3 TEXT, -- Answer to third profile prompt
-                Poll_question TEXT, -- Poll question text
-                Poll_answer_1 TEXT, -- First poll answer option
-                Poll_answer_2 TEXT, -- Second poll answer option
-                Poll_answer_3 TEXT, -- Third poll answer option
-                Other_text TEXT, -- Additional text content not covered by other fields
-                Media_description TEXT, -- Description of non-photo media (videos, voice notes)
-                Photo1_desc TEXT, -- Description of first profile photo
-                Photo2_desc TEXT, -- Description of second profile photo
-                Photo3_desc TEXT, -- Description of third profile photo
-                Photo4_desc TEXT, -- Description of fourth profile photo
-                Photo5_desc TEXT, -- Description of fifth profile photo
-                Photo6_desc TEXT, -- Description of sixth profile photo
-                Face_Visibility_Quality TEXT, -- Assessment of how clearly face is visible in photos
-                Photo_Authenticity_Editing_Level TEXT, -- Level of photo editing or filters detected
-                Apparent_Body_Fat_Level TEXT, -- Visual assessment of body fat percentage
-                Profile_Distinctiveness TEXT, -- How unique or distinctive the profile appears
-                Apparent_Build_Category TEXT, -- Body type classification (slender, athletic, etc.)
-                Apparent_Skin_Tone TEXT, -- Visual skin tone description
-                Apparent_Ethnic_Features TEXT, -- Visual ethnic characteristics observed
-                Hair_Color TEXT, -- Hair color from photos
-                Facial_Symmetry_Level TEXT, -- Assessment of facial symmetry
-                Indicators_of_Fitness_or_Lifestyle TEXT, -- Visual signs of fitness or active lifestyle
-                Overall_Visual_Appeal_Vibe TEXT, -- Overall attractiveness and appeal assessment
-                Apparent_Age_Years INTEGER, -- Visually estimated age in years
-                Attire_and_Style_Indicators TEXT, -- Clothing style and fashion sense indicators
-                Body_Language_and_Expression TEXT, -- Body language and facial expression analysis
-                Visible_Enhancements_or_Features TEXT, -- Visible modifications like makeup, glasses, etc.
-                Apparent_Chest_Proportions TEXT, -- Visual assessment of chest size/proportions
-                Apparent_Attractiveness_Tier TEXT, -- Attractiveness classification tier
-                Reasoning_for_attractiveness_tier TEXT, -- Explanation for attractiveness tier assignment
-                Facial_Proportion_Balance TEXT, -- Assessment of facial feature proportions
-                Grooming_Effort_Level TEXT, -- Level of grooming and personal care effort
-                Presentation_Red_Flags TEXT, -- Negative presentation indicators or concerns
-                Visible_Tattoo_Level TEXT, -- Visibility level of tattoos
-                Visible_Piercing_Level TEXT, -- Visibility level of piercings
-                Short_Term_Hookup_Orientation_Signals TEXT, -- Indicators of casual relationship preferences
-                -- Enrichment (profile_eval)
-                home_country_iso TEXT, -- ISO country code derived from hometown
-                home_country_confidence REAL, -- Confidence score in country resolution (0.0-1.0)
-                home_country_modifier INTEGER, -- Country-based scoring modifier value
-                job_normalized_title TEXT, -- Standardized job title for analysis
-                job_est_salary_gbp INTEGER, -- Estimated annual salary in British pounds
-                job_band TEXT, -- Job earning potential tier (T0-T4)
-                job_confidence REAL, -- Confidence in job assessment (0.0-1.0)
-                job_band_reason TEXT, -- Explanation for job band assignment
-                job_modifier INTEGER, -- Job-based scoring modifier value
-                university_elite INTEGER, -- Flag indicating elite university (1) or not (0)
-                matched_university_name TEXT, -- Canonical name of matched elite university
-                university_modifier INTEGER, -- University-based scoring modifier value
-                -- Derived
-                long_score INTEGER, -- Long-term relationship compatibility score
-                short_score INTEGER, -- Short-term relationship compatibility score
-                score_breakdown TEXT, -- Detailed explanation of scoring calculations
-                timestamp TEXT, -- ISO timestamp when profile was processed
-                -- Opening messages (JSON blob of 10 generated openers)
-                opening_messages_json TEXT, -- JSON array of generated opening messages
-                -- Opening pick (full JSON of selection) and chosen text for analysis
-                opening_pick_json TEXT, -- JSON object containing selected opening message details
-                opening_pick_text TEXT, -- Text of the chosen opening message
-                -- Verdict (LIKE/DISLIKE)
-                verdict TEXT, -- Final decision on profile (LIKE/DISLIKE)
-                -- Manual rating (temporary feature)
-                dan_rating INTEGER,
-                -- Match logging
-                matched INTEGER DEFAULT 0, -- Match status flag (0 = not matched, 1 = matched)
-                match_time TEXT -- ISO timestamp when match occurred
-            );
-            """
-        )
+storage.register_schema("profiles", PROFILES_SCHEMA_VERSION, _apply_profiles_schema)
+storage.register_schema("profile_indexes", db_indexes.INDEX_VERSION, db_indexes.apply_indexes)
 
-        # Ensure the unique index is dropped if it existed from earlier versions
-        cur.execute("DROP INDEX IF EXISTS idx_profiles_unique;")
-        
-        extra_cols = [
-            "long_score INTEGER",
-            "short_score INTEGER",
-            "score_breakdown TEXT",
-            "Poll_question TEXT",
-            "Poll_answer_1 TEXT",
-            "Poll_answer_2 TEXT",
-            "Poll_answer_3 TEXT",
-            "Biometrics_Other_Text TEXT",
-            "Active_status TEXT",
-            "Face_Visibility_Quality TEXT",
-            "Photo_Authenticity_Editing_Level TEXT",
-            "Apparent_Body_Fat_Level TEXT",
-            "Profile_Distinctiveness TEXT",
-            "Apparent_Build_Category TEXT",
-            "Apparent_Skin_Tone TEXT",
-            "Apparent_Ethnic_Features TEXT",
-            "Hair_Color TEXT",
-            "Facial_Symmetry_Level TEXT",
-            "Indicators_of_Fitness_or_Lifestyle TEXT",
-            "Overall_Visual_Appeal_Vibe TEXT",
-            "Apparent_Age_Years INTEGER",
-            "Attire_and_Style_Indicators TEXT",
-            "Body_Language_and_Expression TEXT",
-            "Visible_Enhancements_or_Features TEXT",
-            "Apparent_Chest_Proportions TEXT",
-            "Apparent_Attractiveness_Tier TEXT",
-            "Reasoning_for_attractiveness_tier TEXT",
-            "Facial_Proportion_Balance TEXT",
-            "Grooming_Effort_Level TEXT",
-            "Presentation_Red_Flags TEXT",
-            "Visible_Tattoo_Level TEXT",
-            "Visible_Piercing_Level TEXT",
-            "Short_Term_Hookup_Orientation_Signals TEXT",
-            "opening_messages_json TEXT",
-            "opening_pick_json TEXT",
-            "opening_pick_text TEXT",
-            "opening_pick_target_id TEXT",
-            "opening_pick_target_type TEXT",
-            "verdict TEXT",
-            "dan_rating INTEGER",
-            "matched INTEGER DEFAULT 0",
-            "match_time TEXT",
-            "linked_profile_id INTEGER",
-            # New columns for match handling
-            "status TEXT",
-            "last_activity TEXT",
-            "chat_log TEXT",
-            "milestones TEXT",
-            # New columns for critique pipeline
-            "opening_critiques_json TEXT",
-            "humanity_score INTEGER",
-            "llm4_action TEXT",
-            "llm4_fail_reason TEXT",
-        ]
-        for col in extra_cols:
-            try:
-                cur.execute(f"ALTER TABLE profiles ADD COLUMN {col};")
-            except Exception:
-                pass
-        con.commit()
-    finally:
-        con.close()
+
+@_serialized_write
+def init_db(db_path: Optional[str] = None) -> None:
+    """Open the shared connection, bringing the schema up to date on first use in this process."""
+    storage.connection(db_path or get_db_path())
 
 
+@_serialized_write
 def rebuild_profiles_table(db_path: Optional[str] = None) -> None:
     db_path = db_path or get_db_path()
-    con = sqlite3.connect(db_path)
+    con = storage.connection(db_path)
     try:
         cur = con.cursor()
-        cur.execute("PRAGMA journal_mode=WAL;")
-        cur.execute("PRAGMA synchronous=NORMAL;")
         cur.execute("PRAGMA table_info(profiles);")
         existing_info = cur.fetchall()
         if not existing_info:
@@ -369,13 +388,14 @@ def rebuild_profiles_table(db_path: Optional[str] = None) -> None:
     except Exception:
         con.rollback()
         raise
-    finally:
-        con.close()
+    # Indexes went with profiles_old; let every component reapply its DDL.
+    storage.invalidate_schema(db_path)
 
 
 # ---------------------- Opener results logging ----------------------
 
 
+@_serialized_write
 def update_profile_opening_messages_json(
     profile_id: int,
     result: Dict[str, Any],
@@ -391,18 +411,14 @@ def update_profile_opening_messages_json(
     except Exception:
         json_text = "{}"
     db_path = db_path or get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute(
+    with storage.transaction(db_path) as con:
+        con.execute(
             "UPDATE profiles SET opening_messages_json = ? WHERE id = ?",
             (json_text, int(profile_id))
         )
-        con.commit()
-    finally:
-        con.close()
 
 
+@_serialized_write
 def update_profile_opening_pick(
     profile_id: int,
     result: Dict[str, Any],
@@ -464,18 +480,14 @@ def update_profile_opening_pick(
         target_id = ""
         target_type = ""
     db_path = db_path or get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute(
+    with storage.transaction(db_path) as con:
+        con.execute(
             "UPDATE profiles SET opening_pick_json = ?, opening_pick_text = ?, opening_pick_target_id = ?, opening_pick_target_type = ? WHERE id = ?",
             (json_text, chosen_text, target_id, target_type, int(profile_id))
         )
-        con.commit()
-    finally:
-        con.close()
 
 
+@_serialized_write
 def update_profile_verdict(
     profile_id: int,
     verdict: str,
@@ -485,18 +497,14 @@ def update_profile_verdict(
     Persist final verdict (LIKE/DISLIKE) to the same row.
     """
     db_path = db_path or get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute(
+    with storage.transaction(db_path) as con:
+        con.execute(
             "UPDATE profiles SET verdict = ? WHERE id = ?",
             ((verdict or "").strip().upper(), int(profile_id))
         )
-        con.commit()
-    finally:
-        con.close()
 
 
+@_serialized_write
 def update_profile_match(
     profile_id: int,
     matched: bool = True,
@@ -511,18 +519,14 @@ def update_profile_match(
     if match_time is None:
         match_time = datetime.now().isoformat(timespec="seconds")
     matched_val = 1 if matched else 0
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute(
+    with storage.transaction(db_path) as con:
+        con.execute(
             "UPDATE profiles SET matched = ?, match_time = ? WHERE id = ?",
             (matched_val, match_time, int(profile_id))
         )
-        con.commit()
-    finally:
-        con.close()
 
 
+@_serialized_write
 def update_profile_critique_data(
     profile_id: int,
     critiques_json: Dict[str, Any],
@@ -566,10 +570,8 @@ def update_profile_critique_data(
                     break
     
     db_path = db_path or get_db_path()
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute(
+    with storage.transaction(db_path) as con:
+        con.execute(
             """UPDATE profiles SET 
                opening_critiques_json = ?, 
                humanity_score = ?, 
@@ -578,9 +580,6 @@ def update_profile_critique_data(
                WHERE id = ?""",
             (critiques_text, humanity_score, llm4_action, llm4_fail_reason, int(profile_id))
         )
-        con.commit()
-    finally:
-        con.close()
 
 
 # ---------------------- Flatten helpers ----------------------
@@ -800,6 +799,16 @@ def _flatten_enrichment(enrichment: Dict[str, Any]) -> Dict[str, Any]:
 
 # ---------------------- Upsert API ----------------------
 
+# Columns a rerun candidate is verified and reported with (start._verify_rerun_candidates).
+RERUN_COLUMNS: List[str] = [
+    "id", "Name", "Age", "Height_cm", "Job_title", "University",
+    "prompt_1", "answer_1", "prompt_2", "answer_2", "prompt_3", "answer_3",
+    "Apparent_Skin_Tone", "Apparent_Build_Category", "Hair_Color", "Apparent_Ethnic_Features",
+    "Photo1_desc", "Photo2_desc",
+    "timestamp", "verdict", "long_score", "short_score", "linked_profile_id",
+]
+_RERUN_SELECT = ", ".join(RERUN_COLUMNS)
+
 def check_for_rerun(name: str, age: int, height_cm: int, db_path: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Check if a profile with the same name, height, and similar age (+/- 1) has been seen before
@@ -809,26 +818,34 @@ def check_for_rerun(name: str, age: int, height_cm: int, db_path: Optional[str]
     if not os.path.exists(db_path):
         return []
     
-    con = sqlite3.connect(db_path)
-    con.row_factory = sqlite3.Row
-    try:
-        cur = con.cursor()
-        cur.execute(
-            """
-            SELECT * FROM profiles 
-            WHERE Name COLLATE NOCASE = ? 
-            AND Height_cm = ? 
-            AND Age BETWEEN ? AND ?
-            AND verdict IS NOT NULL AND verdict != ''
-            ORDER BY timestamp DESC
-            """,
-            (name, height_cm, age - 1, age + 1)
-        )
-        return [dict(row) for row in cur.fetchall()]
-    finally:
-        con.close()
+    rows = storage.query(
+        f"""
+        SELECT {_RERUN_SELECT} FROM profiles 
+        WHERE Name COLLATE NOCASE = ? 
+        AND Height_cm = ? 
+        AND Age BETWEEN ? AND ?
+        AND verdict IS NOT NULL AND verdict != ''
+        ORDER BY timestamp DESC
+        """,
+        (name, height_cm, age - 1, age + 1),
+        db_path=db_path,
+    )
+    return [dict(row) for row in rows]
+
+
+def fetch_profiles_by_ids(ids: List[int], db_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Rows for the given profile ids, in the order the ids were given (missing ids skipped)."""
+    db_path = db_path or get_db_path()
+    ids = [int(i) for i in ids or []]
+    if not ids or not os.path.exists(db_path):
+        return []
+    placeholders = ",".join("?" for _ in ids)
+    rows = storage.query(f"SELECT {_RERUN_SELECT} FROM profiles WHERE id IN ({placeholders})", ids, db_path=db_path)
+    by_id = {row["id"]: dict(row) for row in rows}
+    return [by_id[i] for i in ids if i in by_id]
 
 
+@_serialized_write
 def upsert_profile_flat(
     extracted_profile: Dict[str, Any],
     enrichment: Dict[str, Any],
@@ -845,7 +862,6 @@ def upsert_profile_flat(
     - Height and Age required; ValueError raised otherwise.
     """
     db_path = db_path or get_db_path()
-    init_db(db_path)  # safe to call repeatedly
 
     core = _flatten_extracted(extracted_profile or {})
     enrich = _flatten_enrichment(enrichment or {})
@@ -878,17 +894,12 @@ def upsert_profile_flat(
     placeholders = ",".join([f":{c}" for c in cols])
     col_list = ",".join(cols)
 
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-        cur.execute(
+    with storage.transaction(db_path) as con:
+        cur = con.execute(
             f"""
             INSERT INTO profiles ({col_list})
             VALUES ({placeholders});
             """,
             row
         )
-        con.commit()
         return cur.lastrowid
-    finally:
-        con.close()
@@ -0,0 +1,112 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from runtime import _log
+
+# Small dependency-graph executor for the per-profile pipeline.
+#
+# Each Stage names the stages it needs; its fn receives a dict with their results.
+# A stage is submitted to the pool as soon as all of its dependencies have
+# finished, so independent stages (e.g. LLM1 and LLM2) overlap. The caller's
+# thread stays in the scheduling loop and runs between_stages() after every
+# completion, which is where the Ctrl+C pause menu hooks in: if it raises, every
+# stage that has not started yet is cancelled and the exception propagates.
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Dict[str, Any]], Any],
+        deps: Sequence[str] = (),
+        timing_key: Optional[str] = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.timing_key = timing_key
+
+
+def _check_graph(stages: List[Stage]) -> None:
+    names = {s.name for s in stages}
+    if len(names) != len(stages):
+        raise ValueError("duplicate stage names")
+    for s in stages:
+        missing = [d for d in s.deps if d not in names]
+        if missing:
+            raise ValueError(f"stage {s.name} depends on unknown stage(s) {missing}")
+    # Kahn's algorithm: anything left over is on a cycle.
+    remaining = {s.name: set(s.deps) for s in stages}
+    while True:
+        ready = [n for n, d in remaining.items() if not d]
+        if not ready:
+            break
+        for n in ready:
+            del remaining[n]
+        for d in remaining.values():
+            d.difference_update(ready)
+    if remaining:
+        raise ValueError(f"stage graph has a cycle through {sorted(remaining)}")
+
+
+def run_stage_graph(
+    stages: List[Stage],
+    timings: Optional[Dict[str, Any]] = None,
+    between_stages: Optional[Callable[[], None]] = None,
+    on_stage_done: Optional[Callable[[str, Any], None]] = None,
+    max_workers: int = 4,
+    poll_s: float = 0.25,
+) -> Dict[str, Any]:
+    """
+    Run stages respecting their dependencies and return {name: result}.
+    Per-stage wall time is written to timings[timing_key] when a key is given.
+    on_stage_done(name, result) and between_stages() run on the calling thread;
+    between_stages() is also polled while waiting so a pause is never delayed by
+    a slow stage. A failing stage re-raises its own exception (e.g. LLMError) after
+    pending stages are cancelled.
+    """
+    _check_graph(stages)
+    by_name = {s.name: s for s in stages}
+    results: Dict[str, Any] = {}
+    elapsed: Dict[str, float] = {}
+    running: Dict[Future, str] = {}
+    pending = [s.name for s in stages]
+
+    def _run(stage: Stage) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return stage.fn({d: results[d] for d in stage.deps})
+        finally:
+            elapsed[stage.name] = time.perf_counter() - t0
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+    try:
+        while pending or running:
+            for name in list(pending):
+                if all(d in results for d in by_name[name].deps):
+                    pending.remove(name)
+                    running[executor.submit(_run, by_name[name])] = name
+
+            done, _ = wait(list(running), timeout=poll_s, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                stage = by_name[name]
+                try:
+                    results[name] = fut.result()
+                except Exception as e:
+                    _log(f"[STAGES] {name} failed: {e}")
+                    raise
+                if timings is not None and stage.timing_key:
+                    timings[stage.timing_key] = round(elapsed.get(name, 0.0), 2)
+                if on_stage_done:
+                    on_stage_done(name, results[name])
+            if between_stages:
+                between_stages()
+    except BaseException:
+        if running:
+            _log(f"[STAGES] abandoning {sorted(running.values())}; cancelled {sorted(pending)}")
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
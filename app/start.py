@@ -9,12 +9,12 @@ warnings.filterwarnings("ignore", category=SyntaxWarning)
 import argparse
 import json
 import os
-import shutil
 import time
 import re
 import subprocess
 import signal
 import sys
+import threading
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -26,13 +26,41 @@ from rich import print as rprint
 
 import config  # ensure .env is loaded early
 
-from helper_functions import ensure_adb_running, connect_device, get_screen_resolution, open_hinge
-from extraction import run_llm1_visual, run_profile_eval_llm, _build_extracted_profile, run_duplicate_verification
+from adb_session import close_shell_sessions
+from helper_functions import ensure_adb_running, connect_all_devices, connect_device, get_screen_resolution, open_hinge, shell
+from extraction import (
+    LLM1PhotoStream,
+    _build_extracted_profile,
+    _llm1_stream_enabled,
+    run_duplicate_verification,
+    run_llm1_visual,
+    run_profile_eval_llm,
+)
 from openers import run_llm3_long, run_llm3_short, run_llm3_5_critique, run_llm4_long, run_llm4_short, run_llm4_5_critique, run_llm5_safety
+from llm_cache import stats_delta as llm_cache_delta, stats_snapshot as llm_cache_snapshot
 from llm_client import LLMError
+from llm_policy import stats_delta as llm_policy_delta, stats_snapshot as llm_policy_snapshot
+from llm_ratelimit import stats_delta as llm_limits_delta, stats_snapshot as llm_limits_snapshot
+from photo_hash_index import (
+    find_matching_profiles,
+    has_hashes as phash_has_hashes,
+    min_matches as phash_min_matches,
+    record_profile_hashes,
+)
+from photo_store import flush as flush_photo_writes, release as release_photos
 from profile_utils import _get_core, _norm_value
+from run_log import (
+    finish as finish_run_log,
+    finish_thread as finish_run_logs,
+    flush as flush_run_log,
+    move as move_run_log,
+    recover as recover_run_logs,
+    write as write_run_log,
+)
 from runtime import _is_run_json_enabled, _log, set_verbose, set_interrupt_check
 from scoring import _classify_preference_flag, _format_score_table, _score_profile_long, _score_profile_short, DEFAULT_T_LONG, DEFAULT_T_SHORT, DEFAULT_DOM_MARGIN
+from stage_graph import Stage, run_stage_graph
+from storage import backup_to as backup_db
 
 from sqlite_store import (
     get_db_path,
@@ -42,6 +70,7 @@ from sqlite_store import (
     update_profile_verdict,
     update_profile_critique_data,
     check_for_rerun,
+    fetch_profiles_by_ids,
 )
 from ui_scan import (
     _bounds_visible,
@@ -70,6 +99,8 @@ from ui_scan import (
     _seek_photo_by_index,
     _seek_photo_by_index_from_bottom,
     _seek_target_on_screen,
+    _settle_and_dump,
+    _wait_for_ui_settle,
 )
 
 
@@ -166,6 +197,23 @@ class RetryInteractionException(BaseException):
         self.new_decision = new_decision
 
 
+# Fleet mode: one operator terminal shared by every device worker.
+_OPERATOR_LOCK = threading.RLock()
+_WORKER = threading.local()
+_FLEET_STOP = threading.Event()
+
+
+def _operator_tag() -> str:
+    tag = getattr(_WORKER, "tag", "")
+    return f"[{tag}] " if tag else ""
+
+
+def _ask_operator(prompt: str) -> str:
+    """input() that serialises prompts across fleet workers and labels the device."""
+    with _OPERATOR_LOCK:
+        return input(_operator_tag() + prompt)
+
+
 def _interrupt_beep() -> None:
     """
     Play a distinct sound to indicate interrupt was queued.
@@ -220,7 +268,8 @@ def _handle_pending_interrupt() -> None:
     console.print("5. Quit (Kill program)")
     
     try:
-        choice = Prompt.ask("Select option", choices=["1", "2", "3", "4", "5"], default="1")
+        with _OPERATOR_LOCK:
+            choice = Prompt.ask(_operator_tag() + "Select option", choices=["1", "2", "3", "4", "5"], default="1")
         if choice == '2':
             if GLOBAL_ARGS:
                 GLOBAL_ARGS.unrestricted = not GLOBAL_ARGS.unrestricted
@@ -236,6 +285,7 @@ def _handle_pending_interrupt() -> None:
             raise RetryInteractionException()
         elif choice == '5':
             console.print("[bold red][QUIT] Exiting...[/bold red]")
+            _FLEET_STOP.set()
             sys.exit(0)
     except (KeyboardInterrupt, EOFError):
         pass  # Fall through to resume
@@ -267,6 +317,11 @@ def _parse_args() -> argparse.Namespace:
         default=1,
         help="Number of profiles to process before exiting (default: 1)",
     )
+    parser.add_argument(
+        "--fleet",
+        action="store_true",
+        help="Run one worker per attached/TCP-connected device (--profiles applies per device)",
+    )
     return parser.parse_args()
 
 
@@ -276,7 +331,7 @@ def _confirm_action(action_label: str, unrestricted: bool, timings: Optional[Dic
     _alert_user_if_needed(f"Action Required: Confirm {action_label}")
     try:
         t0 = time.perf_counter()
-        resp = input(f"Confirm {action_label}? (y/N): ").strip().lower()
+        resp = _ask_operator(f"Confirm {action_label}? (y/N): ").strip().lower()
         if isinstance(timings, dict):
             timings["input_wait_s"] = timings.get("input_wait_s", 0.0) + (time.perf_counter() - t0)
         return resp in {"y", "yes"}
@@ -425,7 +480,7 @@ def _choose_opening_message(
             prompt = prompt.replace(": ", ", or reject, or long, or short: ")
         try:
             t0 = time.perf_counter()
-            resp = input(prompt).strip().lower()
+            resp = _ask_operator(prompt).strip().lower()
             if isinstance(timings, dict):
                 timings["input_wait_s"] = timings.get("input_wait_s", 0.0) + (time.perf_counter() - t0)
         except Exception:
@@ -446,13 +501,13 @@ def _choose_opening_message(
         if resp == "override":
             try:
                 t0 = time.perf_counter()
-                custom_text = input("Enter custom message (blank to cancel): ").strip()
+                custom_text = _ask_operator("Enter custom message (blank to cancel): ").strip()
                 if isinstance(timings, dict):
                     timings["input_wait_s"] = timings.get("input_wait_s", 0.0) + (time.perf_counter() - t0)
                 if not custom_text:
                     continue
                 t0 = time.perf_counter()
-                custom_target_id = input("Enter target ID (e.g. photo_2, prompt_1, poll_1_option_1) (blank=no target): ").strip().lower()
+                custom_target_id = _ask_operator("Enter target ID (e.g. photo_2, prompt_1, poll_1_option_1) (blank=no target): ").strip().lower()
                 if isinstance(timings, dict):
                     timings["input_wait_s"] = timings.get("input_wait_s", 0.0) + (time.perf_counter() - t0)
             except Exception:
@@ -483,7 +538,7 @@ def _choose_opening_message(
                 print(f"[SEND] {i}. ({tgt}) {o.get('text')}")
             try:
                 t0 = time.perf_counter()
-                pick_raw = input(f"Pick 1-{len(openers)} (blank to cancel): ").strip().lower()
+                pick_raw = _ask_operator(f"Pick 1-{len(openers)} (blank to cancel): ").strip().lower()
                 if isinstance(timings, dict):
                     timings["input_wait_s"] = timings.get("input_wait_s", 0.0) + (time.perf_counter() - t0)
             except Exception:
@@ -511,24 +566,23 @@ def _tap_bounds(device, bounds: Tuple[int, int, int, int], width: int, height: i
     return tap_x, tap_y
 
 
-_SEND_ANYWAY_CHECKED = False
+_SEND_ANYWAY_CHECKED: set = set()
 
 
 def _handle_send_like_anyway(device, width: int, height: int) -> bool:
-    global _SEND_ANYWAY_CHECKED
-    if _SEND_ANYWAY_CHECKED:
+    serial = str(getattr(device, "serial", "") or id(device))
+    if serial in _SEND_ANYWAY_CHECKED:
         return False
-    _SEND_ANYWAY_CHECKED = True
+    _SEND_ANYWAY_CHECKED.add(serial)
     try:
-        time.sleep(0.5)
-        sheet_xml = _dump_ui_xml(device)
+        sheet_xml = _settle_and_dump(device, fallback_s=0.5)
         sheet_nodes = _parse_ui_nodes(sheet_xml)
         anyway_bounds = _find_send_like_anyway_bounds(sheet_nodes)
         if not anyway_bounds:
             return False
         print("[UPSSELL] Send Like anyway sheet detected; dismissing.")
         _tap_bounds(device, anyway_bounds, width, height)
-        time.sleep(0.4)
+        _wait_for_ui_settle(device, fallback_s=0.4)
         return True
     except Exception as e:
         print(f"[UPSSELL] failed to dismiss: {e}")
@@ -547,8 +601,9 @@ def _wait_for_loading_to_clear(
         return True
     label = f" ({context})" if context else ""
     print(f"[LOAD] loading screen detected{label}; waiting up to {max_wait_s}s")
-    for _ in range(max_wait_s):
-        time.sleep(interval_s)
+    deadline = time.monotonic() + max_wait_s
+    while time.monotonic() < deadline:
+        time.sleep(min(interval_s, max(0.0, deadline - time.monotonic())))
         xml = _dump_ui_xml(device)
         nodes = _parse_ui_nodes(xml)
         if not _is_loading_screen(nodes):
@@ -566,7 +621,8 @@ def _backup_db_if_configured() -> None:
         if not os.path.isfile(src):
             return
         dst = os.path.join(backup_dir, "profiles.db")
-        shutil.copy2(src, dst)
+        # Online backup: a file copy would miss pages still in the WAL of our open connection.
+        backup_db(dst, src)
         print(f"[BACKUP] profiles.db -> {dst}")
     except Exception as e:
         print(f"[BACKUP] failed: {e}")
@@ -577,7 +633,7 @@ def _set_keep_awake(enabled: bool, device=None) -> None:
     cmd = f"svc power stayon {val}"
     try:
         if device is not None:
-            device.shell(cmd)
+            shell(device, cmd)
         else:
             subprocess.run(["adb", "shell", "svc", "power", "stayon", val], check=False)
         print(f"[AWAKE] stayon {val}")
@@ -595,7 +651,7 @@ def _set_heads_up_blocked(enabled: bool, device=None) -> None:
     cmd = f"settings put secure heads_up_enabled {val}"
     try:
         if device is not None:
-            device.shell(cmd)
+            shell(device, cmd)
         else:
             subprocess.run(["adb", "shell", "settings", "put", "secure", "heads_up_enabled", val], check=False)
         state = "blocked" if enabled else "restored"
@@ -622,20 +678,20 @@ def _enter_comment_text(
             comment_bounds, is_persistent = _find_add_comment_bounds(post_nodes)
             if comment_bounds:
                 break
-            time.sleep(0.2)
+            _wait_for_ui_settle(device, fallback_s=0.2, min_wait_s=0.2)
         if not comment_bounds:
-            time.sleep(0.2)
+            _wait_for_ui_settle(device, fallback_s=0.2, min_wait_s=0.2)
             continue
         try:
             _tap_bounds(device, comment_bounds, width, height)
-            time.sleep(0.2)
+            _wait_for_ui_settle(device, fallback_s=0.2)
             from helper_functions import input_text, hide_keyboard
             input_text(device, safe_text.strip())
-            time.sleep(0.2)
+            _wait_for_ui_settle(device, fallback_s=0.2)
             hide_keyboard(device)
-            time.sleep(0.2)
+            _wait_for_ui_settle(device, fallback_s=0.2)
         except Exception:
-            time.sleep(0.2)
+            _wait_for_ui_settle(device, fallback_s=0.2, min_wait_s=0.2)
             continue
         
         # New UI: The "Edit comment" box persists and often doesn't update its 'text' field in XML.
@@ -648,7 +704,7 @@ def _enter_comment_text(
         check_bounds, _ = _find_add_comment_bounds(post_nodes)
         if not check_bounds:
             return True
-        time.sleep(0.2)
+        _wait_for_ui_settle(device, fallback_s=0.2, min_wait_s=0.2)
     if last_xml:
         try:
             os.makedirs("logs", exist_ok=True)
@@ -662,32 +718,12 @@ def _enter_comment_text(
     return False
 
 
-def _write_run_log(path: str, data: Dict[str, Any]) -> None:
+def _write_run_log(path: str, data: Dict[str, Any], *keys: str) -> None:
+    """Journal the named top-level keys of data (all of them when none are given)."""
     if not path:
         return
     try:
-        # Calculate total cost
-        total_cost = 0.0
-        if "llm1_meta" in data and isinstance(data["llm1_meta"], dict):
-            total_cost += data["llm1_meta"].get("cost_usd", 0.0)
-        if "profile_eval" in data and isinstance(data["profile_eval"], dict):
-            total_cost += data["profile_eval"].get("cost_usd", 0.0)
-        if "llm3_result" in data and isinstance(data["llm3_result"], dict):
-            total_cost += data["llm3_result"].get("cost_usd", 0.0)
-        if "llm3_5_result" in data and isinstance(data["llm3_5_result"], dict):
-            total_cost += data["llm3_5_result"].get("cost_usd", 0.0)
-        if "llm4_result" in data and isinstance(data["llm4_result"], dict):
-            total_cost += data["llm4_result"].get("cost_usd", 0.0)
-        if "llm4_5_result" in data and isinstance(data["llm4_5_result"], dict):
-            total_cost += data["llm4_5_result"].get("cost_usd", 0.0)
-        if "llm5_result" in data and isinstance(data["llm5_result"], dict):
-            total_cost += data["llm5_result"].get("cost_usd", 0.0)
-
-        if "meta" in data and isinstance(data["meta"], dict):
-            data["meta"]["total_cost_usd"] = round(total_cost, 6)
-
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        write_run_log(path, data, keys or None)
     except Exception as e:
         print(f"[LOG] failed to write {path}: {e}")
 
@@ -699,7 +735,7 @@ def _handle_llm_error(error: LLMError, log_state: Dict[str, Any], out_path: str)
     """
     # Add error to log state
     log_state["llm_error"] = error.to_dict()
-    _write_run_log(out_path, log_state)
+    finish_run_log(out_path, log_state)
     
     # Print clear console error
     error_text = f"Type: {error.error_type}\nModel: {error.model}\nError: {error.error_message}"
@@ -777,6 +813,170 @@ def _print_rich_score_table(label: str, score_result: Dict[str, Any]) -> None:
     console.print(Panel(summary_text, border_style="blue", expand=False))
 
 
+class _SpeculativeOpeners:
+    """
+    Starts LLM3 opener generation in the background while the operator is still
+    looking at the gate decision. take(variant) hands back the finished (or
+    in-flight) result for the chosen variant; anything not taken is discarded.
+
+    HINGE_SPECULATIVE_OPENERS selects what is generated up front:
+      likely - only the variant the gate picked (default; nothing on reject)
+      both   - long and short, so an override is covered too
+      off    - no speculation
+    """
+
+    def __init__(self, extracted: Dict[str, Any], variants: List[str]):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.variants = list(variants)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.variants)), thread_name_prefix="llm3-spec")
+        self._futures = {}
+        self._started = time.perf_counter()
+        for v in self.variants:
+            fn = run_llm3_short if v == "short" else run_llm3_long
+            self._futures[v] = self._executor.submit(fn, extracted)
+        _log(f"[LLM3] speculative generation started: {', '.join(self.variants)}")
+
+    @staticmethod
+    def variants_for(decision: str) -> List[str]:
+        mode = (os.getenv("HINGE_SPECULATIVE_OPENERS", "likely") or "likely").strip().lower()
+        if mode == "both":
+            return ["long", "short"]
+        if mode == "likely":
+            if decision == "long_pickup":
+                return ["long"]
+            if decision == "short_pickup":
+                return ["short"]
+        return []
+
+    def take(self, variant: str) -> Optional[Dict[str, Any]]:
+        """Result for variant (blocks until it is ready); None if it was not speculated."""
+        fut = self._futures.pop(variant, None)
+        if fut is None:
+            return None
+        hidden = fut.done()
+        result = fut.result()
+        _log(
+            f"[LLM3] reusing speculative {variant} openers "
+            f"({'ready' if hidden else 'still running'} after {time.perf_counter() - self._started:.1f}s)"
+        )
+        return result
+
+    def discard(self) -> List[str]:
+        """Drop every result that was not taken; returns the discarded variants."""
+        dropped = sorted(self._futures)
+        for fut in self._futures.values():
+            fut.cancel()
+        self._futures.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if dropped:
+            _log(f"[LLM3] discarded speculative openers: {', '.join(dropped)}")
+        return dropped
+
+
+def _phash_check(cand_id: Any, hit: Optional[Dict[str, int]], is_same: bool) -> Dict[str, Any]:
+    hit = hit or {}
+    return {
+        "candidate_id": cand_id,
+        "is_same_person": is_same,
+        "method": "photo_hash",
+        "matched_photos": hit.get("matched_photos", 0),
+        "min_distance": hit.get("min_distance"),
+    }
+
+
+def _verify_rerun_candidates(
+    extracted: Dict[str, Any],
+    rerun_candidates: List[Dict[str, Any]],
+    phash_hits: Optional[Dict[int, Dict[str, int]]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Verify DB rerun candidates against the new profile, stopping at the first match.
+    Photo-hash evidence settles a candidate when it is decisive; otherwise the LLM decides.
+    A strong photo-hash match on a profile outside the name/age/height candidates also counts.
+    Returns (duplicate_checks, matched_candidate or None).
+    """
+    checks: List[Dict[str, Any]] = []
+    phash_hits = phash_hits or {}
+    need = phash_min_matches()
+    strong = {pid: hit for pid, hit in phash_hits.items() if hit.get("matched_photos", 0) >= need}
+    cand_ids = {c.get("id") for c in rerun_candidates or []}
+    extra_ids = [] if cand_ids & set(strong) else sorted(strong, key=lambda p: -strong[p]["matched_photos"])
+    if extra_ids:
+        try:
+            for row in fetch_profiles_by_ids(extra_ids):
+                hit = strong.get(row.get("id"))
+                print(
+                    f"[VERIFY] Photo hashes match previous profile ID {row.get('id')} "
+                    f"({hit['matched_photos']} photos, min distance {hit['min_distance']})"
+                )
+                checks.append(_phash_check(row.get("id"), hit, True))
+                return checks, row
+        except Exception as e:
+            print(f"[VERIFY] Photo hash lookup failed: {e}")
+    if not rerun_candidates:
+        return checks, None
+    core_bio = extracted.get("Core Biometrics (Objective)", {})
+    try:
+        print(f"[VERIFY] Found {len(rerun_candidates)} potential duplicate candidate(s). Verifying...")
+        for cand in rerun_candidates:
+            cand_id = cand.get("id")
+            hit = phash_hits.get(cand_id)
+            if cand_id in strong:
+                print(f"[VERIFY] Profile ID {cand_id}: {hit['matched_photos']} matching photos; confirmed without LLM")
+                checks.append(_phash_check(cand_id, hit, True))
+                return checks, cand
+            if not hit and phash_has_hashes(cand_id):
+                print(f"[VERIFY] Profile ID {cand_id}: no matching photos; ruled out without LLM")
+                checks.append(_phash_check(cand_id, hit, False))
+                continue
+            print(f"[VERIFY] Checking against previous profile ID {cand_id} with LLM...")
+
+            # Construct a dummy 'extracted' dict from the old flat row for the LLM
+            old_prof_data = {
+                "Name": cand.get("Name"),
+                "Age": cand.get("Age"),
+                "Job_title": cand.get("Job_title"),
+                "University": cand.get("University"),
+                "prompt_1": cand.get("prompt_1"),
+                "answer_1": cand.get("answer_1"),
+                "prompt_2": cand.get("prompt_2"),
+                "answer_2": cand.get("answer_2"),
+                "prompt_3": cand.get("prompt_3"),
+                "answer_3": cand.get("answer_3"),
+                "Apparent_Skin_Tone": cand.get("Apparent_Skin_Tone"),
+                "Apparent_Build_Category": cand.get("Apparent_Build_Category"),
+                "Hair_Color": cand.get("Hair_Color"),
+                "Apparent_Ethnic_Features": cand.get("Apparent_Ethnic_Features"),
+                "Photo1_desc": cand.get("Photo1_desc"),
+                "Photo2_desc": cand.get("Photo2_desc"),
+            }
+            new_prof_data = {
+                "Name": core_bio.get("Name"),
+                "Age": core_bio.get("Age"),
+                "Job_title": core_bio.get("Job title"),
+                "University": core_bio.get("University"),
+                "Prompts": extracted.get("Profile Content (Free Description)", {}).get("Profile Prompts and Answers"),
+                "Visual_Traits": extracted.get("Visual Analysis (Inferred From Images)", {}).get("Inferred Visual Traits Summary"),
+                "Photo_1": extracted.get("Profile Content (Free Description)", {}).get("Extensive Description of Photo 1", {}).get("description"),
+                "Photo_2": extracted.get("Profile Content (Free Description)", {}).get("Extensive Description of Photo 2", {}).get("description"),
+            }
+            is_same, dupe_response = run_duplicate_verification(old_prof_data, new_prof_data, model=os.getenv("LLM_SMALL_MODEL") or os.getenv("GEMINI_SMALL_MODEL"))
+
+            print(f"[VERIFY] LLM says: {is_same}")
+
+            # Annotate the response with the candidate ID
+            if isinstance(dupe_response, dict):
+                dupe_response["candidate_id"] = cand_id
+            checks.append(dupe_response)
+
+            if is_same:
+                return checks, cand
+    except Exception as e:
+        print(f"[VERIFY] Duplicate check failed: {e}")
+    return checks, None
+
+
 def _run_single_profile(
     device,
     width: int,
@@ -786,10 +986,14 @@ def _run_single_profile(
     scroll_step: int,
     profile_idx: int,
     total_profiles: int,
+    run_tag: str = "",
 ) -> int:
     if total_profiles > 1:
-        print(f"[RUN] profile {profile_idx + 1}/{total_profiles}")
+        print(f"{_operator_tag()}[RUN] profile {profile_idx + 1}/{total_profiles}")
     t_start = time.perf_counter()
+    llm_cache_before = llm_cache_snapshot()
+    llm_policy_before = llm_policy_snapshot()
+    llm_limits_before = llm_limits_snapshot()
     timings: Dict[str, Any] = {"input_wait_s": 0.0}
     user_requested_stop = False
     irreversible_action_taken = False
@@ -801,20 +1005,29 @@ def _run_single_profile(
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     suffix = f"_{profile_idx + 1:02d}" if total_profiles > 1 else ""
     ts_part = ts + suffix  # Include suffix in timestamp for folder naming
+    if run_tag:
+        ts_part += f"_{run_tag}"
     
     if not _wait_for_loading_to_clear(device, context="start"):
         return 3
     
+    llm1_stream = LLM1PhotoStream() if _llm1_stream_enabled() else None
     t0 = time.perf_counter()
-    scan_result = _scan_profile_single_pass(
-        device,
-        width,
-        height,
-        max_scrolls=max_scrolls,
-        scroll_step_px=scroll_step,
-        logs_dir="logs",
-        timestamp=ts_part,
-    )
+    try:
+        scan_result = _scan_profile_single_pass(
+            device,
+            width,
+            height,
+            max_scrolls=max_scrolls,
+            scroll_step_px=scroll_step,
+            logs_dir="logs",
+            timestamp=ts_part,
+            on_photo=llm1_stream.submit if llm1_stream else None,
+        )
+    except BaseException:
+        if llm1_stream:
+            llm1_stream.close()
+        raise
     timings["scan_s"] = round(time.perf_counter() - t0, 2)
     ui_map = scan_result.get("ui_map", {})
     biometrics = scan_result.get("biometrics", {})
@@ -843,6 +1056,8 @@ def _run_single_profile(
         
         # We need to completely abort the application, not just skip the profile.
         # We return a specific exit code (e.g., 4) to bubble up and halt the main loop.
+        if llm1_stream:
+            llm1_stream.close()
         return 4
     
     # Initialize log state and output paths using the run folder
@@ -947,31 +1162,118 @@ def _run_single_profile(
             "photos": len(ui_map.get("photos", [])),
             "poll_options": len(ui_map.get("poll", {}).get("options", [])),
         }
-        _write_run_log(out_path, log_state)
+        _write_run_log(out_path, log_state, "biometrics", "ui_map_summary")
+
+    # --- STAGE GRAPH: LLM1 / LLM2 / duplicate lookup / scoring ---
+    # LLM2 only reads the text side of the profile (home town, job, university,
+    # prompts) and the rerun lookup only needs name/age/height, so both run
+    # alongside LLM1. Scoring and the LLM duplicate check wait for LLM1's visuals.
+    def _stage_llm1(_: Dict[str, Any]) -> Any:
+        _log(f"[LLM1] Sending {len(photo_paths)} photos for visual analysis")
+        if llm1_stream:
+            try:
+                return llm1_stream.finish(photo_paths)
+            except Exception as e:
+                _log(f"[LLM1] Streaming failed ({e}); falling back to batch call")
+            finally:
+                llm1_stream.close()
+        return run_llm1_visual(
+            photo_paths,
+            model=os.getenv("LLM_SMALL_MODEL") or os.getenv("GEMINI_SMALL_MODEL") or None,
+        )
 
-    _log(f"[LLM1] Sending {len(photo_paths)} photos for visual analysis")
-    t0 = time.perf_counter()
-    llm1_result, llm1_meta = run_llm1_visual(
-        photo_paths,
-        model=os.getenv("LLM_SMALL_MODEL") or os.getenv("GEMINI_SMALL_MODEL") or None,
-    )
-    _handle_pending_interrupt()  # Check for Ctrl+C after LLM call
-    if isinstance(llm1_meta, dict):
-        llm1_meta["photo_id_map"] = llm1_photo_id_map
-    timings["llm1_s"] = round(time.perf_counter() - t0, 2)
-    if log_state:
-        log_state["llm1_result"] = llm1_result
-        log_state["llm1_meta"] = llm1_meta
-        meta = log_state.get("meta") or {}
-        meta["images_count"] = llm1_meta.get("images_count")
-        meta["images_paths"] = llm1_meta.get("images_paths", []) or photo_paths
-        log_state["meta"] = meta
-        _write_run_log(out_path, log_state)
+    def _stage_llm2(_: Dict[str, Any]) -> Any:
+        text_profile = _build_extracted_profile(biometrics, ui_map, {}, None)
+        return run_profile_eval_llm(
+            text_profile,
+            model=os.getenv("LLM_SMALL_MODEL") or os.getenv("GEMINI_SMALL_MODEL") or None,
+        )
 
-    extracted = _build_extracted_profile(biometrics, ui_map, llm1_result, llm1_meta)
-    if log_state:
-        log_state["extracted_profile"] = extracted
-        _write_run_log(out_path, log_state)
+    def _stage_extracted(deps: Dict[str, Any]) -> Any:
+        llm1_result, llm1_meta = deps["llm1"]
+        if isinstance(llm1_meta, dict):
+            llm1_meta["photo_id_map"] = llm1_photo_id_map
+        return _build_extracted_profile(biometrics, ui_map, llm1_result, llm1_meta)
+
+    def _stage_rerun_lookup(_: Dict[str, Any]) -> Any:
+        name, age, height_cm = biometrics.get("Name"), biometrics.get("Age"), biometrics.get("Height")
+        try:
+            if name and age and height_cm:
+                return check_for_rerun(str(name).strip(), int(age), int(height_cm))
+        except Exception as e:
+            print(f"[VERIFY] Duplicate check failed: {e}")
+        return []
+
+    def _stage_phash_lookup(_: Dict[str, Any]) -> Any:
+        try:
+            return find_matching_profiles([p.get("hash") for p in ui_map.get("photos", [])])
+        except Exception as e:
+            print(f"[VERIFY] Photo hash lookup failed: {e}")
+        return {}
+
+    def _stage_dupe_verify(deps: Dict[str, Any]) -> Any:
+        return _verify_rerun_candidates(deps["extracted"], deps["rerun_lookup"], deps["phash_lookup"])
+
+    def _stage_score(deps: Dict[str, Any]) -> Any:
+        extracted, eval_result = deps["extracted"], deps["llm2"]
+        long_score_result = _score_profile_long(extracted, eval_result)
+        short_score_result = _score_profile_short(extracted, eval_result)
+        return long_score_result, short_score_result
+
+    def _on_stage_done(name: str, result: Any) -> None:
+        if not log_state:
+            return
+        if name == "llm1":
+            llm1_result, llm1_meta = result
+            payload_stats = llm1_meta.get("image_payload") or {}
+            if payload_stats.get("images"):
+                _log(
+                    f"[LLM1] image payload {payload_stats['bytes_in'] / 1024:.0f}KB -> "
+                    f"{payload_stats['bytes_out'] / 1024:.0f}KB (saved {payload_stats['bytes_saved'] / 1024:.0f}KB)"
+                )
+            log_state["llm1_result"] = llm1_result
+            log_state["llm1_meta"] = llm1_meta
+            meta = log_state.get("meta") or {}
+            meta["images_count"] = llm1_meta.get("images_count")
+            meta["images_paths"] = llm1_meta.get("images_paths", []) or photo_paths
+            log_state["meta"] = meta
+            keys = ("llm1_result", "llm1_meta", "meta")
+        elif name == "llm2":
+            log_state["profile_eval"] = result
+            keys = ("profile_eval",)
+        elif name == "extracted":
+            log_state["extracted_profile"] = result
+            keys = ("extracted_profile",)
+        elif name == "dupe_verify":
+            log_state["duplicate_checks"] = result[0]
+            keys = ("duplicate_checks",)
+        else:
+            return
+        _write_run_log(out_path, log_state, *keys)
+
+    stage_results = run_stage_graph(
+        [
+            Stage("llm1", _stage_llm1, timing_key="llm1_s"),
+            Stage("llm2", _stage_llm2, timing_key="llm2_s"),
+            Stage("rerun_lookup", _stage_rerun_lookup, timing_key="rerun_lookup_s"),
+            Stage("extracted", _stage_extracted, deps=["llm1"]),
+            Stage("phash_lookup", _stage_phash_lookup, timing_key="phash_lookup_s"),
+            Stage(
+                "dupe_verify",
+                _stage_dupe_verify,
+                deps=["extracted", "rerun_lookup", "phash_lookup"],
+                timing_key="dupe_verify_s",
+            ),
+            Stage("score", _stage_score, deps=["extracted", "llm2"]),
+        ],
+        timings=timings,
+        between_stages=_handle_pending_interrupt,  # Ctrl+C pauses between stages
+        on_stage_done=_on_stage_done,
+    )
+    extracted = stage_results["extracted"]
+    eval_result = stage_results["llm2"]
+    long_score_result, short_score_result = stage_results["score"]
+    duplicate_checks, returning_cand = stage_results["dupe_verify"]
 
     # Hard abort if core biometrics failed to extract
     core_bio = extracted.get("Core Biometrics (Objective)", {})
@@ -999,18 +1301,6 @@ def _run_single_profile(
         # We return a specific exit code (e.g., 4) to bubble up and halt the main loop.
         return 4
 
-    t0 = time.perf_counter()
-    eval_result = run_profile_eval_llm(
-        extracted,
-        model=os.getenv("LLM_SMALL_MODEL") or os.getenv("GEMINI_SMALL_MODEL") or None,
-    )
-    _handle_pending_interrupt()  # Check for Ctrl+C after LLM call
-    timings["llm2_s"] = round(time.perf_counter() - t0, 2)
-    if log_state:
-        log_state["profile_eval"] = eval_result
-        _write_run_log(out_path, log_state)
-    long_score_result = _score_profile_long(extracted, eval_result)
-    short_score_result = _score_profile_short(extracted, eval_result)
     score_table_long = _format_score_table("Long", long_score_result)
     score_table_short = _format_score_table("Short", short_score_result)
     score_table = score_table_long + "\n\n" + score_table_short
@@ -1020,7 +1310,7 @@ def _run_single_profile(
         log_state["score_table_long"] = score_table_long
         log_state["score_table_short"] = score_table_short
         log_state["score_table"] = score_table
-        _write_run_log(out_path, log_state)
+        _write_run_log(out_path, log_state, "long_score_result", "short_score_result", "score_table_long", "score_table_short", "score_table")
     if table_path:
         try:
             with open(table_path, "w", encoding="utf-8") as f:
@@ -1078,85 +1368,36 @@ def _run_single_profile(
             "t_long": int(T_LONG),
             "t_short": int(T_SHORT),
         }
-        _write_run_log(out_path, log_state)
+        _write_run_log(out_path, log_state, "gate_decision", "gate_metrics")
+
+    # Start the likely opener variant now; the duplicate check and the override
+    # prompt below give it a head start.
+    speculative_openers = None
+    spec_variants = _SpeculativeOpeners.variants_for(decision) if not args.unrestricted else []
+    if spec_variants:
+        speculative_openers = _SpeculativeOpeners(extracted, spec_variants)
 
     # --- DUPLICATE CHECK ---
     linked_profile_id = None
-    if log_state:
-        log_state["duplicate_checks"] = []
+    if returning_cand:
+        cand = returning_cand
+        _alert_user("🚨 IDENTIFIED RETURNING PROFILE 🚨")
+        alert_msg = (
+            f"🚨 [bold red]IDENTIFIED RETURNING PROFILE[/bold red] 🚨\n\n"
+            f"Name: {cand.get('Name')}\n"
+            f"Previously seen on: {cand.get('timestamp')}\n"
+            f"Previous Verdict: [bold]{cand.get('verdict')}[/bold]\n"
+            f"Previous Long Score: {cand.get('long_score')}\n"
+            f"Previous Short Score: {cand.get('short_score')}\n"
+            f"Action: Profile will be treated as new, but linked in DB."
+        )
+        console.print(Panel(alert_msg, border_style="red", expand=False))
         
-    try:
-        if name_val and age_val and height_val:
-            age_int = int(age_val)
-            height_int = int(height_val)
-            rerun_candidates = check_for_rerun(str(name_val).strip(), age_int, height_int)
-            if rerun_candidates:
-                print(f"[VERIFY] Found {len(rerun_candidates)} potential duplicate candidate(s). Verifying with LLM...")
-                for cand in rerun_candidates:
-                    cand_id = cand.get("id")
-                    print(f"[VERIFY] Checking against previous profile ID {cand_id}...")
-                    
-                    # Construct a dummy 'extracted' dict from the old flat row for the LLM
-                    old_prof_data = {
-                        "Name": cand.get("Name"),
-                        "Age": cand.get("Age"),
-                        "Job_title": cand.get("Job_title"),
-                        "University": cand.get("University"),
-                        "prompt_1": cand.get("prompt_1"),
-                        "answer_1": cand.get("answer_1"),
-                        "prompt_2": cand.get("prompt_2"),
-                        "answer_2": cand.get("answer_2"),
-                        "prompt_3": cand.get("prompt_3"),
-                        "answer_3": cand.get("answer_3"),
-                        "Apparent_Skin_Tone": cand.get("Apparent_Skin_Tone"),
-                        "Apparent_Build_Category": cand.get("Apparent_Build_Category"),
-                        "Hair_Color": cand.get("Hair_Color"),
-                        "Apparent_Ethnic_Features": cand.get("Apparent_Ethnic_Features"),
-                        "Photo1_desc": cand.get("Photo1_desc"),
-                        "Photo2_desc": cand.get("Photo2_desc"),
-                    }
-                    new_prof_data = {
-                        "Name": core_bio.get("Name"),
-                        "Age": core_bio.get("Age"),
-                        "Job_title": core_bio.get("Job title"),
-                        "University": core_bio.get("University"),
-                        "Prompts": extracted.get("Profile Content (Free Description)", {}).get("Profile Prompts and Answers"),
-                        "Visual_Traits": extracted.get("Visual Analysis (Inferred From Images)", {}).get("Inferred Visual Traits Summary"),
-                        "Photo_1": extracted.get("Profile Content (Free Description)", {}).get("Extensive Description of Photo 1", {}).get("description"),
-                        "Photo_2": extracted.get("Profile Content (Free Description)", {}).get("Extensive Description of Photo 2", {}).get("description"),
-                    }
-                    is_same, dupe_response = run_duplicate_verification(old_prof_data, new_prof_data, model=os.getenv("LLM_SMALL_MODEL") or os.getenv("GEMINI_SMALL_MODEL"))
-                    
-                    print(f"[VERIFY] LLM says: {is_same}")
-                    
-                    if log_state:
-                        # Annotate the response with the candidate ID
-                        if isinstance(dupe_response, dict):
-                            dupe_response["candidate_id"] = cand_id
-                        log_state["duplicate_checks"].append(dupe_response)
-                        _write_run_log(out_path, log_state)
-                    
-                    if is_same:
-                        _alert_user("🚨 IDENTIFIED RETURNING PROFILE 🚨")
-                        alert_msg = (
-                            f"🚨 [bold red]IDENTIFIED RETURNING PROFILE[/bold red] 🚨\n\n"
-                            f"Name: {cand.get('Name')}\n"
-                            f"Previously seen on: {cand.get('timestamp')}\n"
-                            f"Previous Verdict: [bold]{cand.get('verdict')}[/bold]\n"
-                            f"Previous Long Score: {cand.get('long_score')}\n"
-                            f"Previous Short Score: {cand.get('short_score')}\n"
-                            f"Action: Profile will be treated as new, but linked in DB."
-                        )
-                        console.print(Panel(alert_msg, border_style="red", expand=False))
-                        
-                        # Point to the root ID if this candidate was itself a duplicate of an earlier profile
-                        linked_profile_id = cand.get("linked_profile_id") or cand_id
-                        
-                        # TODO: Remove this after testing
-                        input("Press Enter to acknowledge returning profile and continue...")
-                        break
-    except Exception as e:
-        print(f"[VERIFY] Duplicate check failed: {e}")
+        # Point to the root ID if this candidate was itself a duplicate of an earlier profile
+        linked_profile_id = cand.get("linked_profile_id") or cand.get("id")
+        
+        # TODO: Remove this after testing
+        _ask_operator("Press Enter to acknowledge returning profile and continue...")
 
     # Ensure profile is evaluated, but DO NOT insert into DB until an action is taken
     score_breakdown = f"decision={decision} long_score={long_score} short_score={short_score}\n\n" + score_table
@@ -1176,7 +1417,8 @@ def _run_single_profile(
                 if not args.unrestricted and not manual_override:
                     _alert_user_if_needed("Action Required: Review gate decision")
                     t0 = time.perf_counter()
-                    override = Prompt.ask("[bold yellow]Override decision?[/bold yellow]", choices=["long", "short", "reject", ""], default="", show_default=False).strip().lower()
+                    with _OPERATOR_LOCK:
+                        override = Prompt.ask(_operator_tag() + "[bold yellow]Override decision?[/bold yellow]", choices=["long", "short", "reject", ""], default="", show_default=False).strip().lower()
                     timings["input_wait_s"] = timings.get("input_wait_s", 0.0) + (time.perf_counter() - t0)
                     if override in {"long", "short", "reject"}:
                         manual_override = override
@@ -1186,7 +1428,7 @@ def _run_single_profile(
             if log_state:
                 log_state["manual_override"] = manual_override
                 log_state["gate_decision"] = decision
-                _write_run_log(out_path, log_state)
+                _write_run_log(out_path, log_state, "manual_override", "gate_decision")
             console.print(f"[bold green]GATE[/bold green] decision={decision} long_score={long_score} short_score={short_score} long_delta={long_score - T_LONG} short_delta={short_score - T_SHORT} dom_margin={DOM_MARGIN}")
 
             llm3_variant = ""
@@ -1197,14 +1439,27 @@ def _run_single_profile(
                 llm3_variant = "short"
             elif decision == "long_pickup":
                 llm3_variant = "long"
+            spec_llm3 = None
+            if speculative_openers:
+                spec_llm3 = speculative_openers.take(llm3_variant) if llm3_variant else None
+                if log_state:
+                    log_state["llm3_speculative"] = {
+                        "variants": speculative_openers.variants,
+                        "used": llm3_variant if spec_llm3 is not None else "",
+                        "discarded": speculative_openers.discard(),
+                    }
+                speculative_openers = None
             if log_state:
                 log_state["llm3_variant"] = llm3_variant
-                _write_run_log(out_path, log_state)
+                _write_run_log(out_path, log_state, "llm3_variant", "llm3_speculative")
             if llm3_variant:
                 while True:
                     # Step 1: Generate 5 openers
                     t0 = time.perf_counter()
-                    if llm3_variant == "short":
+                    if spec_llm3 is not None:
+                        # Only the first pass reuses the speculative result; a redo regenerates.
+                        llm3_result, spec_llm3 = spec_llm3, None
+                    elif llm3_variant == "short":
                         llm3_result = run_llm3_short(extracted)
                     else:
                         llm3_result = run_llm3_long(extracted)
@@ -1212,7 +1467,7 @@ def _run_single_profile(
                     timings["llm3_s"] = round(time.perf_counter() - t0, 2)
                     if log_state:
                         log_state["llm3_result"] = llm3_result
-                        _write_run_log(out_path, log_state)
+                        _write_run_log(out_path, log_state, "llm3_result")
                     if not llm3_result:
                         llm4_result = {}
                         break
@@ -1224,7 +1479,7 @@ def _run_single_profile(
                     timings["llm3_5_s"] = round(time.perf_counter() - t0, 2)
                     if log_state:
                         log_state["llm3_5_result"] = llm3_5_result
-                        _write_run_log(out_path, log_state)
+                        _write_run_log(out_path, log_state, "llm3_5_result")
                     
                     # Step 3: Rewrite + score + gate
                     t0 = time.perf_counter()
@@ -1236,7 +1491,7 @@ def _run_single_profile(
                     timings["llm4_s"] = round(time.perf_counter() - t0, 2)
                     if log_state:
                         log_state["llm4_result"] = llm4_result
-                        _write_run_log(out_path, log_state)
+                        _write_run_log(out_path, log_state, "llm4_result")
                     
                     # Step 3.5: LLM4.5 picks best opener or fails all
                     t0 = time.perf_counter()
@@ -1245,7 +1500,7 @@ def _run_single_profile(
                     timings["llm4_5_s"] = round(time.perf_counter() - t0, 2)
                     if log_state:
                         log_state["llm4_5_result"] = llm4_5_result
-                        _write_run_log(out_path, log_state)
+                        _write_run_log(out_path, log_state, "llm4_5_result")
                     
                     # Handle LLM4.5 decision
                     if llm4_5_result.get("action") == "FAIL":
@@ -1268,7 +1523,7 @@ def _run_single_profile(
                         llm4_result["hook_basis"] = llm4_5_result.get("hook_basis", "")
                         if log_state:
                             log_state["llm4_result"] = llm4_result
-                            _write_run_log(out_path, log_state)
+                            _write_run_log(out_path, log_state, "llm4_result")
                         # Proceed to user confirmation
                         llm4_result, send_approved, redo_requested = _choose_opening_message(
                             llm3_result, llm4_result, args.unrestricted, timings
@@ -1282,7 +1537,7 @@ def _run_single_profile(
                     
                     if log_state:
                         log_state["llm4_result"] = llm4_result
-                        _write_run_log(out_path, log_state)
+                        _write_run_log(out_path, log_state, "llm4_result")
                     
                     # LLM5 Safety Check (Unrestricted Mode)
                     if send_approved and args.unrestricted:
@@ -1300,7 +1555,7 @@ def _run_single_profile(
                         timings["llm5_s"] = round(time.perf_counter() - t0, 2)
                         if log_state:
                             log_state["llm5_result"] = safety_res
-                            _write_run_log(out_path, log_state)
+                            _write_run_log(out_path, log_state, "llm5_result")
                         if not safety_res.get("approved"):
                             reason = safety_res.get("reason", "Unknown reason")
                             is_elite = safety_res.get("elite_signal", False)
@@ -1385,8 +1640,7 @@ def _run_single_profile(
                                 if tap_x is not None:
                                     target_action["tap_coords"] = [tap_x, tap_y]
                                     target_action["tap_like"] = True
-                                time.sleep(0.35)
-                                post_xml = _dump_ui_xml(device)
+                                post_xml = _settle_and_dump(device, fallback_s=0.35)
                                 post_nodes = _parse_ui_nodes(post_xml)
                                 post_bounds, _ = _find_like_button_near_expected(
                                     post_nodes, cur_scroll_area, "photo", tap_y
@@ -1542,8 +1796,7 @@ def _run_single_profile(
                                 target_action["tap_coords"] = [tap_x, tap_y]
                                 target_action["tap_like"] = True
                             if target_type != "poll":
-                                time.sleep(0.35)
-                                post_xml = _dump_ui_xml(device)
+                                post_xml = _settle_and_dump(device, fallback_s=0.35)
                                 post_nodes = _parse_ui_nodes(post_xml)
                                 post_bounds, _ = _find_like_button_near_expected(
                                     post_nodes, cur_scroll_area, target_type, tap_y
@@ -1571,7 +1824,7 @@ def _run_single_profile(
                     timings["llm5_s"] = round(time.perf_counter() - t0, 2)
                     if log_state:
                         log_state["llm5_result"] = safety_res
-                        _write_run_log(out_path, log_state)
+                        _write_run_log(out_path, log_state, "llm5_result")
                     if not safety_res.get("approved"):
                         reason = safety_res.get("reason", "Unknown reason")
                         is_elite = safety_res.get("elite_signal", False)
@@ -1589,7 +1842,7 @@ def _run_single_profile(
 
                         while True:
                             try:
-                                choice = input("Select option: ").strip().lower()
+                                choice = _ask_operator("Select option: ").strip().lower()
                             except Exception:
                                 choice = ""
 
@@ -1637,7 +1890,7 @@ def _run_single_profile(
 
             if log_state:
                 log_state["target_action"] = target_action
-                _write_run_log(out_path, log_state)
+                _write_run_log(out_path, log_state, "target_action")
 
             _backup_db_if_configured()
 
@@ -1646,7 +1899,7 @@ def _run_single_profile(
                     user_requested_stop = True
                     if log_state:
                         log_state["target_action"] = target_action
-                        _write_run_log(out_path, log_state)
+                        _write_run_log(out_path, log_state, "target_action")
                     if loading_stuck:
                         return 3
                     return 2
@@ -1659,16 +1912,15 @@ def _run_single_profile(
                 if not _enter_comment_text(device, width, height, chosen_text, attempts=3):
                     raise RuntimeError("Failed to enter comment text.")
 
-                time.sleep(0.2)
                 send_bounds = None
                 for attempt in range(6):
-                    post_xml = _dump_ui_xml(device)
+                    post_xml = _settle_and_dump(device, fallback_s=0.2) if attempt == 0 else _dump_ui_xml(device)
                     post_nodes = _parse_ui_nodes(post_xml)
                     send_bounds = _find_send_priority_like_bounds(post_nodes)
                     if send_bounds:
                         break
                     _log(f"[SEND] priority button not found (attempt {attempt + 1}/6)")
-                    time.sleep(0.35)
+                    _wait_for_ui_settle(device, fallback_s=0.35, min_wait_s=0.35)
 
                 if not send_bounds:
                     try:
@@ -1683,15 +1935,14 @@ def _run_single_profile(
                     # Recovery: re-focus the comment field, then retry.
                     try:
                         if _enter_comment_text(device, width, height, chosen_text, attempts=2):
-                            time.sleep(0.2)
                             for attempt in range(4):
-                                post_xml = _dump_ui_xml(device)
+                                post_xml = _settle_and_dump(device, fallback_s=0.2) if attempt == 0 else _dump_ui_xml(device)
                                 post_nodes = _parse_ui_nodes(post_xml)
                                 send_bounds = _find_send_priority_like_bounds(post_nodes)
                                 if send_bounds:
                                     break
                                 _log(f"[SEND] recovery attempt {attempt + 1}/4 failed")
-                                time.sleep(0.35)
+                                _wait_for_ui_settle(device, fallback_s=0.35, min_wait_s=0.35)
                     except Exception as e:
                         _log(f"[SEND] recovery failed: {e}")
 
@@ -1725,7 +1976,11 @@ def _run_single_profile(
 
             if log_state:
                 log_state["target_action"] = target_action
-                _write_run_log(out_path, log_state)
+                _write_run_log(out_path, log_state, "target_action")
+
+            # Crops are written lazily; get them on disk before the DB row and folder rename.
+            flush_photo_writes()
+            release_photos(photo_paths)
 
             # SQL logging (only after irreversible action)
             if irreversible_action_taken:
@@ -1744,6 +1999,10 @@ def _run_single_profile(
                             update_profile_opening_messages_json(pid, llm3_result)
                         if isinstance(llm4_result, dict) and llm4_result:
                             update_profile_opening_pick(pid, llm4_result)
+                        try:
+                            record_profile_hashes(pid, [p.get("hash") for p in ui_map.get("photos", [])])
+                        except Exception as e:
+                            print(f"[sql] photo hash index failed: {e}")
                         
                         # ML validation logging (if enabled)
                         """
@@ -1778,9 +2037,12 @@ def _run_single_profile(
                     try:
                         suffix = decision.replace("_pickup", "").upper()
                         new_folder = f"{run_folder}_{suffix}"
+                        flush_run_log()
                         os.rename(run_folder, new_folder)
                         run_folder = new_folder
-                        out_path = os.path.join(run_folder, "profile.json")
+                        new_out_path = os.path.join(run_folder, "profile.json")
+                        move_run_log(out_path, new_out_path)
+                        out_path = new_out_path
                         table_path = os.path.join(run_folder, "score.txt")
                         print(f"[LOG] Renamed run folder to {os.path.basename(new_folder)}")
                     except Exception as e:
@@ -1808,11 +2070,17 @@ def _run_single_profile(
         (t_end - t_start) - float(timings.get("input_wait_s", 0.0)),
         2,
     )
+    llm_cache_stats = llm_cache_delta(llm_cache_before)
+    llm_policy_stats = llm_policy_delta(llm_policy_before)
+    llm_limits_stats = llm_limits_delta(llm_limits_before)
     if log_state:
         meta = log_state.get("meta") or {}
         meta["timings"] = timings
+        meta["llm_cache"] = llm_cache_stats
+        meta["llm_policy"] = llm_policy_stats
+        meta["llm_limits"] = llm_limits_stats
         log_state["meta"] = meta
-        _write_run_log(out_path, log_state)
+        finish_run_log(out_path, log_state)
 
     parts = [
         f"total_s={timings.get('total_elapsed_s')}",
@@ -1823,6 +2091,10 @@ def _run_single_profile(
         if key in timings:
             parts.append(f"{key}={timings.get(key)}")
     print("[TIMINGS] " + " ".join(parts))
+    if llm_cache_stats:
+        hits = sum(c.get("hits", 0) for c in llm_cache_stats.values())
+        misses = sum(c.get("misses", 0) for c in llm_cache_stats.values())
+        print(f"[LLM_CACHE] hits={hits} misses={misses}")
 
     if _is_run_json_enabled():
         print(json.dumps(log_state, indent=2, ensure_ascii=False))
@@ -1871,6 +2143,98 @@ def _run_single_profile(
     return 0
 
 
+def _run_fleet(args: argparse.Namespace, device_ip: str, max_scrolls: int, scroll_step: int) -> int:
+    """
+    Run an independent _run_single_profile worker per connected device.
+    Workers share this process's LLM client cache and SQLite writer; operator
+    prompts are serialised and prefixed with the device serial.
+    """
+    ensure_adb_running()
+    devices = connect_all_devices(device_ip)
+    if not devices:
+        print("[FLEET] no devices connected")
+        return 1
+    total_profiles = max(1, int(args.profiles))
+    print(f"[FLEET] {len(devices)} device(s): {', '.join(str(d.serial) for d in devices)}")
+
+    stats: Dict[str, Dict[str, Any]] = {str(d.serial): {"done": 0, "rc": None} for d in devices}
+    stats_lock = threading.Lock()
+    t_fleet = time.perf_counter()
+
+    def _fleet_rate() -> Tuple[int, float]:
+        done = sum(v["done"] for v in stats.values())
+        hours = max(1e-9, (time.perf_counter() - t_fleet) / 3600.0)
+        return done, done / hours
+
+    def _worker(device) -> None:
+        serial = str(device.serial)
+        _WORKER.tag = serial
+        rc = 0
+        try:
+            width, height = get_screen_resolution(device)
+            open_hinge(device)
+            time.sleep(5)
+            _set_keep_awake(True, device=device)
+            _set_heads_up_blocked(True, device=device)
+            for idx in range(total_profiles):
+                if _FLEET_STOP.is_set():
+                    break
+                try:
+                    rc = _run_single_profile(
+                        device,
+                        width,
+                        height,
+                        args,
+                        max_scrolls,
+                        scroll_step,
+                        idx,
+                        total_profiles,
+                        run_tag=_safe_name(serial),
+                    )
+                except LLMError as e:
+                    rc = _handle_llm_error(e, {"meta": {"device": serial, "model": e.model}}, "")
+                finally:
+                    flush_photo_writes()
+                    finish_run_logs()
+                with stats_lock:
+                    if rc in (0, 2):
+                        stats[serial]["done"] += 1
+                    done, rate = _fleet_rate()
+                print(f"[FLEET] {serial} rc={rc} device_done={stats[serial]['done']} fleet_done={done} rate={rate:.1f}/h")
+                if rc:
+                    break
+        except SystemExit:
+            rc = 2
+        except Exception as e:
+            print(f"[FLEET] {serial} worker failed: {e}")
+            rc = 1
+        finally:
+            stats[serial]["rc"] = rc
+            try:
+                _set_keep_awake(False, device=device)
+                _set_heads_up_blocked(False, device=device)
+            except Exception:
+                pass
+
+    threads = [
+        threading.Thread(target=_worker, args=(d,), name=f"fleet-{d.serial}", daemon=True)
+        for d in devices
+    ]
+    for t in threads:
+        t.start()
+    # Join with a timeout so Ctrl+C still reaches the main-thread signal handler.
+    while any(t.is_alive() for t in threads):
+        for t in threads:
+            t.join(timeout=0.5)
+
+    done, rate = _fleet_rate()
+    elapsed_min = (time.perf_counter() - t_fleet) / 60.0
+    for serial, v in stats.items():
+        print(f"[FLEET] {serial}: profiles={v['done']} rc={v['rc']}")
+    print(f"[FLEET] total profiles={done} elapsed={elapsed_min:.1f}min throughput={rate:.1f} profiles/hour")
+    return 0 if all(v["rc"] in (0, 2) for v in stats.values()) else 1
+
+
 def main() -> int:
     # Register the pause handler for Ctrl+C
     signal.signal(signal.SIGINT, _signal_handler)
@@ -1888,6 +2252,15 @@ def main() -> int:
     max_scrolls = 40
     scroll_step = 900
 
+    # A hard crash leaves only profile.journal.jsonl in its run folder.
+    recover_run_logs("logs")
+
+    if args.fleet:
+        try:
+            return _run_fleet(args, device_ip, max_scrolls, scroll_step)
+        finally:
+            close_shell_sessions()
+
     device = None
     width = height = 0
     keep_awake = True
@@ -1931,6 +2304,11 @@ def main() -> int:
                 except Exception:
                     out_path = ""
                 return _handle_llm_error(e, log_state, out_path)
+            finally:
+                # Early returns and errors skip the end-of-profile flushes: write queued
+                # crops and materialize profile.json from the open journal.
+                flush_photo_writes()
+                finish_run_logs()
             
             # rc == 2 indicates user requested stop
             if rc == 2:
@@ -1947,6 +2325,7 @@ def main() -> int:
         if keep_awake and device:
             _set_keep_awake(False, device=device)
             _set_heads_up_blocked(False, device=device)
+        close_shell_sessions()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+import contextlib
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Process-wide SQLite access for profiles.db.
+#
+# Every thread gets one long-lived connection per database file, opened on first
+# use, so call sites never pay for connect/PRAGMA/close per operation. Each
+# connection has a statement cache, so repeated SQL strings reuse their
+# prepared statements. Rows come back as sqlite3.Row, which can be read by
+# column name (row["Name"]), by index or as dict(row).
+#
+# Schema DDL is no longer run per write. Modules that own tables call
+# register_schema(component, version, apply) at import. The first connection
+# to a database in this process compares the registered versions against the
+# schema_version table and applies only the components that are behind. After
+# that, the check is a set lookup.
+#
+# Writers still serialize through sqlite_store._serialized_write. WAL lets
+# the per-thread readers run alongside them.
+#
+# HINGE_DB_STATEMENT_CACHE=256   prepared statements kept per connection
+# HINGE_DB_BUSY_TIMEOUT_S=30     wait for another process's write lock
+
+SchemaApply = Callable[[sqlite3.Connection], None]
+
+_LOCAL = threading.local()
+_SCHEMA_LOCK = threading.RLock()
+_SCHEMAS: Dict[str, Tuple[int, SchemaApply]] = {}
+# db_path -> {component: version} already verified in this process
+_CHECKED: Dict[str, Dict[str, int]] = {}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+def default_db_path() -> str:
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "profiles.db"))
+
+
+def register_schema(component: str, version: int, apply: SchemaApply) -> None:
+    """Declare the DDL for one component; apply(con) must be idempotent."""
+    with _SCHEMA_LOCK:
+        _SCHEMAS[component] = (int(version), apply)
+
+
+def _ensure_schema(con: sqlite3.Connection, db_path: str) -> None:
+    with _SCHEMA_LOCK:
+        done = _CHECKED.setdefault(db_path, {})
+        pending = {c: v for c, v in _SCHEMAS.items() if done.get(c) != v[0]}
+        if not pending:
+            return
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version (component TEXT PRIMARY KEY, version INTEGER NOT NULL);"
+        )
+        stored = {r[0]: r[1] for r in con.execute("SELECT component, version FROM schema_version;")}
+        for component, (version, apply) in pending.items():
+            if stored.get(component, 0) < version:
+                apply(con)
+                con.execute(
+                    "INSERT OR REPLACE INTO schema_version (component, version) VALUES (?, ?);",
+                    (component, version),
+                )
+                con.commit()
+            done[component] = version
+
+
+def invalidate_schema(db_path: Optional[str] = None) -> None:
+    """Reapply every registered component (e.g. after a table rebuild dropped its indexes)."""
+    db_path = os.path.abspath(db_path or default_db_path())
+    with _SCHEMA_LOCK:
+        con = connection(db_path)
+        con.execute("DELETE FROM schema_version;")
+        con.commit()
+        _CHECKED.pop(db_path, None)
+        _ensure_schema(con, db_path)
+
+
+def _open(db_path: str, readonly: bool) -> sqlite3.Connection:
+    kwargs = {
+        "timeout": float(_env_int("HINGE_DB_BUSY_TIMEOUT_S", 30)),
+        "cached_statements": _env_int("HINGE_DB_STATEMENT_CACHE", 256),
+    }
+    if readonly:
+        con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, **kwargs)
+    else:
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        con = sqlite3.connect(db_path, **kwargs)
+        # WAL for read-while-write; NORMAL synchronous for perf
+        con.execute("PRAGMA journal_mode=WAL;")
+        con.execute("PRAGMA synchronous=NORMAL;")
+    con.row_factory = sqlite3.Row
+    return con
+
+
+def connection(db_path: Optional[str] = None, readonly: bool = False) -> sqlite3.Connection:
+    """This thread's connection to db_path (schema verified once per process for writable ones)."""
+    db_path = os.path.abspath(db_path or default_db_path())
+    conns: Dict[Tuple[str, bool], sqlite3.Connection] = getattr(_LOCAL, "conns", None)
+    if conns is None:
+        conns = _LOCAL.conns = {}
+    key = (db_path, bool(readonly))
+    con = conns.get(key)
+    if con is None:
+        con = conns[key] = _open(db_path, readonly)
+    if not readonly:
+        _ensure_schema(con, db_path)
+    return con
+
+
+@contextlib.contextmanager
+def transaction(db_path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """Commit on success, roll back on error."""
+    con = connection(db_path)
+    try:
+        yield con
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+
+
+def query(sql: str, params: Sequence[Any] = (), db_path: Optional[str] = None, readonly: bool = False) -> List[sqlite3.Row]:
+    return connection(db_path, readonly).execute(sql, params).fetchall()
+
+
+def query_one(sql: str, params: Sequence[Any] = (), db_path: Optional[str] = None, readonly: bool = False) -> Optional[sqlite3.Row]:
+    return connection(db_path, readonly).execute(sql, params).fetchone()
+
+
+def execute(sql: str, params: Any = (), db_path: Optional[str] = None) -> sqlite3.Cursor:
+    """Run one write statement in its own transaction."""
+    with transaction(db_path) as con:
+        return con.execute(sql, params)
+
+
+def executemany(sql: str, rows: Iterable[Any], db_path: Optional[str] = None) -> sqlite3.Cursor:
+    with transaction(db_path) as con:
+        return con.executemany(sql, rows)
+
+
+def backup_to(dst_path: str, db_path: Optional[str] = None) -> None:
+    """Consistent copy of the database (includes pages still in the WAL)."""
+    dst = sqlite3.connect(dst_path)
+    try:
+        connection(db_path).backup(dst)
+    finally:
+        dst.close()
+
+
+def close(db_path: Optional[str] = None) -> None:
+    """Close this thread's connections (all of them, or just db_path's)."""
+    conns: Dict[Tuple[str, bool], sqlite3.Connection] = getattr(_LOCAL, "conns", None) or {}
+    target = os.path.abspath(db_path) if db_path else None
+    for key in list(conns):
+        if target is None or key[0] == target:
+            conns.pop(key).close()
@@ -1,15 +1,15 @@
 #!/usr/bin/env python3
 
-import sqlite3
 import time
-import json
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
 from helper_functions import connect_device, ensure_adb_running, tap, swipe, get_screen_resolution
+import match_events
+import storage
 from sqlite_store import get_db_path, init_db
 from ui_scan import _dump_ui_xml, _parse_ui_nodes, _bounds_center, _parse_bounds
-from handle_matches import _automated_chat_capture, _update_profile_data, _log_milestone
+from handle_matches import _append_messages, _automated_chat_capture, _log_milestone
 
 def _is_matches_tab_selected(nodes: List[Dict[str, Any]]) -> bool:
     for n in nodes:
@@ -138,39 +138,20 @@ def _extract_profiles_from_list(xml: str) -> List[Dict[str, Any]]:
     return profiles
 
 def _get_db_profile(name: str) -> Optional[Dict[str, Any]]:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cur.execute("""
-        SELECT id, Name, chat_log, milestones, status, timestamp
+    row = storage.query_one("""
+        SELECT id, Name AS name, status, timestamp
         FROM profiles 
         WHERE matched = 1 AND Name = ?
-    """, (name,))
-    row = cur.fetchone()
-    con.close()
-    if row:
-        return {
-            "id": row[0],
-            "name": row[1],
-            "chat_log": row[2],
-            "milestones": row[3],
-            "status": row[4],
-            "timestamp": row[5]
-        }
-    return None
+    """, (name,), db_path=get_db_path())
+    return dict(row) if row else None
 
 def _all_active_profiles_in_db() -> List[Dict[str, Any]]:
-    db_path = get_db_path()
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    cur.execute("""
-        SELECT id, Name
+    rows = storage.query("""
+        SELECT id, Name AS name
         FROM profiles 
         WHERE matched = 1 AND status IN ('my_turn', 'her_turn', 'active')
-    """)
-    rows = cur.fetchall()
-    con.close()
-    return [{"id": r[0], "name": r[1]} for r in rows]
+    """, db_path=get_db_path())
+    return [dict(r) for r in rows]
 
 def sync_matches():
     ensure_adb_running()
@@ -212,9 +193,7 @@ def sync_matches():
             
             if folder == "Hidden":
                 # Mark as stale if not already
-                m_log_str = db_prof["milestones"]
-                m_log = json.loads(m_log_str) if m_log_str else []
-                is_stale = any(m["event"] == "stale" for m in m_log)
+                is_stale = match_events.has_kind(prof_id, "stale")
                 if not is_stale:
                     print(f"Marking {name} as stale from Hidden list...")
                     now = datetime.now().isoformat(timespec="seconds")
@@ -225,14 +204,13 @@ def sync_matches():
                 continue
                 
             # For Your turn / Their turn
-            c_log_str = db_prof["chat_log"]
-            c_log = json.loads(c_log_str) if c_log_str else []
+            last = match_events.last_message(prof_id)
             
             needs_import = False
-            if not c_log:
+            if not last:
                 needs_import = True
             else:
-                last_msg = c_log[-1]["description"].replace('\n', ' ')
+                last_msg = last["description"].replace('\n', ' ')
                 ui_preview = preview.replace('\n', ' ')
                 # Simple loose match since UI truncates
                 if not last_msg.startswith(ui_preview[:15]):
@@ -244,19 +222,14 @@ def sync_matches():
                 tap(device, cx, cy)
                 time.sleep(2)
                 
-                anchor_ts = c_log[-1]['timestamp'] if c_log else db_prof['timestamp']
+                anchor_ts = last['timestamp'] if last else db_prof['timestamp']
                 
                 try:
                     captured = _automated_chat_capture(name, anchor_ts)
                     if captured:
-                        # Simple append
-                        seen_descs = { m['description'] for m in c_log }
-                        new_msgs = [c for c in captured if c['description'] not in seen_descs]
-                        if new_msgs:
-                            c_log.extend(new_msgs)
-                            c_log.sort(key=lambda x: x['timestamp'])
-                            _update_profile_data(prof_id, chat_log=c_log)
-                            print(f"Imported {len(new_msgs)} new messages for {name}.")
+                        added = _append_messages(prof_id, captured)
+                        if added:
+                            print(f"Imported {added} new messages for {name}.")
                 except Exception as e:
                     print(f"Failed to capture chat for {name}: {e}")
                 
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional
+
+from helper_functions import shell
+from runtime import _log
+
+# Pluggable UI hierarchy providers.
+#
+# Every provider exposes dump_xml() -> str returning the raw <hierarchy> XML, so
+# _parse_ui_nodes (and every _find_* helper built on it) sees exactly the same
+# node dicts regardless of where the XML came from.
+#
+# HINGE_UI_PROVIDER selects the default:
+#   dump  - one-shot `uiautomator dump` per call (original behaviour, default)
+#   agent - persistent on-device uiautomator2 server, queried over a forwarded port
+
+_AGENT_DEVICE_PORT = 9008
+_AGENT_PACKAGE = "com.github.uiautomator.test"
+_AGENT_RUNNER = "androidx.test.runner.AndroidJUnitRunner"
+_AGENT_CLASS = "com.github.uiautomator.stub.Stub"
+
+
+class DumpHierarchyProvider:
+    """Original behaviour: uiautomator dump to a rotating file, cat it, delete it."""
+
+    name = "dump"
+
+    def __init__(self, device, tmp_path: str = "/sdcard/hinge_ui.xml"):
+        self.device = device
+        self.tmp_path = tmp_path
+
+    def dump_xml(self) -> str:
+        # Single shell call to reduce adb round-trips; keep best-effort cleanup.
+        return shell(
+            self.device,
+            f"uiautomator dump {self.tmp_path} && cat {self.tmp_path}; rm {self.tmp_path}"
+        )
+
+    def close(self) -> None:
+        return None
+
+
+class AgentHierarchyProvider:
+    """
+    Long-lived on-device hierarchy server (uiautomator2 instrumentation).
+    The server is started once per device and queried over an adb-forwarded
+    JSON-RPC port, which avoids the 1-2s cold start of `uiautomator dump`.
+    """
+
+    name = "agent"
+
+    def __init__(
+        self,
+        device,
+        local_port: Optional[int] = None,
+        device_port: int = _AGENT_DEVICE_PORT,
+        timeout_s: float = 5.0,
+    ):
+        self.device = device
+        self.local_port = int(local_port or os.getenv("HINGE_UI_AGENT_PORT", "0") or 0) or _pick_local_port(device)
+        self.device_port = device_port
+        self.timeout_s = timeout_s
+        self._started = False
+        self._lock = threading.Lock()
+
+    def _url(self) -> str:
+        return f"http://127.0.0.1:{self.local_port}/jsonrpc/0"
+
+    def _rpc(self, method: str, params: List[Any], timeout_s: Optional[float] = None) -> Any:
+        body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}).encode("utf-8")
+        req = urllib.request.Request(self._url(), data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=timeout_s or self.timeout_s) as resp:
+            payload = json.loads(resp.read().decode("utf-8"))
+        if payload.get("error"):
+            raise RuntimeError(f"agent error: {payload['error']}")
+        return payload.get("result")
+
+    def _ping(self) -> bool:
+        try:
+            return self._rpc("ping", [], timeout_s=1.0) is not None
+        except Exception:
+            return False
+
+    def start(self, wait_s: float = 10.0) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self.device.forward(f"tcp:{self.local_port}", f"tcp:{self.device_port}")
+            if not self._ping():
+                # Launch the instrumentation in the background; it keeps running on-device.
+                shell(
+                    self.device,
+                    f"nohup am instrument -w -r -e debug false -e class {_AGENT_CLASS} "
+                    f"{_AGENT_PACKAGE}/{_AGENT_RUNNER} >/dev/null 2>&1 &"
+                )
+                deadline = time.time() + wait_s
+                while time.time() < deadline:
+                    if self._ping():
+                        break
+                    time.sleep(0.25)
+                else:
+                    raise RuntimeError("UI agent did not come up")
+            self._started = True
+            _log(f"[UI] Hierarchy agent ready on tcp:{self.local_port}")
+
+    def dump_xml(self) -> str:
+        if not self._started:
+            self.start()
+        # params: compressed=False keeps every node, matching uiautomator dump output.
+        return self._rpc("dumpWindowHierarchy", [False]) or ""
+
+    def close(self) -> None:
+        self._started = False
+
+
+class FakeHierarchyProvider:
+    """
+    Local stand-in that serves XML without a device.
+    Accepts a list of XML strings (served in order, last one repeats) or a
+    callable returning the current XML.
+    """
+
+    name = "fake"
+
+    def __init__(self, source):
+        self._source = source
+        self._idx = 0
+
+    def dump_xml(self) -> str:
+        if callable(self._source):
+            return self._source() or ""
+        if not self._source:
+            return ""
+        xml = self._source[min(self._idx, len(self._source) - 1)]
+        self._idx += 1
+        return xml
+
+    def close(self) -> None:
+        return None
+
+
+_PROVIDERS: Dict[str, Any] = {}
+_PROVIDER_FACTORY: Optional[Callable[[Any], Any]] = None
+_PROVIDERS_LOCK = threading.Lock()
+
+
+def _device_key(device) -> str:
+    return str(getattr(device, "serial", None) or id(device))
+
+
+def _pick_local_port(device) -> int:
+    # Stable per-serial port so concurrent devices don't collide.
+    key = _device_key(device)
+    return 17900 + (sum(ord(c) for c in key) % 1000)
+
+
+def set_hierarchy_provider(factory: Optional[Callable[[Any], Any]]) -> None:
+    """Register a factory(device) -> provider used for every device (None resets to env default)."""
+    global _PROVIDER_FACTORY
+    with _PROVIDERS_LOCK:
+        for p in _PROVIDERS.values():
+            try:
+                p.close()
+            except Exception:
+                pass
+        _PROVIDERS.clear()
+        _PROVIDER_FACTORY = factory
+
+
+def _default_provider(device):
+    kind = (os.getenv("HINGE_UI_PROVIDER", "dump") or "dump").strip().lower()
+    if kind == "agent":
+        return AgentHierarchyProvider(device)
+    return DumpHierarchyProvider(device)
+
+
+def get_hierarchy_provider(device):
+    key = _device_key(device)
+    with _PROVIDERS_LOCK:
+        provider = _PROVIDERS.get(key)
+        if provider is None:
+            factory = _PROVIDER_FACTORY or _default_provider
+            provider = factory(device)
+            _PROVIDERS[key] = provider
+        return provider
+
+
+def dump_hierarchy(device) -> str:
+    """
+    Return raw hierarchy XML from the device's provider.
+    If a persistent provider fails, fall back to the one-shot dump for this
+    device so a broken agent never stalls a run.
+    """
+    provider = get_hierarchy_provider(device)
+    try:
+        return provider.dump_xml()
+    except Exception as e:
+        if isinstance(provider, DumpHierarchyProvider):
+            raise
+        _log(f"[UI] {provider.name} provider failed ({e}); falling back to uiautomator dump")
+        fallback = DumpHierarchyProvider(device)
+        with _PROVIDERS_LOCK:
+            _PROVIDERS[_device_key(device)] = fallback
+        return fallback.dump_xml()
@@ -1,14 +1,18 @@
 import os
 import time
 import xml.etree.ElementTree as ET
-from io import BytesIO
-from typing import Any, Dict, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from PIL import Image
 
+import photo_store
+from framebuffer import Framebuffer, capture_framebuffer
 from helper_functions import swipe, tap
 from runtime import _log, check_interrupt
 from text_utils import normalize_dashes
+from ui_hierarchy import DumpHierarchyProvider, dump_hierarchy, get_hierarchy_provider
+from ui_settle import frame_probe, settle_probe_mode, wait_for_settle, xml_key
 
 def _normalize_text_basic(text: str) -> str:
     import re
@@ -105,10 +109,13 @@ def _compute_center_ahash_from_file(
     path: str,
     crop_ratio: float = 0.6,
 ) -> Optional[int]:
-    if not path or not os.path.isfile(path):
+    # Crops from this run are still in memory (their PNG may not be written yet).
+    img = photo_store.get_pil(path)
+    if img is None and (not path or not os.path.isfile(path)):
         return None
     try:
-        img = Image.open(path).convert("RGB")
+        if img is None:
+            img = Image.open(path).convert("RGB")
         return _compute_center_ahash(img, crop_ratio=crop_ratio)
     except Exception:
         return None
@@ -128,12 +135,15 @@ def _extract_xml_root(raw: str) -> str:
 
 def _dump_ui_xml(device, tmp_path: str = "/sdcard/hinge_ui.xml") -> str:
     """
-    Dump UI hierarchy to a temp path on-device and return the XML string.
-    Uses a single rotating file to avoid cluttering the device storage.
+    Return the current UI hierarchy XML string.
+    Goes through the device's hierarchy provider (see ui_hierarchy); the default
+    provider dumps to a single rotating file to avoid cluttering device storage.
     """
     try:
-        # Single shell call to reduce adb round-trips; keep best-effort cleanup.
-        raw = device.shell(f"uiautomator dump {tmp_path} && cat {tmp_path}; rm {tmp_path}")
+        if tmp_path != "/sdcard/hinge_ui.xml":
+            raw = DumpHierarchyProvider(device, tmp_path=tmp_path).dump_xml()
+        else:
+            raw = dump_hierarchy(device)
         xml = _extract_xml_root(raw)
         if not xml:
             _log("[UI] Empty/invalid XML dump")
@@ -143,6 +153,53 @@ def _dump_ui_xml(device, tmp_path: str = "/sdcard/hinge_ui.xml") -> str:
         return ""
 
 
+def _wait_for_ui_settle(
+    device,
+    fallback_s: float = 0.2,
+    timeout_s: Optional[float] = None,
+    min_wait_s: float = 0.0,
+) -> str:
+    """
+    Wait until consecutive UI probes match (bounded by timeout_s) instead of a fixed sleep.
+    fallback_s is the legacy sleep used when no cheap probe is available.
+    Returns the settled XML when the hierarchy itself was probed, else "".
+    """
+    if min_wait_s > 0:
+        time.sleep(min_wait_s)
+    provider = get_hierarchy_provider(device)
+    mode = settle_probe_mode(device, not isinstance(provider, DumpHierarchyProvider))
+    if mode == "none":
+        return ""
+    if mode not in {"hierarchy", "frame"}:
+        time.sleep(max(0.0, fallback_s - min_wait_s))
+        return ""
+    timeout = timeout_s if timeout_s is not None else max(0.6, fallback_s * 3)
+    try:
+        if mode == "hierarchy":
+            settled, xml = wait_for_settle(lambda: _dump_ui_xml(device), timeout, key=xml_key)
+        else:
+            settled, xml = wait_for_settle(lambda: frame_probe(device), timeout)
+            xml = ""
+    except Exception as e:
+        _log(f"[UI] settle probe failed ({e}); sleeping {fallback_s}s")
+        time.sleep(fallback_s)
+        return ""
+    if not settled:
+        _log(f"[SCROLL] UI still changing after {timeout:.2f}s; continuing")
+    return xml
+
+
+def _settle_and_dump(
+    device,
+    fallback_s: float = 0.2,
+    timeout_s: Optional[float] = None,
+    min_wait_s: float = 0.0,
+) -> str:
+    """Wait for the UI to settle and return the current hierarchy XML."""
+    xml = _wait_for_ui_settle(device, fallback_s, timeout_s, min_wait_s)
+    return xml or _dump_ui_xml(device)
+
+
 def _parse_bounds(bounds: str) -> Optional[Tuple[int, int, int, int]]:
     if not bounds:
         return None
@@ -373,6 +430,40 @@ def _parse_ui_nodes(xml_text: str) -> List[Dict[str, Any]]:
     return _flatten_ui_nodes(root)
 
 
+class UIFrame:
+    """One consistent observation of the screen: parsed nodes plus (optionally) a screenshot."""
+
+    def __init__(self, xml: str, nodes: List[Dict[str, Any]], screenshot: Optional[Framebuffer], ts: float):
+        self.xml = xml
+        self.nodes = nodes
+        self.screenshot = screenshot
+        self.ts = ts
+
+
+# Screencaps run on their own adb connection, so they can overlap the hierarchy dump.
+_FRAME_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="frame")
+
+
+def _acquire_frame(device, capture_screen: bool = True, xml: str = "") -> UIFrame:
+    """
+    Fetch the hierarchy and the framebuffer concurrently and return them as one frame.
+    If xml is given (e.g. from a settle probe) only the screencap is taken.
+    A failed screencap leaves screenshot=None; callers then capture on demand.
+    """
+    ts = time.time()
+    shot_future = _FRAME_POOL.submit(capture_framebuffer, device) if capture_screen else None
+    if not xml:
+        xml = _dump_ui_xml(device)
+    nodes = _parse_ui_nodes(xml)
+    screenshot = None
+    if shot_future is not None:
+        try:
+            screenshot = shot_future.result()
+        except Exception as e:
+            _log(f"[UI] frame screencap failed: {e}")
+    return UIFrame(xml, nodes, screenshot, ts)
+
+
 def _find_scroll_area(nodes: List[Dict[str, Any]]) -> Optional[Tuple[int, int, int, int]]:
     # Choose the largest scrollable container (by height) as the profile scroll area.
     scroll_nodes = [n for n in nodes if n.get("scrollable") and n.get("bounds")]
@@ -973,8 +1064,7 @@ def _scan_biometrics_hscroll(
     no_new = 0
     while swipes_done < max_swipes and no_new < 2:
         _hscroll_once(device, h_area, "left")
-        time.sleep(0.2)
-        xml = _dump_ui_xml(device)
+        xml = _settle_and_dump(device, fallback_s=0.2)
         nodes = _parse_ui_nodes(xml)
         updates = _extract_biometrics_from_nodes(nodes, scroll_area)
         new_any = False
@@ -1253,9 +1343,7 @@ def _compute_center_ahash_from_bounds(
     if not cb:
         return None
     try:
-        img_bytes = device.screencap()
-        img = Image.open(BytesIO(img_bytes)).convert("RGB")
-        crop = img.crop(cb)
+        crop = capture_framebuffer(device).crop_image(cb)
         return _compute_center_ahash(crop, crop_ratio=crop_ratio)
     except Exception:
         return None
@@ -1283,15 +1371,14 @@ def _match_photo_bounds_by_hash(
             _log("[TARGET] no square photo candidates; retrying with partials")
     if expected_screen_y is not None:
         candidates.sort(key=lambda b: abs(_bounds_center(b)[1] - expected_screen_y))
-    img_bytes = device.screencap()
-    img = Image.open(BytesIO(img_bytes)).convert("RGB")
+    frame = capture_framebuffer(device)
     best_bounds = None
     best_dist = None
     for b in candidates:
         cb = _clamp_bounds_to_screen(b, width, height)
         if not cb:
             continue
-        crop = img.crop(cb)
+        crop = frame.crop_image(cb)
         h = _compute_center_ahash(crop)
         dist = _ahash_distance(h, target_hash)
         _log(f"[TARGET] photo hash candidate bounds={cb} dist={dist}")
@@ -1398,10 +1485,9 @@ def _get_photo_caption(
     # Tap "Show caption"
     tap_x, tap_y = _bounds_center(show_btn)
     tap(device, tap_x, tap_y)
-    time.sleep(0.3)
     
     # Re-dump UI to get the caption
-    xml = _dump_ui_xml(device)
+    xml = _settle_and_dump(device, fallback_s=0.3)
     nodes = _parse_ui_nodes(xml)
     
     # Extract caption text
@@ -1415,9 +1501,8 @@ def _get_photo_caption(
     if hide_btn:
         tap_x, tap_y = _bounds_center(hide_btn)
         tap(device, tap_x, tap_y)
-        time.sleep(0.2)
         # Re-dump to get clean state
-        xml = _dump_ui_xml(device)
+        xml = _settle_and_dump(device, fallback_s=0.2)
         nodes = _parse_ui_nodes(xml)
     
     return caption, nodes
@@ -1686,6 +1771,32 @@ def _scroll_and_capture(
     distance_px: Optional[int] = None,
     duration_ms: Optional[int] = None,
 ) -> Tuple[List[Dict[str, Any]], int]:
+    frame, actual = _scroll_and_acquire(
+        device,
+        width,
+        height,
+        scroll_area,
+        direction,
+        prev_nodes,
+        distance_px=distance_px,
+        duration_ms=duration_ms,
+        capture_screen=False,
+    )
+    return frame.nodes, actual
+
+
+def _scroll_and_acquire(
+    device,
+    width: int,
+    height: int,
+    scroll_area: Tuple[int, int, int, int],
+    direction: str,
+    prev_nodes: List[Dict[str, Any]],
+    distance_px: Optional[int] = None,
+    duration_ms: Optional[int] = None,
+    capture_screen: bool = True,
+) -> Tuple[UIFrame, int]:
+    """Scroll once and return the resulting frame plus the measured scroll delta."""
     expected = _scroll_once(
         device,
         width,
@@ -1695,9 +1806,9 @@ def _scroll_and_capture(
         distance_px,
         duration_ms=duration_ms or 450,
     )
-    time.sleep(0.2)
-    xml = _dump_ui_xml(device)
-    nodes = _parse_ui_nodes(xml)
+    settled_xml = _wait_for_ui_settle(device, fallback_s=0.2)
+    frame = _acquire_frame(device, capture_screen=capture_screen, xml=settled_xml)
+    nodes = frame.nodes
     current_scroll_area = _find_scroll_area(nodes) or scroll_area
     actual = _compute_scroll_delta(prev_nodes, nodes, current_scroll_area)
     prev_sig = _screen_signature(prev_nodes, current_scroll_area)
@@ -1742,7 +1853,7 @@ def _scroll_and_capture(
                 actual = 0
         else:
             _log(f"[SCROLL] delta=measured {actual}")
-    return nodes, actual
+    return frame, actual
 
 
 def _scroll_to_top(
@@ -2140,9 +2251,11 @@ def _capture_crop_from_device(
     width: int,
     height: int,
     crops_dir: str = "",
+    screenshot: Optional[Framebuffer] = None,
 ) -> str:
     """
-    Capture a full screencap and crop to bounds.
+    Capture the framebuffer and crop to bounds (only the crop is converted/encoded).
+    If screenshot is given (from the current frame), crop it instead of capturing again.
     If crops_dir is provided, save there; otherwise use legacy images/crops/ location.
     """
     x1, y1, x2, y2 = bounds
@@ -2153,9 +2266,8 @@ def _capture_crop_from_device(
     if x2 <= x1 or y2 <= y1:
         raise ValueError("Invalid crop bounds")
 
-    img_bytes = device.screencap()
-    img = Image.open(BytesIO(img_bytes)).convert("RGB")
-    crop = img.crop((x1, y1, x2, y2))
+    frame = screenshot if screenshot is not None else capture_framebuffer(device)
+    crop = frame.crop((x1, y1, x2, y2))[:, :, :3].copy()
 
     if crops_dir:
         out_dir = crops_dir
@@ -2164,7 +2276,8 @@ def _capture_crop_from_device(
     os.makedirs(out_dir, exist_ok=True)
     ts = int(time.time() * 1000)
     out_path = os.path.join(out_dir, f"{ts}_{out_name}.png")
-    crop.save(out_path)
+    # The decoded crop stays in memory for aHash/LLM/ML; the PNG is written in the background.
+    photo_store.put(out_path, crop)
     return out_path
 
 
@@ -2232,11 +2345,14 @@ def _scan_profile_single_pass(
     scroll_step_px: Optional[int] = None,
     logs_dir: str = "logs",
     timestamp: str = "",
+    on_photo: Optional[Callable[[Dict[str, Any]], None]] = None,
 ) -> Dict[str, Any]:
     """
     Single-pass slow scan: extract text + biometrics, capture photos as they appear.
     Creates a profile folder at logs_dir/{timestamp}_{Name}/ and saves all outputs there.
     Returns the folder path in the result dict.
+    on_photo(entry) is called with each new ui_map["photos"] entry right after it is
+    appended (e.g. to start LLM1 on it while scrolling continues).
     """
     ui_map = {
         "prompts": [],
@@ -2257,8 +2373,8 @@ def _scan_profile_single_pass(
 
     start_time = time.time()
 
-    xml = _dump_ui_xml(device)
-    nodes = _parse_ui_nodes(xml)
+    frame = _acquire_frame(device)
+    nodes = frame.nodes
     scroll_area = _find_scroll_area(nodes)
     if not scroll_area:
         _log("[UI] No scrollable area found in XML.")
@@ -2406,6 +2522,8 @@ def _scan_profile_single_pass(
                                     )
                                 media_type = _infer_media_type(nodes, photo_bounds)
 
+                                # Reuse the frame's screenshot only if nothing moved since it was taken.
+                                frame_shot = frame.screenshot if nodes is frame.nodes else None
                                 try:
                                     crop_path = _capture_crop_from_device(
                                         device,
@@ -2414,6 +2532,7 @@ def _scan_profile_single_pass(
                                         width,
                                         height,
                                         run_folder,
+                                        screenshot=frame_shot,
                                     )
                                     photo_paths.append(crop_path)
                                 except Exception as e:
@@ -2432,10 +2551,7 @@ def _scan_profile_single_pass(
                                 if duplicate_hash:
                                     _log(f"[PHOTO] skip duplicate hash abs_top={abs_top}")
                                     if crop_path:
-                                        try:
-                                            os.remove(crop_path)
-                                        except Exception:
-                                            pass
+                                        photo_store.discard(crop_path)
                                     consecutive_duplicate_skips += 1
                                     if consecutive_duplicate_skips >= 2:
                                         _log("[SCROLL] consecutive duplicate photos; assuming end of profile.")
@@ -2466,6 +2582,11 @@ def _scan_profile_single_pass(
                                             "caption": caption,
                                         }
                                     )
+                                    if on_photo is not None:
+                                        try:
+                                            on_photo(ui_map["photos"][-1])
+                                        except Exception as e:
+                                            _log(f"[PHOTO] on_photo callback failed: {e}")
                                     seen_photo_keys.add(key)
                                     if photo_hash is not None:
                                         seen_photo_hashes.append(photo_hash)
@@ -2509,7 +2630,7 @@ def _scan_profile_single_pass(
             break
         prev_nodes = nodes
         prev_scroll_area = scroll_area
-        nodes, delta = _scroll_and_capture(
+        frame, delta = _scroll_and_acquire(
             device,
             width,
             height,
@@ -2518,6 +2639,7 @@ def _scan_profile_single_pass(
             prev_nodes,
             distance_px=scroll_step_px,
         )
+        nodes = frame.nodes
         scroll_area = _find_scroll_area(nodes) or scroll_area
         ui_map["scroll_area"] = scroll_area
         offset += delta
@@ -2559,6 +2681,12 @@ def _scan_profile_single_pass(
         "ui_map": ui_map,
         "biometrics": biometrics,
         "photo_paths": photo_paths,
+        # Decoded RGB crops keyed by crop_path (same arrays photo_store hands to LLM1/ML).
+        "photo_buffers": {
+            p["crop_path"]: photo_store.get_rgb(p["crop_path"])
+            for p in ui_map.get("photos", [])
+            if p.get("crop_path")
+        },
         "scroll_offset": offset,
         "scroll_area": scroll_area,
         "nodes": nodes,
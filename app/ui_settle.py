@@ -0,0 +1,70 @@
+import hashlib
+import os
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from framebuffer import capture_framebuffer
+
+# UI settle detection.
+#
+# Instead of sleeping a fixed worst-case time after a gesture, poll a cheap probe
+# until it returns the same value on consecutive reads (or a deadline passes).
+#
+# HINGE_SETTLE_PROBE selects the probe:
+#   auto      - hierarchy when a persistent hierarchy provider is active, else sleep (default)
+#   hierarchy - hash of the UI XML (the settled XML is handed back to the caller)
+#   frame     - hash of a coarse framebuffer sample (opt-in: every probe pulls a
+#               full framebuffer, ~10 MB, so two reads cost more than the 0.2 s sleep)
+#   sleep     - original fixed sleeps
+
+
+def wait_for_settle(
+    probe: Callable[[], Any],
+    timeout_s: float,
+    interval_s: float = 0.05,
+    stable_reads: int = 2,
+    key: Optional[Callable[[Any], Any]] = None,
+) -> Tuple[bool, Any]:
+    """
+    Call probe() until stable_reads consecutive results compare equal.
+    Returns (settled, last_value); settled is False if the deadline passed first.
+    """
+    deadline = time.monotonic() + max(0.0, timeout_s)
+    last_key: Any = None
+    streak = 0
+    value: Any = None
+    while True:
+        value = probe()
+        k = key(value) if key else value
+        if streak and k == last_key:
+            streak += 1
+        else:
+            streak = 1
+            last_key = k
+        if streak >= stable_reads:
+            return True, value
+        if time.monotonic() >= deadline:
+            return False, value
+        time.sleep(interval_s)
+
+
+def frame_probe(device, step: int = 16) -> bytes:
+    """Digest of a strided, 4-bit quantised sample of the framebuffer."""
+    pixels = capture_framebuffer(device).pixels
+    sample = pixels[::step, ::step, :3] >> 4
+    return hashlib.blake2b(sample.tobytes(), digest_size=16).digest()
+
+
+def xml_key(xml: str) -> bytes:
+    return hashlib.blake2b((xml or "").encode("utf-8"), digest_size=16).digest()
+
+
+def settle_probe_mode(device, persistent_hierarchy: bool) -> str:
+    mode = (os.getenv("HINGE_SETTLE_PROBE", "auto") or "auto").strip().lower()
+    if mode != "auto":
+        return mode
+    if getattr(device, "always_settled", False):
+        return "none"
+    if persistent_hierarchy:
+        return "hierarchy"
+    return "sleep"